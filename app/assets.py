@@ -0,0 +1,58 @@
+# app/assets.py
+"""
+Estáticos com o hash do conteúdo no nome.
+
+`static_url("vendor/echarts.min.js")` -> `/static/vendor/echarts.min.<hash>.js`.
+O `HashedStaticFiles` serve esse nome com `Cache-Control: immutable` por um
+ano (mudou o arquivo, muda a URL); o nome sem hash continua servido, com
+`no-cache`. Os hashes são calculados uma vez, na subida (import/montagem), e
+as requisições só consultam o dicionário: nada de disco no event loop. Sem
+passo de build; arquivo trocado com o servidor no ar vale depois do restart.
+"""
+import hashlib
+import os
+import re
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_HASHED = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{10})(?P<ext>\.[^./\\]+)$")
+
+def scan(directory: str) -> dict[str, str]:
+    """Hash (10 hex) de cada arquivo do diretório, pelo caminho relativo com `/`."""
+    hashes = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            full_path = os.path.join(root, name)
+            with open(full_path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()[:10]
+            hashes[os.path.relpath(full_path, directory).replace(os.sep, "/")] = digest
+    return hashes
+
+_hashes = scan(STATIC_DIR)
+
+def static_url(name: str) -> str:
+    """URL versionada de um arquivo de `app/static` (para os templates)."""
+    stem, ext = os.path.splitext(name)
+    return f"/static/{stem}.{_hashes[name]}{ext}"
+
+class HashedStaticFiles(StaticFiles):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hashes = scan(self.directory)
+
+    async def get_response(self, path: str, scope: Scope):
+        match = _HASHED.match(path)
+        if match:
+            original = match["stem"] + match["ext"]
+            digest = self.hashes.get(original.replace(os.sep, "/"))  # só arquivos do diretório
+            if digest is not None:
+                response = await super().get_response(original, scope)
+                # hash antigo (deploy novo com página velha em cache): entrega o atual, sem fixar
+                response.headers["Cache-Control"] = IMMUTABLE if digest == match["hash"] else "no-cache"
+                return response
+        response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
@@ -0,0 +1,108 @@
+# app/bulk.py
+import codecs
+import csv
+import json
+from itertools import islice
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+from fastapi import HTTPException
+
+# Tamanho dos lotes de INSERT (uma transação por lote)
+INSERT_BATCH = 1000
+# Quantidade máxima de valores num IN (...). O SQLite aceita até 32766
+# parâmetros por statement; ficamos bem abaixo disso.
+IN_CHUNK = 5000
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """Quebra um iterável em listas de até `size` itens."""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+def parse_json_or_ndjson(body: bytes, content_type: str | None) -> list[Any]:
+    """Aceita um array JSON ou NDJSON (um documento por linha, linhas vazias ignoradas)."""
+    text = body.decode("utf-8-sig")
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if ctype in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        rows = []
+        for lineno, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise HTTPException(status_code=400, detail=f"NDJSON inválido (linha {lineno}): {e.msg}")
+        return rows
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"JSON inválido: {e.msg}")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Esperado um array JSON ou NDJSON.")
+    return data
+
+def error_message(exc: Exception) -> str:
+    # Mensagem curta a partir de um ValidationError do Pydantic (ou outra exceção)
+    errors = getattr(exc, "errors", None)
+    if callable(errors):
+        parts = []
+        for err in errors():
+            loc = ".".join(str(p) for p in err.get("loc", ()) if p != "__root__")
+            msg = err.get("msg", "").removeprefix("Value error, ")
+            parts.append(f"{loc}: {msg}" if loc else msg)
+        return "; ".join(parts)
+    return str(exc)
+
+# --------------------- Leitura incremental (upload em stream) ---------------------
+
+async def aiter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """Quebra um stream de bytes em linhas `(nº da linha, texto)` sem bufferizar o arquivo."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    lineno = 0
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            lineno += 1
+            yield lineno, line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield lineno + 1, pending.rstrip("\r")
+
+async def aiter_ndjson(lines: AsyncIterator[tuple[int, str]]) -> AsyncIterator[tuple[int, Any, str | None]]:
+    # (linha, documento, erro); linhas vazias são ignoradas
+    async for lineno, line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield lineno, json.loads(line), None
+        except json.JSONDecodeError as e:
+            yield lineno, None, f"JSON inválido: {e.msg}"
+
+async def aiter_csv(lines: AsyncIterator[tuple[int, str]]) -> AsyncIterator[tuple[int, Any, str | None]]:
+    # A primeira linha é o cabeçalho. Campos entre aspas podem conter quebras de
+    # linha: juntamos linhas enquanto o número de aspas estiver ímpar.
+    header: list[str] | None = None
+    record, start = "", 0
+    async for lineno, line in lines:
+        if not record:
+            start = lineno
+            record = line
+        else:
+            record += "\n" + line
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"Esperadas {len(header)} colunas, recebidas {len(values)}."
+            continue
+        yield start, dict(zip(header, values)), None
+    if record:
+        yield start, None, "Aspas não fechadas até o fim do arquivo."
@@ -0,0 +1,104 @@
+# app/cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+# --------------------- Versão dos dados ---------------------
+# Um contador por tabela, incrementado pelas rotas de escrita após o commit.
+# Quem depende de um conjunto de tabelas usa as versões delas na chave de cache,
+# então só as entradas afetadas por uma escrita deixam de ser encontradas.
+# Os contadores são do processo (o deploy roda um único worker do uvicorn).
+
+_versions: dict[str, int] = {}
+_versions_lock = threading.Lock()
+_listeners: list[Callable[[tuple[str, ...]], None]] = []
+
+def data_version(*tables: str) -> tuple[int, ...]:
+    return tuple(_versions.get(t, 0) for t in tables)
+
+def bump_data_version(*tables: str) -> None:
+    with _versions_lock:
+        for t in tables:
+            _versions[t] = _versions.get(t, 0) + 1
+    for listener in tuple(_listeners):
+        listener(tables)
+
+def on_data_change(listener: Callable[[tuple[str, ...]], None]) -> None:
+    """Chama `listener(tabelas)` a cada escrita (depois do commit); deve ser rápido e não bloquear."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def off_data_change(listener: Callable[[tuple[str, ...]], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+# --------------------- Cache LRU com TTL ---------------------
+
+class AggregateCache:
+    """Cache em memória, limitado por tamanho (LRU) e por idade (TTL)."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    _MISS = object()
+
+    def lookup(self, key: Hashable) -> Any:
+        """Valor em cache ou `AggregateCache._MISS` (conta hit/miss)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return self._MISS
+
+    def store(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        value = self.lookup(key)
+        if value is self._MISS:
+            value = compute()
+            self.store(key, value)
+        return value
+
+    async def aget_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.lookup(key)
+        if value is self._MISS:
+            value = await compute()
+            self.store(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+            }
+
+dashboard_cache = AggregateCache(
+    maxsize=int(os.getenv("DASHBOARD_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "300")),
+)
@@ -0,0 +1,130 @@
+# app/compression.py
+"""
+Compressão negociada das respostas (Accept-Encoding): brotli quando o pacote
+`brotli` estiver instalado e o cliente aceitar, senão gzip.
+
+- só tipos textuais (JSON, NDJSON, CSV, HTML, JS, CSS, SVG); o que já vem com
+  Content-Encoding ou é binário (ex.: export `?gzip=true`) passa direto;
+- respostas inteiras abaixo de `COMPRESS_MIN_SIZE` bytes (1024) não compensam;
+- respostas em stream são comprimidas pedaço a pedaço, com flush a cada
+  pedaço para o cliente continuar recebendo as linhas conforme saem.
+
+Comprimida, a resposta leva `Vary: Accept-Encoding` e o ETag vira fraco
+(outra codificação é outra representação); o If-None-Match já compara
+em modo fraco (app.etag).
+"""
+import os
+import zlib
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele, só gzip
+    brotli = None
+
+MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))  # respostas dinâmicas: rápido > máximo
+
+COMPRESSIBLE = ("text/", "application/json", "application/x-ndjson", "application/javascript",
+                "application/xml", "image/svg+xml")
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Melhor codificação aceita pelo cliente (`br` > `gzip`), respeitando `q=0`."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+class _Encoder:
+    def __init__(self, coding: str):
+        if coding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.compress, self.flush, self.finish = self._c.process, self._c.flush, self._c.finish
+        else:
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31 -> formato gzip
+            self.compress, self.finish = self._c.compress, self._c.flush
+            self.flush = lambda: self._c.flush(zlib.Z_SYNC_FLUSH)
+
+class CompressionMiddleware:
+    """Middleware ASGI puro (sem BaseHTTPMiddleware): não acumula respostas em stream."""
+
+    def __init__(self, app, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", []))  # MutableHeaders edita no lugar
+                start = message
+                headers = Headers(raw=message["headers"])
+                passthrough = (
+                    "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE)
+                )
+                if not passthrough or message["status"] == 304:
+                    MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+                if passthrough or coding is None:
+                    passthrough = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = _Encoder(coding)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = coding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start)
+
+            if more_body:
+                chunk = encoder.compress(body) + encoder.flush()
+            else:
+                chunk = encoder.compress(body) + encoder.finish()
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
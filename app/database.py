@@ -1,24 +1,74 @@
 # app/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./rural.db")
 
+def _async_url(url: str) -> str:
+    # mesmo banco, driver assíncrono: asyncpg no PostgreSQL, aiosqlite no fallback SQLite
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgresql") or scheme == "postgres":
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
 # Para SQLite local (fallback) precisamos desse connect_args
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 
+# Engine síncrona: migrações, scripts e CLIs (app.summary, app.migrations)
 engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+def _sqlite_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def enable_sqlite_foreign_keys(engine: Engine) -> None:
+    """Liga as FKs em cada conexão SQLite (vêm desligadas): sem isso o ON DELETE CASCADE não roda."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _sqlite_foreign_keys)
+
+enable_sqlite_foreign_keys(engine)
+
+def _pool_options(url: str) -> dict:
+    """Configuração do pool lida do ambiente (DB_POOL_*)."""
+    options = {
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),  # segundos
+    }
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        )
+    return options
+
+# Engine assíncrona: usada pelas rotas da API
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False, **_pool_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+enable_sqlite_foreign_keys(async_engine.sync_engine)
+
 class Base(DeclarativeBase):
     """Base para os modelos SQLAlchemy."""
     pass
 
-# Dependency para FastAPI (vamos usar mais adiante)
+# Dependency síncrona (scripts e testes de migração)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+# Dependency para FastAPI
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,185 @@
+# app/diagnostics.py
+"""
+Diagnóstico de SQL (opt-in): log de consultas lentas e detector de N+1.
+
+Ligado por `SQL_DIAGNOSTICS=1`:
+- toda consulta acima de `SLOW_QUERY_MS` (default 200) vai para o log com os
+  parâmetros e o plano (`EXPLAIN QUERY PLAN` no SQLite, `EXPLAIN` no PostgreSQL);
+- ao fim de cada requisição, formatos de consulta repetidos `N_PLUS_ONE_THRESHOLD`
+  vezes ou mais (default 5) geram um aviso com a rota, junto com os lazy loads
+  de relacionamento (ex.: `Farm.plantings` carregado fazenda a fazenda).
+
+Para os testes, `QueryCounter`/`assert_max_queries` contam as consultas de uma
+engine independentemente do modo de diagnóstico.
+"""
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+ENABLED = os.getenv("SQL_DIAGNOSTICS") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+_PARAM = r"(?:\?|\$\d+|%\(\w+\)s|%s|:\w+)"
+_IN_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+def shape(statement: str) -> str:
+    """Formato da consulta: espaços normalizados e listas de parâmetros (`IN (?, ?, ?)`) colapsadas."""
+    return _IN_LIST.sub("(…)", _SPACES.sub(" ", statement).strip())
+
+class QueryLog:
+    """Consultas de um escopo (uma requisição)."""
+
+    def __init__(self):
+        self.shapes: Counter[str] = Counter()
+        self.lazy_loads: Counter[str] = Counter()
+        self.seconds = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.shapes.values())
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        return [(s, n) for s, n in self.shapes.most_common() if n >= threshold]
+
+_current: ContextVar[QueryLog | None] = ContextVar("sql_diagnostics", default=None)
+
+@contextmanager
+def track():
+    """Coleta as consultas do contexto atual (engines com `install`)."""
+    log = QueryLog()
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+
+# --------------------- engine / sessão ---------------------
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}.get(conn.dialect.name)
+    if prefix is None:
+        return "(EXPLAIN não suportado neste banco)"
+    # cursor cru: não passa pelos eventos da engine nem mexe no resultado corrente
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    except Exception as e:  # plano é só informativo
+        return f"(EXPLAIN falhou: {e})"
+    finally:
+        cursor.close()
+
+def _on_before(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_diag_t0", []).append(time.perf_counter())
+
+def _on_after(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["_diag_t0"].pop()
+    log = _current.get()
+    if log is not None:
+        log.shapes[shape(statement)] += 1
+        log.seconds += elapsed
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        plan = "(executemany)" if executemany else _explain(conn, statement, parameters)
+        logger.warning(
+            f"Consulta lenta ({elapsed * 1000:.0f} ms): {_SPACES.sub(' ', statement)}\n"
+            f"parâmetros: {repr(parameters)[:500]}\nplano:\n{plan}"
+        )
+
+def _on_error(context):
+    stack = context.connection.info.get("_diag_t0") if context.connection is not None else None
+    if stack:
+        stack.pop()
+
+def _on_orm_execute(state):
+    log = _current.get()
+    if log is not None and state.is_relationship_load and state.lazy_loaded_from is not None:
+        path = state.loader_strategy_path
+        prop = path[-1] if path is not None and len(path) else None
+        name = getattr(prop, "key", None) or state.bind_arguments.get("mapper").class_.__name__
+        log.lazy_loads[f"{state.lazy_loaded_from.class_.__name__}.{name}"] += 1
+
+_installed_session = False
+
+def install(engine: Engine) -> None:
+    """Liga o log de lentas/N+1 numa engine síncrona (para a assíncrona, passe `.sync_engine`)."""
+    global _installed_session
+    if not event.contains(engine, "after_cursor_execute", _on_after):
+        event.listen(engine, "before_cursor_execute", _on_before)
+        event.listen(engine, "after_cursor_execute", _on_after)
+        event.listen(engine, "handle_error", _on_error)
+    if not _installed_session:
+        # AsyncSession delega para Session, então vale para as duas
+        event.listen(Session, "do_orm_execute", _on_orm_execute)
+        _installed_session = True
+
+def report(log: QueryLog, where: str) -> None:
+    repeated = log.repeated()
+    lazy = [(attr, n) for attr, n in log.lazy_loads.most_common() if n >= N_PLUS_ONE_THRESHOLD]
+    if not repeated and not lazy:
+        return
+    lines = [f"Possível N+1 em {where}: {log.count} consultas ({log.seconds * 1000:.0f} ms)"]
+    lines += [f"  {n}x {s[:300]}" for s, n in repeated]
+    lines += [f"  lazy load {attr}: {n}x" for attr, n in lazy]
+    logger.warning("\n".join(lines))
+
+class DiagnosticsMiddleware:
+    """Middleware ASGI: um `QueryLog` por requisição, reportado no fim."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track() as log:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                report(log, f"{scope['method']} {route}")
+
+# --------------------- testes ---------------------
+
+class QueryCounter:
+    """Conta as consultas executadas numa engine enquanto o bloco `with` estiver aberto.
+
+    Não depende de contextvar (o TestClient roda o app em outra thread):
+    conta tudo o que passar pela engine.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: list[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(_SPACES.sub(" ", statement).strip())
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+@contextmanager
+def assert_max_queries(engine: Engine, limit: int):
+    """`with assert_max_queries(engine, 3): client.get(...)` — falha listando as consultas."""
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = "\n".join(f"  {i}. {s}" for i, s in enumerate(counter.statements, 1))
+        raise AssertionError(f"{counter.count} consultas (máximo {limit}):\n{listing}")
@@ -0,0 +1,56 @@
+# app/etag.py
+"""
+ETag e GET condicional para as leituras JSON.
+
+A tag é derivada das versões das tabelas de que a rota depende (app.cache),
+da URL (path + query) e de um id de boot, então muda a cada escrita e a cada
+restart (escritas por fora da API, como `seed_direct`, pedem restart).
+Com `If-None-Match` batendo, a dependência responde 304 antes da rota rodar:
+nenhuma consulta, nenhuma serialização.
+
+    @router.get("", dependencies=[Depends(etag("farms"))])
+"""
+import hashlib
+import os
+import uuid
+from fastapi import Request, Response
+from app.cache import data_version
+
+BOOT_ID = uuid.uuid4().hex
+
+# max-age=0 (default): o navegador/proxy guarda, mas revalida sempre (304 é barato)
+_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+CACHE_CONTROL = f"public, max-age={_MAX_AGE}, must-revalidate" if _MAX_AGE else "public, no-cache"
+
+class NotModified(Exception):
+    def __init__(self, headers: dict[str, str]):
+        self.headers = headers
+
+def compute_etag(request: Request, tables: tuple[str, ...]) -> str:
+    url = request.url.path + "?" + "&".join(sorted(request.url.query.split("&")))
+    raw = f"{BOOT_ID}|{url}|{data_version(*tables)}".encode()
+    return '"' + hashlib.blake2b(raw, digest_size=12).hexdigest() + '"'
+
+def matches(if_none_match: str | None, tag: str) -> bool:
+    if not if_none_match:
+        return False
+    # comparação fraca (RFC 9110 §13.1.2): ignora o prefixo W/
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or tag in candidates
+
+def etag(*tables: str):
+    """Dependência: ETag/Cache-Control na resposta, ou 304 se o cliente já tem a versão."""
+
+    async def dependency(request: Request, response: Response):
+        # a versão é lida antes da consulta: se uma escrita acontecer no meio,
+        # a tag fica mais velha que o conteúdo e o próximo GET só baixa de novo
+        tag = compute_etag(request, tables)
+        headers = {"ETag": tag, "Cache-Control": CACHE_CONTROL}
+        if matches(request.headers.get("if-none-match"), tag):
+            raise NotModified(headers)
+        response.headers.update(headers)
+
+    return dependency
+
+async def not_modified_handler(request: Request, exc: NotModified):
+    return Response(status_code=304, headers=exc.headers)
@@ -0,0 +1,140 @@
+# app/events.py
+"""
+Atualizações ao vivo do dashboard por Server-Sent Events.
+
+As rotas de escrita já avisam o cache (`bump_data_version`); o `Broadcaster`
+escuta esse aviso, espera uma janela de `SSE_DEBOUNCE_MS` (500) juntando as
+escritas e então calcula os agregados **uma vez** (pelo cache do dashboard),
+compara com o último envio e manda a mesma mensagem a todos os inscritos.
+O custo por escrita não depende de quantos dashboards estão abertos, e sem
+inscritos nada é calculado.
+
+Eventos:
+- `snapshot` — ao conectar: o payload inteiro de `/dashboard/data/all` (sem filtro);
+- `update` — só as seções que mudaram (`state`, `culture`, `landuse`, `filters`)
+  e sempre os `kpis`, com `delta` em relação ao envio anterior.
+
+Cliente lento (fila cheia) é desconectado; o EventSource reconecta e recebe
+um `snapshot` novo.
+"""
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Awaitable, Callable
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.cache import off_data_change, on_data_change
+from app.database import AsyncSessionLocal
+
+DEBOUNCE = float(os.getenv("SSE_DEBOUNCE_MS", "500")) / 1000
+HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))  # segundos; mantém proxies sem fechar a conexão
+QUEUE_SIZE = 16
+SECTIONS = ("filters", "state", "culture", "landuse")
+
+def format_event(event: str, data: dict, event_id: int | None = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"{head}event: {event}\ndata: {body}\n\n".encode()
+
+def diff(old: dict, new: dict) -> dict | None:
+    """Seções alteradas + KPIs com delta; None se nada mudou."""
+    changed = {k: new[k] for k in SECTIONS if old.get(k) != new[k]}
+    kpis, before = new["kpis"], old["kpis"]
+    if not changed and kpis == before:
+        return None
+    changed["kpis"] = {
+        **kpis,
+        "delta": {
+            "total_farms": kpis["total_farms"] - before["total_farms"],
+            "total_hectares": round(kpis["total_hectares"] - before["total_hectares"], 6),
+        },
+    }
+    return changed
+
+class Broadcaster:
+    def __init__(self, compute: Callable[[AsyncSession], Awaitable[dict]], tables: tuple[str, ...],
+                 debounce: float = DEBOUNCE):
+        self.compute = compute
+        self.tables = set(tables)
+        self.debounce = debounce
+        self.session_factory = AsyncSessionLocal
+        self.seq = 0
+        self.computations = 0
+        self._subscribers: set[asyncio.Queue] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: asyncio.Task | None = None
+        self._last: dict | None = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def notify(self, tables: tuple[str, ...]) -> None:
+        # chamado por bump_data_version, possivelmente fora do event loop
+        if self._loop is None or not self._subscribers or not self.tables.intersection(tables):
+            return
+        self._loop.call_soon_threadsafe(self._schedule)
+
+    def _schedule(self) -> None:
+        if self._pending is None:
+            self._pending = self._loop.create_task(self._flush())
+
+    async def _snapshot(self) -> dict:
+        async with self.session_factory() as db:
+            self.computations += 1
+            return await self.compute(db)
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(self.debounce)
+        # escritas durante o cálculo agendam a próxima janela
+        self._pending = None
+        try:
+            current = await self._snapshot()
+        except Exception:
+            logger.exception("SSE: falha ao calcular os agregados do dashboard")
+            return
+        message = diff(self._last, current) if self._last is not None else dict(current)
+        self._last = current
+        if message is None:
+            return
+        self.seq += 1
+        self.publish(format_event("update", {"seq": self.seq, **message}, self.seq))
+
+    def publish(self, chunk: bytes) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(chunk)
+            except asyncio.QueueFull:
+                # atrasado demais: derruba; o navegador reconecta e recebe um snapshot
+                self._subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(QUEUE_SIZE)
+        first = not self._subscribers
+        self._subscribers.add(queue)
+        if first:
+            # só escuta as escritas enquanto houver inscritos: instância ociosa não deixa listener
+            on_data_change(self.notify)
+        try:
+            yield b"retry: 3000\n\n"
+            snapshot = await self._snapshot()  # normalmente um hit no cache do dashboard
+            if first:
+                # sem inscritos as escritas não foram acompanhadas: a base dos deltas recomeça aqui
+                self._last = snapshot
+            yield format_event("snapshot", {"seq": self.seq, **snapshot}, self.seq)
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers:
+                off_data_change(self.notify)
@@ -1,26 +1,45 @@
 # app/main.py
 import os
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 from sqlalchemy import text
-from app.database import Base, engine, SessionLocal
-from app import models  
-from app.routers import producers, farms, seasons, plantings, dashboard
+from app.database import engine, async_engine, AsyncSessionLocal
+from app import models, migrations, metrics, diagnostics
+from app.etag import NotModified, not_modified_handler
+from app.compression import CompressionMiddleware
+from app.assets import HashedStaticFiles
+from app.routers import producers, farms, seasons, plantings, dashboard, analytics
 
 TESTING = os.getenv("TESTING") == "1"
 
-app = FastAPI(title="Rural Registry (MVP)", version="0.0.7")
+app = FastAPI(title="Rural Registry (MVP)", version="0.0.7", default_response_class=ORJSONResponse)
+
+# compressão gzip/brotli negociada; registrada antes das métricas para elas verem os bytes comprimidos
+app.add_middleware(CompressionMiddleware)
+
+# métricas Prometheus: latência/tamanho por rota e consultas/pool do banco
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine, "sync")
+metrics.instrument_engine(async_engine.sync_engine, "async")
+
+# GET condicional: as dependências `etag(...)` das rotas de leitura levantam NotModified
+app.add_exception_handler(NotModified, not_modified_handler)
+
+# SQL_DIAGNOSTICS=1: log de consultas lentas (com EXPLAIN) e aviso de N+1 por requisição
+if diagnostics.ENABLED:
+    app.add_middleware(diagnostics.DiagnosticsMiddleware)
+    diagnostics.install(engine)
+    diagnostics.install(async_engine.sync_engine)
 
 @app.on_event("startup")
 def on_startup():
-    Base.metadata.create_all(bind=engine)
-    with SessionLocal() as db:
-        db.execute(text("SELECT 1"))
-    logger.info("DB ok e tabelas garantidas.")
+    # só confere a versão; o schema é criado/atualizado por `python -m app.migrations upgrade`
+    version = migrations.check(engine)
+    logger.info(f"DB ok, schema na versão {version}.")
 
-# servir arquivos estáticos (CSS)
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# servir arquivos estáticos (CSS, ECharts); URLs com hash do conteúdo via static_url()
+app.mount("/static", HashedStaticFiles(directory="app/static"), name="static")
 
 # inclui as rotas 
 app.include_router(dashboard.router)
@@ -28,13 +47,19 @@ app.include_router(producers.router)
 app.include_router(farms.router)
 app.include_router(seasons.router)  
 app.include_router(plantings.router)
+app.include_router(analytics.router)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 @app.get("/health/db")
-def health_db():
-    with SessionLocal() as db:
-        db.execute(text("SELECT 1"))
+async def health_db():
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT 1"))
     return {"db": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
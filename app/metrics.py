@@ -0,0 +1,155 @@
+# app/metrics.py
+"""
+Métricas Prometheus da aplicação (expostas em `GET /metrics`).
+
+- `MetricsMiddleware` (ASGI puro, sem BaseHTTPMiddleware): latência por rota,
+  requisições em andamento e tamanho das respostas. A rota é o template
+  (`/api/farms/{farm_id}`), então a cardinalidade é limitada.
+- `instrument_engine`: eventos do SQLAlchemy contam consultas e tempo de banco
+  (no total e por requisição, via contextvar) e medem a espera pelo pool e as
+  conexões em uso.
+
+Os contadores são do processo (o deploy roda um único worker do uvicorn).
+"""
+import time
+import weakref
+from contextvars import ContextVar
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+REGISTRY = CollectorRegistry()
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP",
+    ["method", "route", "status"], buckets=_LATENCY_BUCKETS, registry=REGISTRY,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requisições HTTP em andamento", ["method"], registry=REGISTRY,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Tamanho do corpo das respostas HTTP",
+    ["method", "route"], buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000),
+    registry=REGISTRY,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Consultas SQL por requisição",
+    ["route"], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500), registry=REGISTRY,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Tempo de banco por requisição",
+    ["route"], buckets=_LATENCY_BUCKETS, registry=REGISTRY,
+)
+DB_QUERIES = Counter("db_queries_total", "Consultas SQL executadas", ["engine"], registry=REGISTRY)
+DB_QUERY_SECONDS = Counter("db_query_seconds_total", "Tempo total em consultas SQL", ["engine"], registry=REGISTRY)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obter uma conexão do pool (inclui abrir conexão nova)",
+    ["engine"], buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0), registry=REGISTRY,
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out", "Conexões do pool em uso", ["engine"], registry=REGISTRY,
+)
+
+# [consultas, segundos] da requisição corrente (None fora de requisição)
+_request_db: ContextVar[list | None] = ContextVar("request_db", default=None)
+
+def render() -> tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+# --------------------- SQLAlchemy ---------------------
+
+_instrumented: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Liga as métricas de banco numa engine síncrona (para a assíncrona, passe `.sync_engine`)."""
+    if engine in _instrumented:
+        return
+    _instrumented.add(engine)
+    queries, seconds = DB_QUERIES.labels(name), DB_QUERY_SECONDS.labels(name)
+    wait, checked_out = POOL_WAIT.labels(name), POOL_CHECKED_OUT.labels(name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["_metrics_t0"].pop()
+        queries.inc()
+        seconds.inc(elapsed)
+        stats = _request_db.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("_metrics_t0") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        checked_out.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_conn, record):
+        checked_out.dec()
+
+    # não há evento "antes do checkout": a espera é medida em volta de raw_connection,
+    # que é por onde toda Connection pega a conexão (o atributo sobrevive a dispose())
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        t0 = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            wait.observe(time.perf_counter() - t0)
+
+    engine.raw_connection = timed_raw_connection
+
+# --------------------- ASGI ---------------------
+
+class MetricsMiddleware:
+    """Middleware ASGI puro: mede a requisição inteira, inclusive respostas em stream."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+        stats = [0, 0.0]
+        token = _request_db.set(stats)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - t0
+            in_progress.dec()
+            _request_db.reset(token)
+            # template da rota (o router grava em scope["route"]); 404 etc. ficam agrupados
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.labels(method, route, str(status)).observe(elapsed)
+            RESPONSE_SIZE.labels(method, route).observe(size)
+            REQUEST_DB_QUERIES.labels(route).observe(stats[0])
+            REQUEST_DB_SECONDS.labels(route).observe(stats[1])
@@ -0,0 +1,102 @@
+# app/migrations.py
+"""
+Migrações versionadas do schema (SQLite e PostgreSQL).
+
+Cada migração roda na sua própria transação e grava a versão em
+`schema_version`. As migrações são idempotentes (checkfirst), então um banco
+criado pelo antigo `create_all` é adotado sem erro.
+
+    python -m app.migrations upgrade   # aplica o que falta
+    python -m app.migrations current   # mostra a versão do banco
+
+No startup a aplicação só confere a versão (`check`).
+"""
+import argparse
+from datetime import datetime, timezone
+from typing import Callable
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from app.database import Base
+from app import models, search, summary
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200)),
+    Column("applied_at", DateTime(timezone=True)),
+)
+
+def _create_tables(conn: Connection, *model_classes):
+    Base.metadata.create_all(conn, tables=[m.__table__ for m in model_classes], checkfirst=True)
+
+def _create_indexes(conn: Connection, *model_classes):
+    for m in model_classes:
+        for index in m.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+def _m1_baseline(conn: Connection):
+    _create_tables(conn, models.Producer, models.Farm, models.Season, models.Planting)
+
+def _m2_summaries(conn: Connection):
+    _create_tables(conn, models.StateSummary, models.CultureSummary)
+    summary.rebuild(conn)
+
+def _m3_indexes(conn: Connection):
+    _create_indexes(conn, models.Farm, models.Planting)
+
+def _m4_producer_search(conn: Connection):
+    search.install(conn)
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "tabelas base: producers, farms, seasons, plantings", _m1_baseline),
+    (2, "tabelas de resumo do dashboard (state_summary, culture_summary)", _m2_summaries),
+    (3, "índices: farms(state, id), farms(producer_id, id), plantings(season_id, culture), plantings(culture, id)",
+     _m3_indexes),
+    (4, "busca de produtores por nome (FTS5 no SQLite, trigramas + unaccent no PostgreSQL)", _m4_producer_search),
+]
+HEAD = MIGRATIONS[-1][0]
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.scalar(select(func.coalesce(func.max(schema_version.c.version), 0)))
+
+def upgrade(engine: Engine) -> list[int]:
+    """Aplica as migrações pendentes; devolve as versões aplicadas."""
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+        version = current_version(conn)
+    applied = []
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_version.insert().values(
+                version=number, description=description, applied_at=datetime.now(timezone.utc)
+            ))
+        applied.append(number)
+    return applied
+
+def check(engine: Engine) -> int:
+    """Checagem barata do startup: uma consulta na tabela de versão."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < HEAD:
+        raise RuntimeError(
+            f"Schema do banco na versão {version}, esperado {HEAD}. Rode: python -m app.migrations upgrade"
+        )
+    return version
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrações do schema")
+    parser.add_argument("command", choices=["upgrade", "current"])
+    args = parser.parse_args()
+    from app.database import engine
+    if args.command == "upgrade":
+        applied = upgrade(engine)
+        print(f"✔ aplicadas: {applied}" if applied else f"✔ schema já na versão {HEAD}")
+    else:
+        with engine.connect() as conn:
+            print(f"versão atual: {current_version(conn)} (head: {HEAD})")
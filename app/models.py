@@ -1,5 +1,5 @@
 # app/models.py
-from sqlalchemy import String, Integer, Float, ForeignKey, UniqueConstraint
+from sqlalchemy import String, Integer, Float, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database import Base
 
@@ -9,7 +9,10 @@ class Producer(Base):
     cpf_cnpj: Mapped[str] = mapped_column(String(14), unique=True, index=True)  # só dígitos
     name: Mapped[str] = mapped_column(String(120))
 
-    farms: Mapped[list["Farm"]] = relationship(back_populates="producer", cascade="all, delete-orphan")
+    # passive_deletes: a exclusão dos filhos fica com o ON DELETE CASCADE do banco
+    # (o ORM não carrega fazendas/plantios só para apagá-los)
+    farms: Mapped[list["Farm"]] = relationship(back_populates="producer", cascade="all, delete-orphan",
+                                               passive_deletes=True)
 
 class Farm(Base):
     __tablename__ = "farms"
@@ -23,13 +26,21 @@ class Farm(Base):
     area_vegetation: Mapped[float] = mapped_column(Float, default=0.0)
 
     producer: Mapped["Producer"] = relationship(back_populates="farms")
-    plantings: Mapped[list["Planting"]] = relationship(back_populates="farm", cascade="all, delete-orphan")
+    plantings: Mapped[list["Planting"]] = relationship(back_populates="farm", cascade="all, delete-orphan",
+                                                       passive_deletes=True)
+
+    # (coluna, id): filtro + paginação por id sem ordenação extra
+    __table_args__ = (
+        Index("ix_farms_state_id", "state", "id"),
+        Index("ix_farms_producer_id", "producer_id", "id"),
+    )
 
 class Season(Base):
     __tablename__ = "seasons"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(20), unique=True)  # 'Safra 2021'
-    plantings: Mapped[list["Planting"]] = relationship(back_populates="season", cascade="all, delete-orphan")
+    plantings: Mapped[list["Planting"]] = relationship(back_populates="season", cascade="all, delete-orphan",
+                                                       passive_deletes=True)
 
 class Planting(Base):
     __tablename__ = "plantings"
@@ -41,6 +52,26 @@ class Planting(Base):
     farm: Mapped["Farm"] = relationship(back_populates="plantings")
     season: Mapped["Season"] = relationship(back_populates="plantings")
 
+    # uix_planting_unique começa por farm_id e já atende o join com farms
     __table_args__ = (
         UniqueConstraint("farm_id", "season_id", "culture", name="uix_planting_unique"),
+        Index("ix_plantings_season_culture", "season_id", "culture"),
+        Index("ix_plantings_culture_id", "culture", "id"),
     )
+
+# --- Tabelas de resumo (mantidas pelas rotas de escrita; ver app/summary.py) ---
+
+class StateSummary(Base):
+    __tablename__ = "state_summary"
+    state: Mapped[str] = mapped_column(String(2), primary_key=True)
+    farm_count: Mapped[int] = mapped_column(Integer, default=0)
+    area_total: Mapped[float] = mapped_column(Float, default=0.0)
+    area_agricultable: Mapped[float] = mapped_column(Float, default=0.0)
+    area_vegetation: Mapped[float] = mapped_column(Float, default=0.0)
+
+class CultureSummary(Base):
+    __tablename__ = "culture_summary"
+    season_id: Mapped[int] = mapped_column(ForeignKey("seasons.id", ondelete="CASCADE"), primary_key=True)
+    state: Mapped[str] = mapped_column(String(2), primary_key=True)
+    culture: Mapped[str] = mapped_column(String(80), primary_key=True)
+    planting_count: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,49 @@
+# app/pagination.py
+import base64
+import binascii
+from fastapi import HTTPException, Query, Request, Response
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+def encode_cursor(last_id: int) -> str:
+    # cursor opaco: o cliente só devolve o valor em `after`
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, value = raw.split(":", 1)
+        if prefix != "id":
+            raise ValueError(raw)
+        return int(value)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+class Page:
+    """Parâmetros de paginação por chave (keyset) sobre a PK."""
+
+    def __init__(
+        self,
+        limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT, description="itens por página"),
+        after: str | None = Query(default=None, description="cursor devolvido em X-Next-Cursor"),
+    ):
+        self.limit = limit
+        self.after = decode_cursor(after) if after else None
+
+    def apply(self, stmt, pk):
+        """Ordena pela PK e busca `limit + 1` linhas para saber se há próxima página."""
+        if self.after is not None:
+            stmt = stmt.where(pk > self.after)
+        return stmt.order_by(pk).limit(self.limit + 1)
+
+    def finish(self, rows: list, request: Request, response: Response) -> list:
+        """Corta a linha extra e publica o próximo cursor em `X-Next-Cursor` e `Link`."""
+        if len(rows) <= self.limit:
+            return rows
+        rows = rows[:self.limit]
+        last = rows[-1]
+        cursor = encode_cursor(last["id"] if isinstance(last, dict) else last.id)
+        response.headers["X-Next-Cursor"] = cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(after=cursor)}>; rel="next"'
+        return rows
@@ -0,0 +1,50 @@
+# app/projection.py
+"""
+Caminho de leitura sem ORM: SELECT só das colunas necessárias (Core), linhas
+direto em dicts e resposta pelo orjson, sem identity map e sem o
+`response_model` revalidar objeto por objeto (o formato é o mesmo do schema).
+
+    @router.get("", response_model=list[schemas.FarmOut])
+    async def list_farms(..., columns: list = Depends(fields_param(models.Farm))):
+        rows = await fetch_dicts(db, page.apply(select(*columns), models.Farm.id))
+        return lean_response(page.finish(rows, request, response), response)
+"""
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+def table_columns(model) -> list:
+    return list(model.__table__.columns)
+
+def fields_param(model):
+    """Dependência do parâmetro `fields=` (sparse fieldset): colunas pedidas, na ordem da tabela; `id` sempre vem."""
+    names = [c.name for c in model.__table__.columns]
+
+    def dependency(
+        fields: str | None = Query(
+            default=None, description=f"campos separados por vírgula ({', '.join(names)}); `id` sempre vem"
+        ),
+    ) -> list:
+        if not fields:
+            return table_columns(model)
+        wanted = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = sorted(wanted - set(names))
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Campos inválidos: {', '.join(unknown)}. Disponíveis: {', '.join(names)}.",
+            )
+        return [c for c in model.__table__.columns if c.name in wanted or c.name == "id"]
+
+    return dependency
+
+async def fetch_dicts(db: AsyncSession, stmt) -> list[dict]:
+    return [dict(r) for r in (await db.execute(stmt)).mappings()]
+
+async def fetch_dict(db: AsyncSession, stmt) -> dict | None:
+    row = (await db.execute(stmt)).mappings().first()
+    return dict(row) if row is not None else None
+
+def lean_response(content: list[dict] | dict, response: Response) -> ORJSONResponse:
+    """Resposta já no formato de saída, com os headers que as dependências puseram em `response` (ETag, cursor)."""
+    return ORJSONResponse(content, headers=response.headers)
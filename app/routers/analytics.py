@@ -0,0 +1,111 @@
+# app/routers/analytics.py
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, literal, null, cast, String, union_all
+from app.database import get_async_db
+from app import models
+from app.etag import etag
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+Dimension = Literal["state", "city", "season", "culture"]
+Measure = Literal["farm_count", "planting_count", "area_total", "area_agricultable", "area_vegetation"]
+
+DIMENSIONS = {
+    "state": models.Farm.state,
+    "city": models.Farm.city,
+    "season": models.Season.name,
+    "culture": models.Planting.culture,
+}
+AREA_MEASURES = ("area_total", "area_agricultable", "area_vegetation")
+
+def _measure(name: str, joined: bool):
+    if name == "farm_count":
+        # com plantios no join a mesma fazenda aparece em várias linhas
+        return func.count(func.distinct(models.Farm.id)) if joined else func.count(models.Farm.id)
+    if name == "planting_count":
+        return func.count(models.Planting.id)
+    return func.coalesce(func.sum(getattr(models.Farm, name)), 0.0)
+
+@router.get("/cube", dependencies=[Depends(etag("farms", "plantings", "seasons"))])
+async def cube(
+    dims: list[Dimension] = Query(default=[], description="dimensões do GROUP BY, na ordem"),
+    measures: list[Measure] = Query(default=["farm_count"], description="medidas agregadas"),
+    state: str | None = Query(default=None, description="UF (ex.: MG)"),
+    city: str | None = Query(default=None),
+    season_id: int | None = Query(default=None, description="ID da Safra"),
+    culture: str | None = Query(default=None),
+    rollup: bool = Query(default=False, description="inclui subtotais (prefixos das dimensões) e total geral"),
+    top: int | None = Query(default=None, ge=1, description="top-N por grupo (pela 1ª medida, dentro da última dimensão)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Agregação genérica sobre fazendas/plantios, compilada num único SELECT
+    agrupado (com `UNION ALL` dos subtotais quando `rollup=true`).
+    """
+    dims = list(dict.fromkeys(dims))
+    measures = list(dict.fromkeys(measures))
+    planting_dims = {"season", "culture"} & set(dims)
+    planting_filters = season_id is not None or bool(culture)
+    joined = bool(planting_dims) or planting_filters or "planting_count" in measures
+    if joined and any(m in AREA_MEASURES for m in measures):
+        raise HTTPException(
+            status_code=400,
+            detail="Medidas de área não combinam com safra/cultura (cada fazenda contaria uma vez por plantio).",
+        )
+
+    F, P, S = models.Farm, models.Planting, models.Season
+    base = F.__table__
+    if joined:
+        # sem dimensão/filtro de plantio o join é externo: fazendas sem plantio continuam contando
+        outer = not (planting_dims or planting_filters)
+        base = base.join(P, P.farm_id == F.id, isouter=outer)
+        if "season" in dims:
+            base = base.join(S, S.id == P.season_id, isouter=outer)
+
+    where = []
+    if state:
+        where.append(F.state == state.upper())
+    if city:
+        where.append(F.city == city)
+    if season_id is not None:
+        where.append(P.season_id == season_id)
+    if culture:
+        where.append(P.culture == culture)
+
+    def grouped(level: int):
+        cols = [DIMENSIONS[d].label(d) for d in dims[:level]]
+        cols += [cast(null(), String).label(d) for d in dims[level:]]
+        cols += [_measure(m, joined).label(m) for m in measures]
+        stmt = select(*cols, literal(level).label("level")).select_from(base).where(*where)
+        if level:
+            stmt = stmt.group_by(*[DIMENSIONS[d] for d in dims[:level]])
+        return stmt
+
+    detail = grouped(len(dims))
+    if top and dims:
+        # top-N dentro de cada grupo formado pelas dimensões anteriores à última;
+        # empate na medida desempata pela última dimensão (resultado e ETag estáveis)
+        rank = func.row_number().over(
+            partition_by=[DIMENSIONS[d] for d in dims[:-1]] or None,
+            order_by=[_measure(measures[0], joined).desc(), DIMENSIONS[dims[-1]]],
+        )
+        ranked = detail.add_columns(rank.label("_rank")).subquery()
+        detail = select(*[ranked.c[c] for c in [*dims, *measures, "level"]]).where(ranked.c._rank <= top)
+
+    parts = [detail] + ([grouped(level) for level in range(len(dims) - 1, -1, -1)] if rollup else [])
+    result = union_all(*parts).subquery() if len(parts) > 1 else detail.subquery()
+    order = [result.c.level.desc()] + [result.c[d] for d in dims]
+    if measures:
+        order.append(result.c[measures[0]].desc())
+    rows = (await db.execute(select(result).order_by(*order))).mappings().all()
+
+    out = []
+    for r in rows:
+        item = {d: r[d] for d in dims}
+        item.update({m: r[m] for m in measures})
+        if rollup:
+            item["level"] = r["level"]
+        out.append(item)
+    return {"dims": dims, "measures": measures, "rows": out}
@@ -1,83 +1,130 @@
 # app/routers/dashboard.py
+from typing import AsyncIterator, Literal
 from fastapi import APIRouter, Depends, Request, Response, Query
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select, func
 from fastapi.templating import Jinja2Templates
-from app.database import get_db
+from app.database import get_async_db
 from app import models
+from app.cache import dashboard_cache, data_version
+from app.etag import etag
+from app.assets import static_url
+from app.events import Broadcaster
 import csv
 import io
+import json
+import zlib
 
 router = APIRouter(tags=["dashboard"])
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["static_url"] = static_url
+
+# Tabelas das quais cada agregado depende: a chave de cache leva as versões
+# delas, então uma escrita só invalida o que realmente muda.
+FARM_TABLES = ("farms",)
+CULTURE_TABLES = ("farms", "plantings")
+FILTER_TABLES = ("farms", "seasons")
+ALL_TABLES = ("farms", "plantings", "seasons")
 
 @router.get("/")
 def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
-@router.get("/dashboard")
-def dashboard(request: Request, db: Session = Depends(get_db)):
-    total_farms = db.scalar(select(func.count(models.Farm.id))) or 0
-    total_hectares = float(db.scalar(select(func.coalesce(func.sum(models.Farm.area_total), 0.0))) or 0.0)
-    ctx = {"request": request, "total_farms": total_farms, "total_hectares": total_hectares}
-    return templates.TemplateResponse("dashboard.html", ctx)
+@router.get("/dashboard", response_class=HTMLResponse, dependencies=[Depends(etag(*ALL_TABLES))])
+async def dashboard(response: Response, db: AsyncSession = Depends(get_async_db)):
+    # página inteira em cache por versão dos dados: sem consulta e sem render na maioria das cargas
+    key = ("page", data_version(*ALL_TABLES))
+    html = await dashboard_cache.aget_or_compute(key, lambda: _render_dashboard(db))
+    return HTMLResponse(html, headers=response.headers)
 
-# --------------------- Dados para ECharts (JSON) ---------------------
+async def _render_dashboard(db: AsyncSession) -> str:
+    # dados da visão sem filtro embutidos: os gráficos desenham sem esperar nenhum fetch
+    overview = await _default_overview(db)
+    return templates.get_template("dashboard.html").render(
+        total_farms=overview["kpis"]["total_farms"],
+        total_hectares=overview["kpis"]["total_hectares"],
+        initial=overview,
+    )
 
-@router.get("/dashboard/data/filters")
-def data_filters(db: Session = Depends(get_db)):
+# --------------------- Agregados (com cache) ---------------------
+
+async def _cached(db: AsyncSession, name: str, tables: tuple[str, ...], params: tuple, compute):
+    # as funções de cálculo são síncronas: rodam na conexão assíncrona via run_sync,
+    # e só no miss do cache; `params` também são os argumentos de `compute`
+    key = (name, params, data_version(*tables))
+    return await dashboard_cache.aget_or_compute(key, lambda: db.run_sync(compute, *params))
+
+def _filters(db: Session) -> dict:
     # UFs presentes no banco (distintos)
-    states = [r[0] for r in db.execute(select(models.Farm.state).distinct().order_by(models.Farm.state))]
+    S = models.StateSummary
+    states = [r[0] for r in db.execute(select(S.state).order_by(S.state))]
     # Safras
     seasons = [{"id": s.id, "name": s.name} for s in db.scalars(select(models.Season).order_by(models.Season.name))]
     return {"states": states, "seasons": seasons}
 
-@router.get("/dashboard/data/state")
-def data_state(
-    # opcionalmente poderíamos filtrar por safra (fazendas que tenham plantio na safra),
-    # mas manteremos simples: gráfico geral de fazendas por UF
-    db: Session = Depends(get_db)
-):
-    rows = db.execute(
-        select(models.Farm.state, func.count(models.Farm.id)).group_by(models.Farm.state)
-    ).all()
-    data = [{"name": r[0], "value": r[1]} for r in rows] or [{"name": "Sem dados", "value": 1}]
-    return {"data": data, "title": "Fazendas por Estado"}
+def _state_rows(db: Session) -> list[tuple[str, int]]:
+    S = models.StateSummary
+    return [tuple(r) for r in db.execute(select(S.state, S.farm_count).order_by(S.state))]
 
-@router.get("/dashboard/data/culture")
-def data_culture(
-    state: str | None = Query(default=None, description="UF para filtrar (ex.: MG)"),
-    season_id: int | None = Query(default=None, description="ID da Safra"),
-    db: Session = Depends(get_db),
-):
-    stmt = (
-        select(models.Planting.culture, func.count(models.Planting.id))
-        .join(models.Farm, models.Farm.id == models.Planting.farm_id)
-    )
+def _culture_rows(db: Session, state: str | None, season_id: int | None) -> list[tuple[str, int]]:
+    C = models.CultureSummary
+    stmt = select(C.culture, func.sum(C.planting_count))
     if state:
-        stmt = stmt.where(models.Farm.state == state.upper())
+        stmt = stmt.where(C.state == state.upper())
     if season_id:
-        stmt = stmt.where(models.Planting.season_id == season_id)
-    stmt = stmt.group_by(models.Planting.culture)
+        stmt = stmt.where(C.season_id == season_id)
+    stmt = stmt.group_by(C.culture).order_by(C.culture)
+    return [tuple(r) for r in db.execute(stmt).all()]
 
-    rows = db.execute(stmt).all()
-    data = [{"name": r[0], "value": r[1]} for r in rows] or [{"name": "Sem dados", "value": 1}]
-    return {"data": data, "title": "Cultura Plantada"}
-
-@router.get("/dashboard/data/landuse")
-def data_landuse(
-    state: str | None = Query(default=None, description="UF para filtrar (ex.: MG)"),
-    db: Session = Depends(get_db),
-):
-    q_agri = select(func.coalesce(func.sum(models.Farm.area_agricultable), 0.0))
-    q_veg  = select(func.coalesce(func.sum(models.Farm.area_vegetation), 0.0))
+def _landuse_totals(db: Session, state: str | None) -> tuple[float, float]:
+    # as duas somas numa consulta só
+    S = models.StateSummary
+    stmt = select(func.coalesce(func.sum(S.area_agricultable), 0.0), func.coalesce(func.sum(S.area_vegetation), 0.0))
     if state:
-        q_agri = q_agri.where(models.Farm.state == state.upper())
-        q_veg  = q_veg.where(models.Farm.state == state.upper())
+        stmt = stmt.where(S.state == state.upper())
+    total_agri, total_veg = db.execute(stmt).one()
 
-    total_agri = float(db.scalar(q_agri) or 0.0)
-    total_veg  = float(db.scalar(q_veg) or 0.0)
+    # arredonda para descartar resíduo de ponto flutuante das somas incrementais
+    return round(float(total_agri or 0.0), 6), round(float(total_veg or 0.0), 6)
 
+def _overview(db: Session, state: str | None, season_id: int | None) -> dict:
+    """Tudo o que o dashboard desenha, em três consultas (UFs, safras, culturas)."""
+    S = models.StateSummary
+    by_state = db.execute(
+        select(S.state, S.farm_count, S.area_total, S.area_agricultable, S.area_vegetation).order_by(S.state)
+    ).all()
+    seasons = [{"id": s.id, "name": s.name} for s in db.scalars(select(models.Season).order_by(models.Season.name))]
+    cultures = _culture_rows(db, state, season_id)
+
+    # no máximo 27 linhas: o resto é agregado em Python
+    selected = [r for r in by_state if not state or r.state == state]
+    total_agri = round(sum(r.area_agricultable for r in selected), 6)
+    total_veg = round(sum(r.area_vegetation for r in selected), 6)
+    return {
+        "filters": {"states": [r.state for r in by_state], "seasons": seasons},
+        "state": _state_payload([(r.state, r.farm_count) for r in by_state]),
+        "culture": _culture_payload(cultures),
+        "landuse": _landuse_payload(total_agri, total_veg),
+        "kpis": {
+            "total_farms": sum(r.farm_count for r in by_state),
+            "total_hectares": round(sum(r.area_total for r in by_state), 6),
+        },
+    }
+
+def _norm_state(state: str | None) -> str | None:
+    return state.upper() if state else None
+
+def _state_payload(rows: list[tuple[str, int]]) -> dict:
+    data = [{"name": r[0], "value": r[1]} for r in rows] or [{"name": "Sem dados", "value": 1}]
+    return {"data": data, "title": "Fazendas por Estado"}
+
+def _culture_payload(rows: list[tuple[str, int]]) -> dict:
+    data = [{"name": r[0], "value": r[1]} for r in rows] or [{"name": "Sem dados", "value": 1}]
+    return {"data": data, "title": "Cultura Plantada"}
+
+def _landuse_payload(total_agri: float, total_veg: float) -> dict:
     if total_agri + total_veg == 0:
         data = [{"name": "Sem dados", "value": 1}]
     else:
@@ -87,6 +134,70 @@ def data_landuse(
         ]
     return {"data": data, "title": "Uso do Solo"}
 
+@router.get("/dashboard/cache/stats")
+def cache_stats():
+    return dashboard_cache.stats()
+
+# --------------------- Dados para ECharts (JSON) ---------------------
+
+@router.get("/dashboard/data/filters", dependencies=[Depends(etag(*FILTER_TABLES))])
+async def data_filters(db: AsyncSession = Depends(get_async_db)):
+    return await _cached(db, "filters", FILTER_TABLES, (), _filters)
+
+@router.get("/dashboard/data/state", dependencies=[Depends(etag(*FARM_TABLES))])
+async def data_state(
+    # opcionalmente poderíamos filtrar por safra (fazendas que tenham plantio na safra),
+    # mas manteremos simples: gráfico geral de fazendas por UF
+    db: AsyncSession = Depends(get_async_db)
+):
+    return _state_payload(await _cached(db, "state", FARM_TABLES, (), _state_rows))
+
+@router.get("/dashboard/data/culture", dependencies=[Depends(etag(*CULTURE_TABLES))])
+async def data_culture(
+    state: str | None = Query(default=None, description="UF para filtrar (ex.: MG)"),
+    season_id: int | None = Query(default=None, description="ID da Safra"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    state = _norm_state(state)
+    rows = await _cached(db, "culture", CULTURE_TABLES, (state, season_id), _culture_rows)
+    return _culture_payload(rows)
+
+@router.get("/dashboard/data/landuse", dependencies=[Depends(etag(*FARM_TABLES))])
+async def data_landuse(
+    state: str | None = Query(default=None, description="UF para filtrar (ex.: MG)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    state = _norm_state(state)
+    total_agri, total_veg = await _cached(db, "landuse", FARM_TABLES, (state,), _landuse_totals)
+    return _landuse_payload(total_agri, total_veg)
+
+@router.get("/dashboard/data/all", dependencies=[Depends(etag(*ALL_TABLES))])
+async def data_all(
+    state: str | None = Query(default=None, description="UF para filtrar cultura e uso do solo (ex.: MG)"),
+    season_id: int | None = Query(default=None, description="ID da Safra (filtra cultura)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # filtros, gráficos e KPIs numa resposta só (primeira pintura = 1 request)
+    state = _norm_state(state)
+    return await _cached(db, "all", ALL_TABLES, (state, season_id), _overview)
+
+# --------------------- Atualizações ao vivo (SSE) ---------------------
+
+async def _default_overview(db: AsyncSession) -> dict:
+    return await _cached(db, "all", ALL_TABLES, (None, None), _overview)
+
+# um cálculo por janela de debounce, para todos os dashboards abertos
+live = Broadcaster(_default_overview, ALL_TABLES)
+
+@router.get("/dashboard/events")
+async def dashboard_events():
+    """Server-Sent Events: `snapshot` ao conectar e `update` (só o que mudou) a cada lote de escritas."""
+    return StreamingResponse(
+        live.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # nginx: sem buffer
+    )
+
 # --------------------- Export CSV ---------------------
 
 def _csv_response(rows: list[tuple[str, float]], filename: str) -> Response:
@@ -102,39 +213,132 @@ def _csv_response(rows: list[tuple[str, float]], filename: str) -> Response:
     )
 
 @router.get("/dashboard/export/culture.csv")
-def export_culture_csv(
+async def export_culture_csv(
     state: str | None = Query(default=None),
     season_id: int | None = Query(default=None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    stmt = (
-        select(models.Planting.culture, func.count(models.Planting.id))
-        .join(models.Farm, models.Farm.id == models.Planting.farm_id)
-    )
-    if state:
-        stmt = stmt.where(models.Farm.state == state.upper())
-    if season_id:
-        stmt = stmt.where(models.Planting.season_id == season_id)
-    stmt = stmt.group_by(models.Planting.culture)
-    rows = db.execute(stmt).all() or [("Sem dados", 1)]
-    return _csv_response(rows, "culture.csv")
+    state = _norm_state(state)
+    rows = await _cached(db, "culture", CULTURE_TABLES, (state, season_id), _culture_rows)
+    return _csv_response(rows or [("Sem dados", 1)], "culture.csv")
 
 @router.get("/dashboard/export/landuse.csv")
-def export_landuse_csv(
+async def export_landuse_csv(
     state: str | None = Query(default=None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q_agri = select(func.coalesce(func.sum(models.Farm.area_agricultable), 0.0))
-    q_veg  = select(func.coalesce(func.sum(models.Farm.area_vegetation), 0.0))
-    if state:
-        q_agri = q_agri.where(models.Farm.state == state.upper())
-        q_veg  = q_veg.where(models.Farm.state == state.upper())
-
-    total_agri = float(db.scalar(q_agri) or 0.0)
-    total_veg  = float(db.scalar(q_veg) or 0.0)
+    state = _norm_state(state)
+    total_agri, total_veg = await _cached(db, "landuse", FARM_TABLES, (state,), _landuse_totals)
 
     rows = [("Agricultável", total_agri), ("Vegetação", total_veg)]
     # evita CSV vazio absoluto
     if total_agri + total_veg == 0:
         rows = [("Sem dados", 1.0)]
     return _csv_response(rows, "landuse.csv")
+
+# --------------------- Export completo (stream) ---------------------
+
+# linhas por fetch do cursor do servidor; é o teto de memória do export
+EXPORT_BATCH = 1000
+
+def _farms_export_stmt(state: str | None, season_id: int | None):
+    F, P = models.Farm, models.Producer
+    stmt = (
+        select(
+            F.id, F.name, F.city, F.state, F.area_total, F.area_agricultable, F.area_vegetation,
+            F.producer_id, P.name.label("producer_name"), P.cpf_cnpj.label("producer_cpf_cnpj"),
+        )
+        .join(P, P.id == F.producer_id)
+        .order_by(F.id)
+    )
+    if state:
+        stmt = stmt.where(F.state == state.upper())
+    if season_id:
+        # fazendas com algum plantio na safra
+        stmt = stmt.where(
+            select(models.Planting.id)
+            .where(models.Planting.farm_id == F.id, models.Planting.season_id == season_id)
+            .exists()
+        )
+    return stmt
+
+def _plantings_export_stmt(state: str | None, season_id: int | None):
+    Pl, F, S = models.Planting, models.Farm, models.Season
+    stmt = (
+        select(
+            Pl.id, Pl.culture, Pl.season_id, S.name.label("season_name"),
+            Pl.farm_id, F.name.label("farm_name"), F.city, F.state,
+        )
+        .join(F, F.id == Pl.farm_id)
+        .join(S, S.id == Pl.season_id)
+        .order_by(Pl.id)
+    )
+    if state:
+        stmt = stmt.where(F.state == state.upper())
+    if season_id:
+        stmt = stmt.where(Pl.season_id == season_id)
+    return stmt
+
+async def _export_chunks(db: AsyncSession, stmt, fmt: str, gzip: bool) -> AsyncIterator[bytes]:
+    # O handler já retornou quando o stream roda: a sessão é fechada aqui.
+    gz = zlib.compressobj(wbits=31) if gzip else None  # wbits=31 -> formato gzip
+    try:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH))  # cursor no servidor
+        columns = list(result.keys())
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if fmt == "csv":
+            writer.writerow(columns)
+        async for part in result.partitions():
+            if fmt == "csv":
+                writer.writerows(part)
+            else:
+                for row in part:
+                    buf.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                    buf.write("\n")
+            chunk = buf.getvalue().encode("utf-8")
+            buf.seek(0); buf.truncate()
+            if gz:
+                chunk = gz.compress(chunk)
+            if chunk:
+                yield chunk
+        if fmt == "csv" and buf.tell():
+            # só o cabeçalho (export vazio)
+            chunk = buf.getvalue().encode("utf-8")
+            yield gz.compress(chunk) if gz else chunk
+        if gz:
+            yield gz.flush()
+    finally:
+        await db.close()
+
+def _export_response(db: AsyncSession, stmt, name: str, fmt: str, gzip: bool) -> StreamingResponse:
+    filename = f"{name}.{fmt}" + (".gz" if gzip else "")
+    if gzip:
+        media_type = "application/gzip"
+    else:
+        media_type = "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_chunks(db, stmt, fmt, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/dashboard/export/farms.{fmt}")
+async def export_farms(
+    fmt: Literal["csv", "ndjson"],
+    state: str | None = Query(default=None, description="UF para filtrar (ex.: MG)"),
+    season_id: int | None = Query(default=None, description="fazendas com plantio na safra"),
+    gzip: bool = Query(default=False, description="comprime o arquivo (.gz)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return _export_response(db, _farms_export_stmt(state, season_id), "farms", fmt, gzip)
+
+@router.get("/dashboard/export/plantings.{fmt}")
+async def export_plantings(
+    fmt: Literal["csv", "ndjson"],
+    state: str | None = Query(default=None, description="UF para filtrar (ex.: MG)"),
+    season_id: int | None = Query(default=None, description="ID da Safra"),
+    gzip: bool = Query(default=False, description="comprime o arquivo (.gz)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return _export_response(db, _plantings_export_stmt(state, season_id), "plantings", fmt, gzip)
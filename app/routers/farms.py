@@ -1,52 +1,229 @@
 # app/routers/farms.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.database import get_db
+from loguru import logger
+from sqlalchemy import select, insert
+from sqlalchemy.exc import SQLAlchemyError
+from app.database import get_async_db
 from app import models, schemas
+from app.cache import bump_data_version
+from app.etag import etag
+from app import summary
+from app.summary import SummaryDelta
+from app.pagination import Page
+from app.projection import fetch_dicts, fields_param, lean_response
+from app.bulk import aiter_lines, aiter_csv, aiter_ndjson, error_message
 
 router = APIRouter(prefix="/api/farms", tags=["farms"])
 
+UPLOAD_BATCH_MAX = 10_000
+
+def _areas_ok(total: float, agri: float, veg: float) -> bool:
+    return agri + veg <= total + 1e-9
+
 def _check_areas(total: float, agri: float, veg: float):
-    if agri + veg > total + 1e-9:
+    if not _areas_ok(total, agri, veg):
         raise HTTPException(
             status_code=400,
             detail="Soma de áreas (agricultável + vegetação) não pode ultrapassar a área total."
         )
 
 @router.post("", response_model=schemas.FarmOut, status_code=201)
-def create_farm(data: schemas.FarmCreate, db: Session = Depends(get_db)):
+async def create_farm(data: schemas.FarmCreate, db: AsyncSession = Depends(get_async_db)):
     # valida produtor existe
-    producer = db.get(models.Producer, data.producer_id)
+    producer = await db.get(models.Producer, data.producer_id)
     if not producer:
         raise HTTPException(status_code=404, detail="Produtor não encontrado.")
     _check_areas(data.area_total, data.area_agricultable, data.area_vegetation)
     farm = models.Farm(**data.model_dump())
-    db.add(farm); db.commit(); db.refresh(farm)
+    delta = SummaryDelta()
+    delta.add_farm(farm.state, farm.area_total, farm.area_agricultable, farm.area_vegetation)
+    db.add(farm); await db.run_sync(delta.apply); await db.commit(); await db.refresh(farm)
+    bump_data_version("farms")
     return farm
 
-@router.get("", response_model=list[schemas.FarmOut])
-def list_farms(producer_id: int | None = Query(default=None), db: Session = Depends(get_db)):
-    stmt = select(models.Farm)
+def _ingest_farms(db: Session, chunk: list[tuple[int, dict]]) -> list[tuple[int, str]]:
+    """Valida e grava um bloco do upload. Devolve as linhas rejeitadas."""
+    rejected: list[tuple[int, str]] = []
+    valid: list[tuple[int, schemas.FarmCreate]] = []
+    for lineno, item in chunk:
+        try:
+            valid.append((lineno, schemas.FarmCreate.model_validate(item)))
+        except ValidationError as e:
+            rejected.append((lineno, error_message(e)))
+
+    # regra de áreas aplicada ao bloco inteiro
+    ok = [_areas_ok(d.area_total, d.area_agricultable, d.area_vegetation) for _, d in valid]
+    rejected += [
+        (lineno, "Soma de áreas (agricultável + vegetação) não pode ultrapassar a área total.")
+        for (lineno, _), good in zip(valid, ok) if not good
+    ]
+    valid = [v for v, good in zip(valid, ok) if good]
+
+    # existência dos produtores: um único IN por bloco
+    wanted = {d.producer_id for _, d in valid}
+    found = set(db.scalars(select(models.Producer.id).where(models.Producer.id.in_(wanted)))) if wanted else set()
+    rejected += [(lineno, "Produtor não encontrado.") for lineno, d in valid if d.producer_id not in found]
+    rows = [d.model_dump() for _, d in valid if d.producer_id in found]
+
+    if rows:
+        delta = SummaryDelta()
+        for r in rows:
+            delta.add_farm(r["state"], r["area_total"], r["area_agricultable"], r["area_vegetation"])
+        db.execute(insert(models.Farm), rows)
+        delta.apply(db)
+        db.commit()
+        bump_data_version("farms")
+    rejected.sort()
+    return rejected
+
+@router.post("/upload")
+async def upload_farms(
+    request: Request,
+    batch_size: int = Query(default=1000, ge=1, le=UPLOAD_BATCH_MAX, description="linhas por lote/transação"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Carga de fazendas em stream (CSV com cabeçalho ou NDJSON). O arquivo é lido
+    incrementalmente e gravado em lotes de `batch_size`; a resposta é um NDJSON
+    com as linhas rejeitadas (`{"line", "detail"}`) seguido de um resumo.
+    Não é atômica: cada lote é uma transação, e um lote que falha no banco
+    volta inteiro como rejeitado sem desfazer os anteriores.
+    """
+    ctype = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    if ctype in ("text/csv", "application/csv"):
+        records = aiter_csv(aiter_lines(request.stream()))
+    elif ctype in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        records = aiter_ndjson(aiter_lines(request.stream()))
+    else:
+        raise HTTPException(status_code=415, detail="Use text/csv ou application/x-ndjson.")
+
+    # rejeitados vão para um arquivo temporário (só fica em memória se for pequeno)
+    rejects = tempfile.SpooledTemporaryFile(max_size=1 << 20, mode="w+b")
+    received = n_rejected = 0
+
+    def reject(lineno: int, detail: str):
+        nonlocal n_rejected
+        n_rejected += 1
+        rejects.write(json.dumps({"line": lineno, "detail": detail}, ensure_ascii=False).encode() + b"\n")
+
+    async def store(chunk: list[tuple[int, dict]]):
+        try:
+            rejected = await db.run_sync(_ingest_farms, chunk)
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.exception(f"Upload de fazendas: falha ao gravar o lote das linhas {chunk[0][0]}–{chunk[-1][0]}")
+            rejected = [(lineno, f"Erro ao gravar o lote ({type(e).__name__}).") for lineno, _ in chunk]
+        for lineno, detail in rejected:
+            reject(lineno, detail)
+
+    chunk: list[tuple[int, dict]] = []
+    async for lineno, item, error in records:
+        received += 1
+        if error is not None:
+            reject(lineno, error)
+            continue
+        chunk.append((lineno, item))
+        if len(chunk) >= batch_size:
+            await store(chunk)
+            chunk = []
+    if chunk:
+        await store(chunk)
+
+    summary = {"received": received, "created": received - n_rejected, "rejected": n_rejected}
+    rejects.seek(0)
+
+    def stream():
+        with rejects:
+            yield from rejects
+        yield json.dumps({"summary": summary}).encode() + b"\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def _farm_filters(producer_id: int | None, state: str | None, city: str | None,
+                  min_area: float | None, max_area: float | None) -> list:
+    F = models.Farm
+    where = []
     if producer_id is not None:
-        stmt = stmt.where(models.Farm.producer_id == producer_id)
-    return list(db.scalars(stmt))
+        where.append(F.producer_id == producer_id)
+    if state:
+        where.append(F.state == state.upper())
+    if city:
+        where.append(F.city == city)
+    if min_area is not None:
+        where.append(F.area_total >= min_area)
+    if max_area is not None:
+        where.append(F.area_total <= max_area)
+    return where
+
+@router.get("", response_model=list[schemas.FarmOut], dependencies=[Depends(etag("farms"))])
+async def list_farms(
+    request: Request,
+    response: Response,
+    producer_id: int | None = Query(default=None),
+    state: str | None = Query(default=None, description="UF (ex.: MG)"),
+    city: str | None = Query(default=None),
+    min_area: float | None = Query(default=None, ge=0, description="área total mínima (ha)"),
+    max_area: float | None = Query(default=None, ge=0, description="área total máxima (ha)"),
+    page: Page = Depends(),
+    columns: list = Depends(fields_param(models.Farm)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(*columns).where(*_farm_filters(producer_id, state, city, min_area, max_area))
+    rows = await fetch_dicts(db, page.apply(stmt, models.Farm.id))
+    return lean_response(page.finish(rows, request, response), response)
 
 @router.patch("/{farm_id}", response_model=schemas.FarmOut)
-def update_farm(farm_id: int, data: schemas.FarmUpdate, db: Session = Depends(get_db)):
-    farm = db.get(models.Farm, farm_id)
+async def update_farm(farm_id: int, data: schemas.FarmUpdate, db: AsyncSession = Depends(get_async_db)):
+    farm = await db.get(models.Farm, farm_id)
     if not farm:
         raise HTTPException(status_code=404, detail="Propriedade não encontrada.")
+    delta = SummaryDelta()
+    old_state = farm.state
+    delta.add_farm(farm.state, farm.area_total, farm.area_agricultable, farm.area_vegetation, sign=-1)
     # aplica mudanças
     for k, v in data.model_dump(exclude_unset=True).items():
         setattr(farm, k, v if k != "state" or v is None else v.upper())
     _check_areas(farm.area_total, farm.area_agricultable, farm.area_vegetation)
-    db.add(farm); db.commit(); db.refresh(farm)
+    delta.add_farm(farm.state, farm.area_total, farm.area_agricultable, farm.area_vegetation)
+    if farm.state != old_state:
+        await db.run_sync(delta.move_farm_plantings, farm.id, old_state, farm.state)
+    db.add(farm); await db.run_sync(delta.apply); await db.commit(); await db.refresh(farm)
+    bump_data_version("farms")
     return farm
 
+@router.delete("", response_model=schemas.BulkDeleteReport)
+async def delete_farms(
+    producer_id: int | None = Query(default=None),
+    state: str | None = Query(default=None, description="UF (ex.: MG)"),
+    city: str | None = Query(default=None),
+    min_area: float | None = Query(default=None, ge=0, description="área total mínima (ha)"),
+    max_area: float | None = Query(default=None, ge=0, description="área total máxima (ha)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Exclusão em massa pelos filtros da listagem (ao menos um é obrigatório);
+    os plantios saem pelo ON DELETE CASCADE do banco.
+    """
+    where = _farm_filters(producer_id, state, city, min_area, max_area)
+    if not where:
+        raise HTTPException(status_code=400, detail="Informe ao menos um filtro.")
+    farms, plantings = await db.run_sync(summary.delete_farms, *where)
+    await db.commit()
+    if farms:
+        bump_data_version("farms", "plantings")
+    return schemas.BulkDeleteReport(farms=farms, plantings=plantings)
+
 @router.delete("/{farm_id}", status_code=204)
-def delete_farm(farm_id: int, db: Session = Depends(get_db)):
-    farm = db.get(models.Farm, farm_id)
-    if not farm:
+async def delete_farm(farm_id: int, db: AsyncSession = Depends(get_async_db)):
+    # os plantios saem pelo ON DELETE CASCADE (sem carregar nada no ORM)
+    farms, _ = await db.run_sync(summary.delete_farms, models.Farm.id == farm_id)
+    if not farms:
         raise HTTPException(status_code=404, detail="Propriedade não encontrada.")
-    db.delete(farm); db.commit()
+    await db.commit()
+    bump_data_version("farms", "plantings")
@@ -1,22 +1,34 @@
 # app/routers/plantings.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_
-from app.database import get_db
+from sqlalchemy import select, and_, insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from app.database import get_async_db
 from app import models, schemas
+from app.cache import bump_data_version
+from app.etag import etag
+from app import summary
+from app.summary import SummaryDelta
+from app.pagination import Page
+from app.projection import fetch_dicts, lean_response, table_columns
+from app.bulk import INSERT_BATCH, IN_CHUNK, chunked, parse_json_or_ndjson, error_message
 
 router = APIRouter(prefix="/api/plantings", tags=["plantings"])
 
 @router.post("", response_model=schemas.PlantingOut, status_code=201)
-def create_planting(data: schemas.PlantingCreate, db: Session = Depends(get_db)):
+async def create_planting(data: schemas.PlantingCreate, db: AsyncSession = Depends(get_async_db)):
     # valida fk
-    if not db.get(models.Farm, data.farm_id):
+    farm = await db.get(models.Farm, data.farm_id)
+    if not farm:
         raise HTTPException(status_code=404, detail="Propriedade não encontrada.")
-    if not db.get(models.Season, data.season_id):
+    if not await db.get(models.Season, data.season_id):
         raise HTTPException(status_code=404, detail="Safra não encontrada.")
 
     # checa unicidade (farm, season, culture)
-    exists = db.execute(
+    exists = (await db.execute(
         select(models.Planting).where(
             and_(
                 models.Planting.farm_id == data.farm_id,
@@ -24,30 +36,179 @@ def create_planting(data: schemas.PlantingCreate, db: Session = Depends(get_db))
                 models.Planting.culture == data.culture,
             )
         )
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     if exists:
         raise HTTPException(status_code=400, detail="Plantio já cadastrado para (fazenda, safra, cultura).")
 
     obj = models.Planting(**data.model_dump())
-    db.add(obj); db.commit(); db.refresh(obj)
+    delta = SummaryDelta()
+    delta.add_planting(obj.season_id, farm.state, obj.culture)
+    db.add(obj); await db.run_sync(delta.apply); await db.commit(); await db.refresh(obj)
+    bump_data_version("plantings")
     return obj
 
-@router.get("", response_model=list[schemas.PlantingOut])
-def list_plantings(
+def _existing_ids(db: Session, column, ids: set[int]) -> set[int]:
+    found: set[int] = set()
+    for part in chunked(ids, IN_CHUNK):
+        found.update(db.scalars(select(column).where(column.in_(part))))
+    return found
+
+def _farm_states(db: Session, ids: set[int]) -> dict[int, str]:
+    found: dict[int, str] = {}
+    for part in chunked(ids, IN_CHUNK):
+        found.update(db.execute(select(models.Farm.id, models.Farm.state).where(models.Farm.id.in_(part))).all())
+    return found
+
+def _existing_plantings(db: Session, keys: list[tuple[int, int, str]]) -> set[tuple[int, int, str]]:
+    # busca em conjunto contra uix_planting_unique (3 parâmetros por tupla)
+    cols = (models.Planting.farm_id, models.Planting.season_id, models.Planting.culture)
+    found: set[tuple[int, int, str]] = set()
+    for part in chunked(keys, IN_CHUNK // 3):
+        found.update(tuple(r) for r in db.execute(select(*cols).where(tuple_(*cols).in_(part))))
+    return found
+
+def _insert_plantings(db: Session, batch: list[tuple[int, tuple[int, int, str]]], skipped: list,
+                      farm_states: dict[int, str]) -> int:
+    # cada volta tira do lote ao menos uma linha, ou relança o erro
+    while batch:
+        values = [{"farm_id": f, "season_id": s, "culture": c} for _, (f, s, c) in batch]
+        delta = SummaryDelta()
+        for f, s, c in (key for _, key in batch):
+            delta.add_planting(s, farm_states[f], c)
+        try:
+            db.execute(insert(models.Planting), values)
+            delta.apply(db)
+            db.commit()
+            return len(batch)
+        except IntegrityError:
+            # corrida com outra escrita: plantio já cadastrado, ou fazenda/safra apagada no meio
+            db.rollback()
+            keys = [key for _, key in batch]
+            taken = _existing_plantings(db, keys)
+            farms = _existing_ids(db, models.Farm.id, {f for f, _, _ in keys})
+            seasons = _existing_ids(db, models.Season.id, {s for _, s, _ in keys})
+            remaining = []
+            for row, key in batch:
+                if key in taken:
+                    reason = "duplicate"
+                elif key[0] not in farms:
+                    reason = "farm_not_found"
+                elif key[1] not in seasons:
+                    reason = "season_not_found"
+                else:
+                    remaining.append((row, key))
+                    continue
+                skipped.append(schemas.PlantingSkipped(row=row, reason=reason, farm_id=key[0],
+                                                       season_id=key[1], culture=key[2]))
+            if len(remaining) == len(batch):
+                raise  # não é conflito com outra escrita: erro de verdade
+            batch = remaining
+    return 0
+
+def _validate_plantings(items: list) -> tuple[list[tuple[int, schemas.PlantingCreate]], list]:
+    skipped: list[schemas.PlantingSkipped] = []
+    valid: list[tuple[int, schemas.PlantingCreate]] = []
+    for row, item in enumerate(items, start=1):
+        try:
+            valid.append((row, schemas.PlantingCreate.model_validate(item)))
+        except ValidationError as e:
+            skipped.append(schemas.PlantingSkipped(row=row, reason="invalid", detail=error_message(e)))
+    return valid, skipped
+
+def _store_plantings(db: Session, valid: list[tuple[int, schemas.PlantingCreate]], skipped: list) -> int:
+    farms = _farm_states(db, {d.farm_id for _, d in valid})
+    seasons = _existing_ids(db, models.Season.id, {d.season_id for _, d in valid})
+
+    candidates: dict[tuple[int, int, str], int] = {}
+    for row, d in valid:
+        key = (d.farm_id, d.season_id, d.culture)
+        reason = None
+        if d.farm_id not in farms:
+            reason = "farm_not_found"
+        elif d.season_id not in seasons:
+            reason = "season_not_found"
+        elif key in candidates:
+            reason = "duplicate"
+        if reason:
+            skipped.append(schemas.PlantingSkipped(row=row, reason=reason, farm_id=d.farm_id,
+                                                   season_id=d.season_id, culture=d.culture))
+            continue
+        candidates[key] = row
+
+    for key in _existing_plantings(db, list(candidates)):
+        row = candidates.pop(key)
+        skipped.append(schemas.PlantingSkipped(row=row, reason="duplicate", farm_id=key[0],
+                                               season_id=key[1], culture=key[2]))
+
+    created = 0
+    for batch in chunked(((row, key) for key, row in candidates.items()), INSERT_BATCH):
+        created += _insert_plantings(db, batch, skipped, farms)
+    return created
+
+@router.post("/bulk", response_model=schemas.PlantingBulkReport)
+async def bulk_create_plantings(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Cadastro em massa de plantios (array JSON ou NDJSON). Fazendas e safras são
+    resolvidas em conjunto e duplicados de `(farm_id, season_id, culture)` são
+    detectados numa consulta por bloco; os pulados vêm listados em `skipped`.
+    """
+    body = await request.body()
+    # parse e validação são CPU pura: ficam fora do event loop
+    items = await run_in_threadpool(parse_json_or_ndjson, body, request.headers.get("content-type"))
+    valid, skipped = await run_in_threadpool(_validate_plantings, items)
+
+    created = await db.run_sync(_store_plantings, valid, skipped)
+    if created:
+        bump_data_version("plantings")
+
+    skipped.sort(key=lambda s: s.row)
+    return schemas.PlantingBulkReport(created=created, skipped=skipped)
+
+def _planting_filters(farm_id: int | None, season_id: int | None, culture: str | None) -> list:
+    P = models.Planting
+    where = []
+    if farm_id is not None:
+        where.append(P.farm_id == farm_id)
+    if season_id is not None:
+        where.append(P.season_id == season_id)
+    if culture:
+        where.append(P.culture == culture)
+    return where
+
+@router.get("", response_model=list[schemas.PlantingOut], dependencies=[Depends(etag("plantings"))])
+async def list_plantings(
+    request: Request,
+    response: Response,
     farm_id: int | None = Query(default=None),
     season_id: int | None = Query(default=None),
-    db: Session = Depends(get_db),
+    culture: str | None = Query(default=None, description="ex.: Soja"),
+    page: Page = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    stmt = select(models.Planting)
-    if farm_id is not None:
-        stmt = stmt.where(models.Planting.farm_id == farm_id)
-    if season_id is not None:
-        stmt = stmt.where(models.Planting.season_id == season_id)
-    return list(db.scalars(stmt))
+    stmt = select(*table_columns(models.Planting)).where(*_planting_filters(farm_id, season_id, culture))
+    rows = await fetch_dicts(db, page.apply(stmt, models.Planting.id))
+    return lean_response(page.finish(rows, request, response), response)
+
+@router.delete("", response_model=schemas.BulkDeleteReport)
+async def delete_plantings(
+    farm_id: int | None = Query(default=None),
+    season_id: int | None = Query(default=None),
+    culture: str | None = Query(default=None, description="ex.: Soja"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Exclusão em massa pelos filtros da listagem (ao menos um é obrigatório)."""
+    where = _planting_filters(farm_id, season_id, culture)
+    if not where:
+        raise HTTPException(status_code=400, detail="Informe ao menos um filtro.")
+    removed = await db.run_sync(summary.delete_plantings, *where)
+    await db.commit()
+    if removed:
+        bump_data_version("plantings")
+    return schemas.BulkDeleteReport(plantings=removed)
 
 @router.delete("/{planting_id}", status_code=204)
-def delete_planting(planting_id: int, db: Session = Depends(get_db)):
-    obj = db.get(models.Planting, planting_id)
-    if not obj:
+async def delete_planting(planting_id: int, db: AsyncSession = Depends(get_async_db)):
+    if not await db.run_sync(summary.delete_plantings, models.Planting.id == planting_id):
         raise HTTPException(status_code=404, detail="Plantio não encontrado.")
-    db.delete(obj); db.commit()
+    await db.commit()
+    bump_data_version("plantings")
@@ -1,53 +1,183 @@
 # app/routers/producers.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.database import get_db
+from sqlalchemy import select, insert, delete, false
+from sqlalchemy.exc import IntegrityError
+from app.database import get_async_db
 from app import models
 from app import schemas
+from app import search
+from app.cache import bump_data_version
+from app.etag import etag
+from app import summary
+from app.pagination import Page
+from app.projection import fetch_dict, fetch_dicts, fields_param, lean_response
+from app.bulk import INSERT_BATCH, IN_CHUNK, chunked, parse_json_or_ndjson, error_message
 
 router = APIRouter(prefix="/api/producers", tags=["producers"])
 
 @router.post("", response_model=schemas.ProducerOut, status_code=201)
-def create_producer(data: schemas.ProducerCreate, db: Session = Depends(get_db)):
+async def create_producer(data: schemas.ProducerCreate, db: AsyncSession = Depends(get_async_db)):
     # data.cpf_cnpj já vem validado/normalizado (só dígitos)
-    exists = db.execute(
+    exists = (await db.execute(
         select(models.Producer).where(models.Producer.cpf_cnpj == data.cpf_cnpj)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
     if exists:
         raise HTTPException(status_code=400, detail="CPF/CNPJ já cadastrado.")
     obj = models.Producer(cpf_cnpj=data.cpf_cnpj, name=data.name)
-    db.add(obj); db.commit(); db.refresh(obj)
+    db.add(obj); await db.commit(); await db.refresh(obj)
+    bump_data_version("producers")
     return obj
 
-@router.get("", response_model=list[schemas.ProducerOut])
-def list_producers(q: str | None = Query(default=None), db: Session = Depends(get_db)):
-    stmt = select(models.Producer)
+def _producer_ids(db: Session, docs: list[str]) -> dict[str, int]:
+    found: dict[str, int] = {}
+    for part in chunked(docs, IN_CHUNK):
+        found.update(db.execute(
+            select(models.Producer.cpf_cnpj, models.Producer.id).where(models.Producer.cpf_cnpj.in_(part))
+        ).all())
+    return found
+
+def _insert_producers(db: Session, batch: list[tuple[schemas.BulkRowResult, dict]]) -> None:
+    # executemany sem RETURNING: no SQLite, RETURNING com ordem garantida vira um INSERT por linha
+    while batch:
+        try:
+            db.execute(insert(models.Producer), [values for _, values in batch])
+            db.commit()
+            break
+        except IntegrityError:
+            # outro processo cadastrou algum documento entre a checagem e o insert
+            db.rollback()
+            taken = _producer_ids(db, [values["cpf_cnpj"] for _, values in batch])
+            for result, values in batch:
+                if values["cpf_cnpj"] in taken:
+                    result.status, result.detail = "duplicate", "CPF/CNPJ já cadastrado."
+            remaining = [item for item in batch if item[1]["cpf_cnpj"] not in taken]
+            if len(remaining) == len(batch):
+                raise  # não é conflito de CPF/CNPJ: erro de verdade
+            batch = remaining
+    # ids pelo documento (único): um SELECT por bloco
+    ids = _producer_ids(db, [values["cpf_cnpj"] for _, values in batch])
+    for result, values in batch:
+        result.id = ids[values["cpf_cnpj"]]
+
+def _validate_producers(items: list) -> tuple[list[schemas.BulkRowResult], dict]:
+    results: list[schemas.BulkRowResult] = []
+    pending: dict[str, tuple[schemas.BulkRowResult, dict]] = {}
+    for row, item in enumerate(items, start=1):
+        try:
+            data = schemas.ProducerCreate.model_validate(item)
+        except ValidationError as e:
+            results.append(schemas.BulkRowResult(row=row, status="invalid", detail=error_message(e)))
+            continue
+        result = schemas.BulkRowResult(row=row, status="created", cpf_cnpj=data.cpf_cnpj)
+        results.append(result)
+        if data.cpf_cnpj in pending:
+            result.status, result.detail = "duplicate", "CPF/CNPJ repetido no arquivo."
+            continue
+        pending[data.cpf_cnpj] = (result, {"cpf_cnpj": data.cpf_cnpj, "name": data.name})
+    return results, pending
+
+def _store_producers(db: Session, pending: dict[str, tuple[schemas.BulkRowResult, dict]]) -> None:
+    for doc in _producer_ids(db, list(pending)):
+        result, _ = pending.pop(doc)
+        result.status, result.detail = "duplicate", "CPF/CNPJ já cadastrado."
+
+    for batch in chunked(pending.values(), INSERT_BATCH):
+        _insert_producers(db, batch)
+
+@router.post("/bulk", response_model=schemas.ProducerBulkReport)
+async def bulk_create_producers(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Importação em massa: array JSON ou NDJSON (`application/x-ndjson`) de
+    `{"cpf_cnpj", "name"}`. Valida tudo numa passada, checa duplicados com
+    uma consulta por bloco e insere em transações por lote.
+    """
+    body = await request.body()
+    # parse e validação são CPU pura: ficam fora do event loop
+    items = await run_in_threadpool(parse_json_or_ndjson, body, request.headers.get("content-type"))
+    results, pending = await run_in_threadpool(_validate_producers, items)
+
+    await db.run_sync(_store_producers, pending)
+    if pending:
+        bump_data_version("producers")
+
+    counts = {"created": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        counts[result.status] += 1
+    return schemas.ProducerBulkReport(
+        created=counts["created"], duplicates=counts["duplicate"], invalid=counts["invalid"], rows=results
+    )
+
+@router.get("", response_model=list[schemas.ProducerOut], dependencies=[Depends(etag("producers"))])
+async def list_producers(
+    request: Request,
+    response: Response,
+    q: str | None = Query(default=None, description="termos do nome (prefixo, sem acento)"),
+    page: Page = Depends(),
+    columns: list = Depends(fields_param(models.Producer)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(*columns)
     if q:
-        stmt = stmt.where(models.Producer.name.ilike(f"%{q}%"))
-    rows = list(db.scalars(stmt))
-    return rows
+        # filtro pelo índice de busca; a paginação continua por id
+        ids = search.matching_ids(db.get_bind().dialect.name, q)
+        # q sem nenhum termo (ex.: "-", "%") não casa com nada, como em /search
+        stmt = stmt.where(models.Producer.id.in_(ids) if ids is not None else false())
+    rows = await fetch_dicts(db, page.apply(stmt, models.Producer.id))
+    return lean_response(page.finish(rows, request, response), response)
 
-@router.get("/{producer_id}", response_model=schemas.ProducerOut)
-def get_producer(producer_id: int, db: Session = Depends(get_db)):
-    obj = db.get(models.Producer, producer_id)
-    if not obj:
+@router.get("/search", response_model=list[schemas.ProducerOut], dependencies=[Depends(etag("producers"))])
+async def search_producers(
+    response: Response,
+    q: str = Query(min_length=1, description="termos do nome; cada termo vale como prefixo"),
+    limit: int = Query(default=20, ge=1, le=100),
+    columns: list = Depends(fields_param(models.Producer)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Busca por nome, sem acento, em ordem de relevância (FTS5 no SQLite, trigramas no PostgreSQL)."""
+    stmt = search.ranked(db.get_bind().dialect.name, q, limit, columns)
+    if stmt is None:
+        return []
+    return lean_response(await fetch_dicts(db, stmt), response)
+
+@router.get("/{producer_id}", response_model=schemas.ProducerOut, dependencies=[Depends(etag("producers"))])
+async def get_producer(
+    producer_id: int,
+    response: Response,
+    columns: list = Depends(fields_param(models.Producer)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    row = await fetch_dict(db, select(*columns).where(models.Producer.id == producer_id))
+    if row is None:
         raise HTTPException(status_code=404, detail="Produtor não encontrado.")
-    return obj
+    return lean_response(row, response)
 
 @router.patch("/{producer_id}", response_model=schemas.ProducerOut)
-def update_producer(producer_id: int, data: schemas.ProducerUpdate, db: Session = Depends(get_db)):
-    obj = db.get(models.Producer, producer_id)
+async def update_producer(producer_id: int, data: schemas.ProducerUpdate, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(models.Producer, producer_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Produtor não encontrado.")
     if data.name is not None:
         obj.name = data.name
-    db.add(obj); db.commit(); db.refresh(obj)
+    db.add(obj); await db.commit(); await db.refresh(obj)
+    bump_data_version("producers")
     return obj
 
 @router.delete("/{producer_id}", status_code=204)
-def delete_producer(producer_id: int, db: Session = Depends(get_db)):
-    obj = db.get(models.Producer, producer_id)
-    if not obj:
+async def delete_producer(producer_id: int, db: AsyncSession = Depends(get_async_db)):
+    # trava o produtor antes: fazenda nova dele espera pela chave estrangeira,
+    # então as fazendas descontadas são todas as que o DELETE leva
+    locked = await db.scalar(
+        select(models.Producer.id).where(models.Producer.id == producer_id).with_for_update()
+    )
+    if locked is None:
         raise HTTPException(status_code=404, detail="Produtor não encontrado.")
-    db.delete(obj); db.commit()
+    await db.run_sync(summary.delete_farms, models.Farm.producer_id == producer_id)
+    await db.execute(
+        delete(models.Producer).where(models.Producer.id == producer_id).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    bump_data_version("producers", "farms", "plantings")
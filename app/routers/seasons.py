@@ -1,24 +1,30 @@
 # app/routers/seasons.py
-from fastapi import APIRouter, Depends, Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.database import get_db
+from app.database import get_async_db
 from app import models, schemas
+from app.cache import bump_data_version
+from app.etag import etag
+from app.pagination import Page
+from app.projection import fetch_dicts, lean_response, table_columns
 
 router = APIRouter(prefix="/api/seasons", tags=["seasons"])
 
 @router.post("", response_model=schemas.SeasonOut)
-def create_season(data: schemas.SeasonCreate, response: Response, db: Session = Depends(get_db)):
+async def create_season(data: schemas.SeasonCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
     # idempotente: se já existe, devolve 200; senão cria (201)
-    exists = db.execute(select(models.Season).where(models.Season.name == data.name)).scalar_one_or_none()
+    exists = (await db.execute(select(models.Season).where(models.Season.name == data.name))).scalar_one_or_none()
     if exists:
         return exists
     obj = models.Season(name=data.name)
-    db.add(obj); db.commit(); db.refresh(obj)
+    db.add(obj); await db.commit(); await db.refresh(obj)
+    bump_data_version("seasons")
     response.status_code = 201
     return obj
 
-@router.get("", response_model=list[schemas.SeasonOut])
-def list_seasons(db: Session = Depends(get_db)):
-    rows = list(db.scalars(select(models.Season)))
-    return rows
+@router.get("", response_model=list[schemas.SeasonOut], dependencies=[Depends(etag("seasons"))])
+async def list_seasons(request: Request, response: Response, page: Page = Depends(),
+                       db: AsyncSession = Depends(get_async_db)):
+    rows = await fetch_dicts(db, page.apply(select(*table_columns(models.Season)), models.Season.id))
+    return lean_response(page.finish(rows, request, response), response)
@@ -24,6 +24,19 @@ class ProducerOut(BaseModel):
 
     model_config = {"from_attributes": True}
 
+class BulkRowResult(BaseModel):
+    row: int  # posição (1-based) no payload
+    status: str  # created | duplicate | invalid
+    id: Optional[int] = None
+    cpf_cnpj: Optional[str] = None
+    detail: Optional[str] = None
+
+class ProducerBulkReport(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    rows: list[BulkRowResult]
+
 class FarmBase(BaseModel):
     producer_id: int
     name: str
@@ -83,3 +96,20 @@ class PlantingCreate(PlantingBase):
 class PlantingOut(PlantingBase):
     id: int
     model_config = {"from_attributes": True}
+
+class PlantingSkipped(BaseModel):
+    row: int  # posição (1-based) no payload
+    reason: str  # duplicate | farm_not_found | season_not_found | invalid
+    farm_id: Optional[int] = None
+    season_id: Optional[int] = None
+    culture: Optional[str] = None
+    detail: Optional[str] = None
+
+class PlantingBulkReport(BaseModel):
+    created: int
+    skipped: list[PlantingSkipped]
+
+class BulkDeleteReport(BaseModel):
+    # linhas removidas por tabela (plantios incluem os que saíram pela cascata)
+    farms: int = 0
+    plantings: int = 0
@@ -0,0 +1,119 @@
+# app/search.py
+"""
+Busca de produtores por nome, indexada e sem acento.
+
+- SQLite: tabela FTS5 `producers_fts` (conteúdo externo = `producers`),
+  tokenizer `unicode61 remove_diacritics 2`, mantida por triggers; ranking bm25.
+- PostgreSQL: índice GIN de trigramas sobre `f_unaccent(lower(name))`
+  (extensões `pg_trgm` e `unaccent`); ranking por `word_similarity`.
+
+Cada termo da busca vale como prefixo ("jo" casa "João" e "José"), e todos
+os termos precisam casar. Os triggers/índice acompanham qualquer escrita em
+`producers` (rotas, bulk e cascatas), então não há manutenção nas rotas.
+"""
+import re
+import unicodedata
+from sqlalchemy import event, func, literal_column, select, table, column, and_, or_
+from sqlalchemy.engine import Connection
+from app import models
+
+FTS_TABLE = "producers_fts"
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, content='producers', content_rowid='id', tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS producers_fts_ai AFTER INSERT ON producers BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS producers_fts_ad AFTER DELETE ON producers BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS producers_fts_au AFTER UPDATE OF name ON producers BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name);
+    END""",
+]
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() não é IMMUTABLE; o wrapper com dicionário fixo pode ir num índice
+    """CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent', $1) $$""",
+    "CREATE INDEX IF NOT EXISTS ix_producers_name_trgm ON producers USING gin (f_unaccent(lower(name)) gin_trgm_ops)",
+]
+
+def install(conn: Connection):
+    """Cria a estrutura de busca do dialeto (idempotente) e indexa o que já existe."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        for ddl in _SQLITE_DDL:
+            conn.exec_driver_sql(ddl)
+        conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    elif dialect == "postgresql":
+        for ddl in _POSTGRES_DDL:
+            conn.exec_driver_sql(ddl)
+
+def _after_create(target, conn: Connection, **kw):
+    install(conn)
+
+def _before_drop(target, conn: Connection, **kw):
+    # o índice FTS de conteúdo externo ficaria órfão com a tabela recriada
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+# create_all/drop_all (testes, bancos novos) também montam/desmontam a busca
+event.listen(models.Producer.__table__, "after_create", _after_create)
+event.listen(models.Producer.__table__, "before_drop", _before_drop)
+
+# --------------------- Consulta ---------------------
+
+_fts = table(FTS_TABLE, column("rowid"))
+
+def terms(q: str) -> list[str]:
+    """Termos da busca: sequências de letras/dígitos (o resto é separador)."""
+    return re.findall(r"[^\W_]+", q.lower())
+
+def _fold(word: str) -> str:
+    # o termo já vai sem acento: o padrão fica constante e o planner usa o índice
+    return "".join(c for c in unicodedata.normalize("NFKD", word) if not unicodedata.combining(c))
+
+def _unaccent(expr):
+    return func.f_unaccent(func.lower(expr))
+
+def matching_ids(dialect: str, q: str):
+    """SELECT dos ids de produtores cujo nome casa com todos os termos de `q` (None se não há termos)."""
+    words = terms(q)
+    if not words:
+        return None
+    P = models.Producer
+    if dialect == "sqlite":
+        match = " AND ".join(f'"{w}"*' for w in words)
+        return select(_fts.c.rowid).where(literal_column(FTS_TABLE).op("MATCH")(match))
+    if dialect == "postgresql":
+        # \m = início de palavra: prefixo por termo, como no FTS5 (o índice de trigramas atende regex)
+        name = _unaccent(P.name)
+        return select(P.id).where(and_(*[name.regexp_match(rf"\m{_fold(w)}") for w in words]))
+    return select(P.id).where(and_(*[or_(P.name.ilike(f"{w}%"), P.name.ilike(f"% {w}%")) for w in words]))
+
+def ranked(dialect: str, q: str, limit: int, columns: list | None = None):
+    """SELECT de produtores (ou só de `columns`) ordenados por relevância (None se não há termos)."""
+    words = terms(q)
+    if not words:
+        return None
+    P = models.Producer
+    cols = columns or [P]
+    if dialect == "sqlite":
+        match = " AND ".join(f'"{w}"*' for w in words)
+        return (
+            select(*cols)
+            .join(_fts, _fts.c.rowid == P.id)
+            .where(literal_column(FTS_TABLE).op("MATCH")(match))
+            .order_by(func.bm25(literal_column(FTS_TABLE)), P.id)
+            .limit(limit)
+        )
+    if dialect == "postgresql":
+        score = func.word_similarity(_fold(" ".join(words)), _unaccent(P.name))
+        return select(*cols).where(P.id.in_(matching_ids(dialect, q))).order_by(score.desc(), P.id).limit(limit)
+    return select(*cols).where(P.id.in_(matching_ids(dialect, q))).order_by(P.name, P.id).limit(limit)
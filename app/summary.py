@@ -0,0 +1,199 @@
+# app/summary.py
+"""
+Tabelas de resumo do dashboard.
+
+`state_summary` (por UF) e `culture_summary` (safra x UF x cultura) são
+atualizadas pelas rotas de escrita na mesma transação da escrita, via
+`SummaryDelta`; as exclusões passam por `delete_farms`/`delete_plantings`, que
+travam as linhas antes de contar. `rebuild` recalcula tudo do zero:
+
+    python -m app.summary rebuild
+"""
+import argparse
+from collections import defaultdict
+from sqlalchemy import select, func, insert, delete, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app import models
+from app.bulk import IN_CHUNK, chunked
+
+_STATE_AREAS = ("area_total", "area_agricultable", "area_vegetation")
+
+class SummaryDelta:
+    """Acumula variações e aplica tudo de uma vez (um upsert por tabela)."""
+
+    def __init__(self):
+        # state -> [farm_count, area_total, area_agricultable, area_vegetation]
+        self.states: dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+        # (season_id, state, culture) -> planting_count
+        self.cultures: dict[tuple[int, str, str], int] = defaultdict(int)
+
+    def add_farm(self, state: str, total: float, agri: float, veg: float, sign: int = 1, count: int = 1):
+        acc = self.states[state]
+        acc[0] += sign * count
+        acc[1] += sign * total
+        acc[2] += sign * agri
+        acc[3] += sign * veg
+
+    def add_planting(self, season_id: int, state: str, culture: str, sign: int = 1, count: int = 1):
+        self.cultures[(season_id, state, culture)] += sign * count
+
+    def remove_farms(self, db: Session, *where) -> tuple[int, int]:
+        """
+        Desconta as fazendas que casam com `where` e os plantios delas (antes do
+        DELETE). Devolve (fazendas, plantios).
+        """
+        F = models.Farm
+        removed = 0
+        locked = (
+            select(F.state, F.area_total, F.area_agricultable, F.area_vegetation)
+            .where(*where).with_for_update().subquery()
+        )
+        rows = db.execute(
+            select(locked.c.state, func.count(), func.sum(locked.c.area_total),
+                   func.sum(locked.c.area_agricultable), func.sum(locked.c.area_vegetation))
+            .group_by(locked.c.state)
+        )
+        for state, n, total, agri, veg in rows:
+            self.add_farm(state, total or 0.0, agri or 0.0, veg or 0.0, sign=-1, count=n)
+            removed += n
+        return removed, self.remove_plantings(db, *where)
+
+    def remove_plantings(self, db: Session, *where) -> int:
+        """Desconta os plantios que casam com `where` (pode filtrar por colunas de Farm)."""
+        P, F = models.Planting, models.Farm
+        removed = 0
+        # FOR UPDATE numa subconsulta (o PostgreSQL não aceita com agregação direta):
+        # plantio que outra transação esteja apagando espera aqui e não é descontado duas vezes
+        locked = (
+            select(P.season_id, F.state, P.culture)
+            .join(F, F.id == P.farm_id)
+            .where(*where).with_for_update(of=P).subquery()
+        )
+        rows = db.execute(
+            select(locked.c.season_id, locked.c.state, locked.c.culture, func.count())
+            .group_by(locked.c.season_id, locked.c.state, locked.c.culture)
+        )
+        for season_id, state, culture, n in rows:
+            self.add_planting(season_id, state, culture, sign=-1, count=n)
+            removed += n
+        return removed
+
+    def move_farm_plantings(self, db: Session, farm_id: int, old_state: str, new_state: str):
+        # fazenda mudou de UF: os plantios dela mudam de linha no resumo
+        P = models.Planting
+        rows = db.execute(
+            select(P.season_id, P.culture, func.count(P.id))
+            .where(P.farm_id == farm_id).group_by(P.season_id, P.culture)
+        )
+        for season_id, culture, n in rows:
+            self.add_planting(season_id, old_state, culture, sign=-1, count=n)
+            self.add_planting(season_id, new_state, culture, count=n)
+
+    def apply(self, db: Session):
+        """Aplica as variações na transação corrente (quem chama faz o commit)."""
+        S, C = models.StateSummary.__table__, models.CultureSummary.__table__
+        states = [
+            {"state": k, "farm_count": v[0], **dict(zip(_STATE_AREAS, v[1:]))}
+            for k, v in self.states.items() if any(v)
+        ]
+        cultures = [
+            {"season_id": k[0], "state": k[1], "culture": k[2], "planting_count": v}
+            for k, v in self.cultures.items() if v
+        ]
+        if states:
+            _upsert_add(db, S, ["state"], states)
+            db.execute(delete(S).where(S.c.farm_count <= 0))
+        if cultures:
+            _upsert_add(db, C, ["season_id", "state", "culture"], cultures)
+            db.execute(delete(C).where(C.c.planting_count <= 0))
+        self.states.clear()
+        self.cultures.clear()
+
+def delete_farms(db: Session, *where) -> tuple[int, int]:
+    """
+    Apaga as fazendas que casam com `where` (os plantios saem pelo ON DELETE
+    CASCADE) e desconta do resumo exatamente o que saiu. Devolve (fazendas, plantios).
+
+    As fazendas são travadas (SELECT ... FOR UPDATE) antes de contar: plantio novo
+    nelas espera pela chave estrangeira, e o DELETE vai pelos ids travados, então
+    fazenda que passe a casar com o filtro no meio (READ COMMITTED) não sai sem
+    ser descontada. No SQLite a escrita já é serializada e o FOR UPDATE é omitido.
+    """
+    F = models.Farm
+    ids = db.scalars(select(F.id).where(*where).order_by(F.id).with_for_update()).all()
+    delta = SummaryDelta()
+    farms = plantings = 0
+    for part in chunked(ids, IN_CHUNK):
+        plantings += delta.remove_farms(db, F.id.in_(part))[1]
+        farms += db.execute(
+            delete(F).where(F.id.in_(part)).execution_options(synchronize_session=False)
+        ).rowcount
+    delta.apply(db)
+    return farms, plantings
+
+def delete_plantings(db: Session, *where) -> int:
+    """Como `delete_farms`, para plantios (`where` pode filtrar por colunas de Farm)."""
+    P, F = models.Planting, models.Farm
+    # trava também as fazendas: a UF de cada plantio não muda até o commit
+    ids = db.scalars(
+        select(P.id).join(F, F.id == P.farm_id).where(*where).order_by(P.id).with_for_update()
+    ).all()
+    delta = SummaryDelta()
+    removed = 0
+    for part in chunked(ids, IN_CHUNK):
+        delta.remove_plantings(db, P.id.in_(part))
+        removed += db.execute(
+            delete(P).where(P.id.in_(part)).execution_options(synchronize_session=False)
+        ).rowcount
+    delta.apply(db)
+    return removed
+
+def _upsert_add(db: Session, table, keys: list[str], rows: list[dict]):
+    # INSERT ... ON CONFLICT DO UPDATE SET col = col + excluded.col
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        values = [c for c in rows[0] if c not in keys]
+        for part in chunked(rows, 1000):
+            ins = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(table).values(part)
+            stmt = ins.on_conflict_do_update(
+                index_elements=keys,
+                set_={c: table.c[c] + ins.excluded[c] for c in values},
+            )
+            db.execute(stmt)
+        return
+    # outros bancos: UPDATE e, se não havia linha, INSERT
+    for row in rows:
+        cond = [table.c[k] == row[k] for k in keys]
+        incr = {c: table.c[c] + v for c, v in row.items() if c not in keys}
+        if db.execute(update(table).where(*cond).values(incr)).rowcount == 0:
+            db.execute(insert(table).values(row))
+
+def rebuild(db: Session | Connection):
+    """Recalcula as tabelas de resumo a partir de farms/plantings (quem chama faz o commit)."""
+    S, C = models.StateSummary, models.CultureSummary
+    F, P = models.Farm, models.Planting
+    db.execute(delete(S))
+    db.execute(delete(C))
+    db.execute(insert(S).from_select(
+        ["state", "farm_count", *_STATE_AREAS],
+        select(F.state, func.count(F.id), func.sum(F.area_total), func.sum(F.area_agricultable),
+               func.sum(F.area_vegetation)).group_by(F.state),
+    ))
+    db.execute(insert(C).from_select(
+        ["season_id", "state", "culture", "planting_count"],
+        select(P.season_id, F.state, P.culture, func.count(P.id))
+        .join(F, F.id == P.farm_id).group_by(P.season_id, F.state, P.culture),
+    ))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manutenção das tabelas de resumo do dashboard")
+    parser.add_argument("command", choices=["rebuild"])
+    args = parser.parse_args()
+    from app.database import SessionLocal
+    with SessionLocal() as db:
+        rebuild(db)
+        db.commit()
+        print(f"✔ resumo recalculado: {db.scalar(select(func.count()).select_from(models.StateSummary))} UFs, "
+              f"{db.scalar(select(func.count()).select_from(models.CultureSummary))} linhas safra/UF/cultura")
@@ -0,0 +1,83 @@
+# app/validators_batch.py
+"""
+Validação de CPF/CNPJ em lote com NumPy.
+
+Mesmo resultado de `validate_cpf_cnpj` / `normalize_cpf_cnpj` (app/validators.py),
+mas sobre um array inteiro: os códigos dos caracteres viram uma matriz, os
+dígitos são compactados à esquerda de cada linha e os dígitos verificadores
+saem de um produto matricial contra os pesos.
+
+Linhas com caracteres fora do ASCII (ex.: dígitos arábicos, que `str.isdigit`
+aceita) vão para as funções escalares, para o resultado ser idêntico; se a
+função escalar levantar erro (ex.: "²", que é `isdigit` mas não `int`), a
+linha conta como inválida.
+"""
+from typing import Sequence
+import numpy as np
+from app.validators import validate_cpf_cnpj, normalize_cpf_cnpj
+
+_ZERO = ord("0")
+
+_CPF_W1 = np.arange(10, 1, -1)   # 10..2
+_CPF_W2 = np.arange(11, 1, -1)   # 11..2
+_CNPJ_W1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+_CNPJ_W2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+def _cpf_mask(d: np.ndarray) -> np.ndarray:
+    d1 = (d[:, :9] @ _CPF_W1 * 10) % 11
+    d1[d1 == 10] = 0
+    d2 = (d[:, :10] @ _CPF_W2 * 10) % 11
+    d2[d2 == 10] = 0
+    return (d1 == d[:, 9]) & (d2 == d[:, 10])
+
+def _cnpj_mask(d: np.ndarray) -> np.ndarray:
+    d1 = 11 - (d[:, :12] @ _CNPJ_W1) % 11
+    d1[d1 >= 10] = 0
+    d2 = 11 - (d[:, :13] @ _CNPJ_W2) % 11
+    d2[d2 >= 10] = 0
+    return (d1 == d[:, 12]) & (d2 == d[:, 13])
+
+def validate_cpf_cnpj_batch(values: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Valida um lote de documentos.
+
+    Retorna `(mask, normalized)`: `mask[i]` é `validate_cpf_cnpj(values[i])` e
+    `normalized[i]` é `normalize_cpf_cnpj(values[i])` (só dígitos).
+    """
+    text = np.asarray(values, dtype=str)
+    n = len(text)
+    if n == 0:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype="<U1")
+    width = max(text.dtype.itemsize // 4, 14)
+    # U<k> é UCS-4: cada linha vira k códigos uint32, com zeros à direita
+    codes = np.zeros((n, width), dtype=np.uint32)
+    k = text.dtype.itemsize // 4
+    if k:
+        codes[:, :k] = text.view(np.uint32).reshape(n, k)
+
+    is_digit = (codes >= _ZERO) & (codes <= _ZERO + 9)
+    # ordenação estável por "não é dígito": dígitos à esquerda, na ordem original
+    order = np.argsort(~is_digit, axis=1, kind="stable")
+    packed = np.take_along_axis(codes, order, axis=1)
+    count = is_digit.sum(axis=1)
+    packed[np.arange(width) >= count[:, None]] = 0
+    normalized = packed.view(f"<U{width}").reshape(n)
+
+    digits = packed[:, :14].astype(np.int64) - _ZERO
+    mask = np.zeros(n, dtype=bool)
+    for size, rule in ((11, _cpf_mask), (14, _cnpj_mask)):
+        rows = np.flatnonzero(count == size)
+        if rows.size:
+            d = digits[rows, :size]
+            repeated = (d == d[:, :1]).all(axis=1)
+            mask[rows] = rule(d) & ~repeated
+
+    # fora do ASCII: caminho escalar (o valor normalizado nunca é maior que o original)
+    for i in np.flatnonzero((codes > 127).any(axis=1)):
+        value = str(text[i])
+        normalized[i] = normalize_cpf_cnpj(value)
+        try:
+            mask[i] = validate_cpf_cnpj(value)
+        except ValueError:
+            mask[i] = False
+    return mask, normalized
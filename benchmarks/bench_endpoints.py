@@ -0,0 +1,371 @@
+# benchmarks/bench_endpoints.py
+"""
+Benchmark de todas as rotas da API e do dashboard, em bases de vários tamanhos.
+
+Para cada escala (número de fazendas) uma base SQLite é gerada uma vez com
+`scripts/seed_direct.py` (cache em `benchmarks/.fixtures/`) e copiada antes de
+rodar, para as rotas de escrita não alterarem a fixture. As requisições vão
+direto ao ASGI (httpx.ASGITransport), uma por vez, e para cada rota medimos:
+
+- latência p50/p95/p99 (ms);
+- consultas SQL por requisição (mediana);
+- pico de memória alocada em Python durante a requisição (tracemalloc, KiB).
+
+    python benchmarks/bench_endpoints.py --scales 1k,10k,100k --out bench-HEAD.json
+    python benchmarks/bench_endpoints.py --compare bench-main.json bench-HEAD.json
+
+Rotas do dashboard com cache aparecem duas vezes: `cold` limpa o cache antes
+de cada requisição (mede o cálculo) e `warm` mede o acerto de cache.
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+os.environ.setdefault("TESTING", "1")
+
+import httpx
+import sqlalchemy
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import models
+from app.cache import dashboard_cache
+from app.database import enable_sqlite_foreign_keys, get_async_db
+from app.main import app
+
+FIXTURES = ROOT / "benchmarks" / ".fixtures"
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# --------------------- Casos ---------------------
+
+@dataclass
+class Case:
+    name: str
+    method: str
+    path: str
+    params: dict | None = None
+    # monta kwargs extras da requisição a partir da iteração e do contexto da fixture
+    make: Callable[[int, dict], dict] | None = None
+    cold: bool = False      # limpa o cache do dashboard antes de cada requisição
+    n: int | None = None    # iterações (None = --n)
+    write: bool = False     # roda depois das leituras
+    route: str | None = None  # template da rota, quando difere de `path`
+
+    def request(self, i: int, ctx: dict) -> tuple[str, str, dict]:
+        kwargs = {"params": self.params} if self.params else {}
+        if self.make:
+            kwargs.update(self.make(i, ctx))
+        path = self.path.format(**{**ctx, **kwargs.pop("path", {})})
+        return self.method, path, kwargs
+
+def _cpf(i: int) -> str:
+    from seed_direct import cpf_for
+    return cpf_for(900_000_000 + i)  # longe dos ids da fixture
+
+def _farm(ctx: dict, i: int) -> dict:
+    return {"producer_id": ctx["producer_id"], "name": f"Bench {i}", "city": "Sorriso", "state": "MT",
+            "area_total": 100, "area_agricultable": 60, "area_vegetation": 40}
+
+def _ndjson(rows: list[dict]) -> bytes:
+    return "".join(json.dumps(r) + "\n" for r in rows).encode()
+
+def cases(ctx: dict) -> list[Case]:
+    return [
+        # dashboard
+        Case("index", "GET", "/"),
+        Case("dashboard_page", "GET", "/dashboard", cold=True),
+        Case("cache_stats", "GET", "/dashboard/cache/stats"),
+        *[
+            c for name, path, params in [
+                ("data_filters", "/dashboard/data/filters", None),
+                ("data_state", "/dashboard/data/state", None),
+                ("data_culture", "/dashboard/data/culture", None),
+                ("data_culture_filtered", "/dashboard/data/culture", {"state": "MG", "season_id": ctx["season_id"]}),
+                ("data_landuse", "/dashboard/data/landuse", {"state": "MG"}),
+                ("data_all", "/dashboard/data/all", {"state": "MG"}),
+                ("export_culture_csv", "/dashboard/export/culture.csv", None),
+                ("export_landuse_csv", "/dashboard/export/landuse.csv", None),
+            ]
+            for c in (Case(f"{name}[cold]", "GET", path, params, cold=True), Case(f"{name}[warm]", "GET", path, params))
+        ],
+        Case("export_farms_csv_mg", "GET", "/dashboard/export/farms.csv", {"state": "MG"}, n=5,
+             route="/dashboard/export/farms.{fmt}"),
+        Case("export_plantings_ndjson_gz_mg", "GET", "/dashboard/export/plantings.ndjson",
+             {"state": "MG", "season_id": ctx["season_id"], "gzip": "true"}, n=5,
+             route="/dashboard/export/plantings.{fmt}"),
+        Case("analytics_cube", "GET", "/api/analytics/cube",
+             {"dims": ["state", "culture"], "measures": ["planting_count"], "rollup": "true"}, n=10),
+        # leituras da API
+        Case("list_producers", "GET", "/api/producers", {"limit": 100}),
+        Case("list_producers_q", "GET", "/api/producers", {"q": "silva", "limit": 100}),
+        Case("search_producers", "GET", "/api/producers/search", {"q": "maria so", "limit": 20}),
+        Case("get_producer", "GET", "/api/producers/{producer_id}"),
+        Case("list_farms", "GET", "/api/farms", {"limit": 100}),
+        Case("list_farms_state", "GET", "/api/farms", {"state": "MG", "limit": 100}),
+        Case("list_farms_producer", "GET", "/api/farms", {"producer_id": ctx["producer_id"]}),
+        Case("list_farms_deep_page", "GET", "/api/farms", {"limit": 100, "after": ctx["farm_cursor"]}),
+        Case("list_seasons", "GET", "/api/seasons"),
+        Case("list_plantings", "GET", "/api/plantings", {"limit": 100}),
+        Case("list_plantings_season_culture", "GET", "/api/plantings",
+             {"season_id": ctx["season_id"], "culture": "Soja", "limit": 100}),
+        # escritas (cada iteração usa dados novos)
+        Case("create_producer", "POST", "/api/producers", write=True,
+             make=lambda i, c: {"json": {"cpf_cnpj": _cpf(i), "name": f"Bench {i}"}}),
+        Case("bulk_producers_100", "POST", "/api/producers/bulk", write=True, n=10,
+             make=lambda i, c: {"json": [{"cpf_cnpj": _cpf(10_000 + i * 100 + j), "name": "Bench"} for j in range(100)]}),
+        Case("update_producer", "PATCH", "/api/producers/{producer_id}", write=True,
+             make=lambda i, c: {"json": {"name": f"Renomeado {i}"}}),
+        Case("create_farm", "POST", "/api/farms", write=True, make=lambda i, c: {"json": _farm(c, i)}),
+        Case("upload_farms_1000", "POST", "/api/farms/upload", write=True, n=5,
+             make=lambda i, c: {"content": _ndjson([_farm(c, j) for j in range(1000)]),
+                                "headers": {"Content-Type": "application/x-ndjson"}}),
+        Case("update_farm_state", "PATCH", "/api/farms/{farm_id}", write=True,
+             make=lambda i, c: {"json": {"state": ("GO", "MG")[i % 2]}}),
+        Case("create_season", "POST", "/api/seasons", write=True, make=lambda i, c: {"json": {"name": f"Bench {i}"}}),
+        Case("create_planting", "POST", "/api/plantings", write=True,
+             make=lambda i, c: {"json": {"farm_id": c["bench_farms"][i], "season_id": c["season_id"],
+                                         "culture": "Bench"}}),
+        Case("bulk_plantings_100", "POST", "/api/plantings/bulk", write=True, n=10,
+             make=lambda i, c: {"json": [{"farm_id": f, "season_id": c["season_id"], "culture": f"Bulk {i}"}
+                                         for f in c["bench_farms"][:100]]}),
+        Case("delete_plantings_culture_100", "DELETE", "/api/plantings", write=True, n=10,
+             make=lambda i, c: {"params": {"season_id": c["season_id"], "culture": f"Bulk {i}"}}),
+        Case("delete_farms_producer", "DELETE", "/api/farms", write=True, n=10,
+             make=lambda i, c: {"params": {"producer_id": c["bench_producers"][i]}}),
+        Case("delete_planting", "DELETE", "/api/plantings/{planting_id}", write=True,
+             make=lambda i, c: {"path": {"planting_id": c["max_planting_id"] - i}}),
+        Case("delete_farm", "DELETE", "/api/farms/{farm_id}", write=True,
+             make=lambda i, c: {"path": {"farm_id": c["max_farm_id"] - i}}),
+        Case("delete_producer", "DELETE", "/api/producers/{producer_id}", write=True,
+             make=lambda i, c: {"path": {"producer_id": c["max_producer_id"] - i}}),
+    ]
+
+# --------------------- Fixtures ---------------------
+
+def fixture(scale: str, seed: int, workers: int) -> pathlib.Path:
+    path = FIXTURES / f"farms-{scale}-seed{seed}.db"
+    if not path.exists():
+        FIXTURES.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.unlink(missing_ok=True)
+        print(f"gerando fixture {path.name} …", file=sys.stderr)
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp}"}
+        subprocess.run([sys.executable, str(ROOT / "scripts" / "seed_direct.py"), "--farms", str(SCALES[scale]),
+                        "--seed", str(seed), "--workers", str(workers)], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        tmp.rename(path)
+    return path
+
+def context(engine) -> dict:
+    F, P, Pl, S = models.Farm, models.Producer, models.Planting, models.Season
+    with engine.connect() as conn:
+        farm_ids = conn.scalars(select(F.id).order_by(F.id)).all()
+        ctx = {
+            "producer_id": conn.scalar(select(func.min(P.id))),
+            "farm_id": farm_ids[0],
+            "season_id": conn.scalar(select(func.min(S.id))),
+            "max_producer_id": conn.scalar(select(func.max(P.id))),
+            "max_farm_id": farm_ids[-1],
+            "max_planting_id": conn.scalar(select(func.max(Pl.id))),
+        }
+    from app.pagination import encode_cursor
+    ctx["farm_cursor"] = encode_cursor(farm_ids[len(farm_ids) // 2])
+    # fazendas do meio da base, que as rotas de delete (pelo fim) não tocam
+    ctx["bench_farms"] = farm_ids[len(farm_ids) // 3:][:1000]
+    # produtores do meio, para a exclusão em massa de fazendas por produtor
+    ctx["bench_producers"] = list(range(ctx["max_producer_id"] // 2, ctx["max_producer_id"]))[:100]
+    return ctx
+
+# --------------------- Execução ---------------------
+
+async def run_case(client: httpx.AsyncClient, case: Case, ctx: dict, n: int, warmup: int,
+                   counter: list[int]) -> dict:
+    iterations = case.n or n
+    latencies, queries, status = [], [], set()
+    mem_iters = min(3, iterations)
+
+    async def one(i: int, measure_memory: bool = False) -> None:
+        method, path, kwargs = case.request(i, ctx)
+        if case.cold:
+            dashboard_cache.clear()
+        counter[0] = 0
+        t0 = time.perf_counter()
+        r = await client.request(method, path, **kwargs)
+        await r.aread()
+        elapsed = time.perf_counter() - t0
+        status.add(r.status_code)
+        if not measure_memory:
+            latencies.append(elapsed)
+            queries.append(counter[0])
+
+    # escritas não têm aquecimento: cada iteração consome um dado novo
+    if not case.write:
+        for i in range(warmup):
+            await one(i)
+        latencies.clear(); queries.clear()
+    for i in range(iterations):
+        await one(i)
+
+    tracemalloc.start()
+    peaks = []
+    for i in range(mem_iters):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        await one(iterations + i if case.write else i, measure_memory=True)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    ms = sorted(x * 1000 for x in latencies)
+    q = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else [ms[0]] * 99
+    return {
+        "n": len(ms),
+        "status": sorted(status),
+        "p50": round(q[49], 3), "p95": round(q[94], 3), "p99": round(q[98], 3),
+        "mean": round(statistics.fmean(ms), 3),
+        "queries": statistics.median(queries),
+        "peak_kib": round(max(peaks) / 1024, 1),
+    }
+
+async def run_scale(db_path: pathlib.Path, n: int, warmup: int, only: set[str] | None) -> dict:
+    work = pathlib.Path(tempfile.mkdtemp()) / "bench.db"
+    shutil.copy(db_path, work)
+    engine = create_engine(f"sqlite:///{work}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{work}")
+    # como nas engines da aplicação: os deletes contam com o ON DELETE CASCADE
+    enable_sqlite_foreign_keys(engine)
+    enable_sqlite_foreign_keys(async_engine.sync_engine)
+    SessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_db():
+        async with SessionLocal() as db:
+            yield db
+
+    counter = [0]
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def _count(*args, **kwargs):
+        counter[0] += 1
+
+    app.dependency_overrides[get_async_db] = get_db
+    ctx = context(engine)
+    selected = [c for c in cases(ctx) if not only or c.name in only]
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            # leituras primeiro, sobre a base intacta
+            for case in sorted(selected, key=lambda c: c.write):
+                results[case.name] = await run_case(client, case, ctx, n, warmup, counter)
+                r = results[case.name]
+                print(f"  {case.name:<34} p50 {r['p50']:9.2f}  p95 {r['p95']:9.2f}  p99 {r['p99']:9.2f} ms  "
+                      f"q {r['queries']:>4}  mem {r['peak_kib']:>9.1f} KiB  {r['status']}", file=sys.stderr)
+    finally:
+        app.dependency_overrides.pop(get_async_db, None)
+        dashboard_cache.clear()
+        await async_engine.dispose()
+        engine.dispose()
+        shutil.rmtree(work.parent, ignore_errors=True)
+    return results
+
+# rotas fora do benchmark de propósito (com o motivo)
+EXCLUDED = {
+    # stream sem fim (o ASGITransport espera o corpo inteiro); o custo por conexão é o
+    # snapshot, o mesmo cálculo de /dashboard/data/all, já medido frio e quente
+    ("GET", "/dashboard/events"),
+}
+
+def uncovered() -> list[str]:
+    """Rotas da API/dashboard sem nenhum caso no benchmark (fora as de EXCLUDED)."""
+    covered = {(c.method, c.route or c.path) for c in cases(defaultdict(int))} | EXCLUDED
+    out = []
+    for route in app.routes:
+        path = getattr(route, "path", "")
+        if not (path.startswith(("/api/", "/dashboard")) or path == "/"):
+            continue
+        out += [f"{m} {path}" for m in sorted(getattr(route, "methods", None) or ()) if (m, path) not in covered]
+    return out
+
+def git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(args):
+    for miss in uncovered():
+        print(f"⚠ rota sem caso no benchmark: {miss}", file=sys.stderr)
+    out = {
+        "meta": {
+            "commit": git_rev(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "n": args.n, "warmup": args.warmup, "seed": args.seed,
+        },
+        "results": {},
+    }
+    only = set(args.only.split(",")) if args.only else None
+    for scale in args.scales.split(","):
+        db_path = fixture(scale, args.seed, args.workers)
+        print(f"escala {scale} ({SCALES[scale]:,} fazendas)", file=sys.stderr)
+        out["results"][scale] = asyncio.run(run_scale(db_path, args.n, args.warmup, only))
+    pathlib.Path(args.out).write_text(json.dumps(out, indent=2, ensure_ascii=False))
+    print(f"✔ resultados em {args.out}")
+
+# --------------------- Comparação ---------------------
+
+def compare(old_path: str, new_path: str, threshold: float, min_ms: float) -> int:
+    old, new = (json.loads(pathlib.Path(p).read_text()) for p in (old_path, new_path))
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}  (p95, regressão se > {threshold:.2f}x)")
+    regressions = 0
+    for scale, cases_new in new["results"].items():
+        cases_old = old["results"].get(scale, {})
+        for name, r in cases_new.items():
+            o = cases_old.get(name)
+            if not o:
+                print(f"  {scale:>5} {name:<34} (novo)")
+                continue
+            ratio = r["p95"] / o["p95"] if o["p95"] else float("inf")
+            slower = ratio > threshold and r["p95"] - o["p95"] > min_ms
+            more_queries = r["queries"] > o["queries"]
+            flag = "  ⚠ REGRESSÃO" if slower or more_queries else ""
+            regressions += bool(flag)
+            print(f"  {scale:>5} {name:<34} {o['p95']:9.2f} -> {r['p95']:9.2f} ms ({ratio:5.2f}x)  "
+                  f"q {o['queries']} -> {r['queries']}  mem {o['peak_kib']} -> {r['peak_kib']} KiB{flag}")
+    print(f"\n{regressions} regressões")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark das rotas por escala de dados")
+    parser.add_argument("--scales", default="1k,10k", help=f"escalas separadas por vírgula ({', '.join(SCALES)})")
+    parser.add_argument("--n", type=int, default=50, help="requisições medidas por rota")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42, help="seed das fixtures")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos do gerador de fixtures")
+    parser.add_argument("--only", default=None, help="só estes casos (nomes separados por vírgula)")
+    parser.add_argument("--out", default="bench-results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="compara dois JSONs e sai")
+    parser.add_argument("--threshold", type=float, default=1.25, help="razão de p95 considerada regressão")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="diferença mínima de p95 (ms) para regressão")
+    args = parser.parse_args()
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold, args.min_ms))
+    main(args)
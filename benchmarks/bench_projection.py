@@ -0,0 +1,107 @@
+# benchmarks/bench_projection.py
+"""
+Custo por linha e memória de uma leitura grande de fazendas, por caminho:
+
+- orm:    `select(Farm)` -> objetos ORM (identity map) -> `list[FarmOut]`
+          com `from_attributes` -> json (como as rotas de leitura eram);
+- core:   `select(*colunas)` -> dicts -> orjson (app.projection);
+- fields: idem, só `id,name,state` (`?fields=name,state`).
+
+Roda em processo, na engine síncrona, sem HTTP: isola a materialização e a
+serialização das linhas. Tempo e pico de memória (tracemalloc) são medidos em
+rodadas separadas.
+
+    python benchmarks/bench_projection.py --rows 200000
+"""
+import argparse
+import gc
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{pathlib.Path(tempfile.mkdtemp()) / 'bench.db'}"
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app import migrations, models, schemas
+from app.database import engine
+from app.projection import table_columns
+
+FARMS_OUT = TypeAdapter(list[schemas.FarmOut])
+
+def seed(n: int):
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        have = conn.scalar(select(func.count(models.Farm.id)))
+        if have >= n:
+            return
+        producer_id = conn.execute(
+            insert(models.Producer).values(cpf_cnpj="52998224725", name="Bench").returning(models.Producer.id)
+        ).scalar_one()
+        conn.execute(insert(models.Farm), [
+            {"producer_id": producer_id, "name": f"Fazenda Boa Vista {i}", "city": "Uberlândia", "state": "MG",
+             "area_total": 100 + i % 37, "area_agricultable": 60.5, "area_vegetation": 39.25}
+            for i in range(have, n)
+        ])
+
+def orm_path(n: int) -> bytes:
+    with Session(engine) as db:
+        farms = db.scalars(select(models.Farm).order_by(models.Farm.id).limit(n)).all()
+        content = FARMS_OUT.dump_python(FARMS_OUT.validate_python(farms), mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+def core_path(n: int, columns: list) -> bytes:
+    with engine.connect() as conn:
+        rows = [dict(r) for r in conn.execute(select(*columns).order_by(models.Farm.id).limit(n)).mappings()]
+        return orjson.dumps(rows)
+
+def measure(fn, repeat: int) -> tuple[float, float, int]:
+    fn()  # aquecimento (cache de compilação, páginas do SQLite)
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(body)
+
+def main(rows: int, repeat: int):
+    seed(rows)
+    F = models.Farm
+    cases = [
+        ("orm", lambda: orm_path(rows)),
+        ("core", lambda: core_path(rows, table_columns(F))),
+        ("fields", lambda: core_path(rows, [F.id, F.name, F.state])),
+    ]
+    print(f"banco: {engine.url.render_as_string(hide_password=True)}  linhas={rows:,}  melhor de {repeat}")
+    print(f"{'caminho':<8} {'total':>9} {'µs/linha':>9} {'pico mem':>10} {'bytes':>12}")
+    base = None
+    for name, fn in cases:
+        seconds, peak, size = measure(fn, repeat)
+        base = base or (seconds, peak)
+        print(f"{name:<8} {seconds * 1000:7.0f}ms {seconds / rows * 1e6:9.2f} {peak / 2**20:8.1f}MB {size:>12,}"
+              f"   ({base[0] / seconds:.1f}x tempo, {base[1] / peak:.1f}x memória)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ORM + Pydantic vs colunas em dicts (custo por linha e memória)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
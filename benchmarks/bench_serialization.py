@@ -0,0 +1,117 @@
+# benchmarks/bench_serialization.py
+"""
+Bytes na rede e CPU por resposta das listagens grandes, antes e depois do
+caminho enxuto + compressão.
+
+- antes: rota com `response_model` sobre objetos ORM, `JSONResponse` (json da
+  stdlib), sem compressão — como `list_farms`/`list_plantings` eram;
+- depois: `GET /api/farms` / `GET /api/plantings` reais (colunas em dicts,
+  orjson), com `Accept-Encoding: identity`, `gzip` e `br` (se o pacote
+  `brotli` estiver instalado).
+
+As requisições vão direto ao ASGI (httpx.ASGITransport), uma por vez; a CPU é
+`time.process_time` do processo (inclui a thread do aiosqlite).
+
+    python benchmarks/bench_serialization.py --limit 1000 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{pathlib.Path(tempfile.mkdtemp()) / 'bench.db'}"
+
+import httpx
+from fastapi import Depends, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import compression, migrations, models, schemas
+from app.database import engine, get_async_db
+from app.main import app
+from app.pagination import Page
+
+@app.get("/_bench/before/farms", response_model=list[schemas.FarmOut], response_class=JSONResponse,
+         include_in_schema=False)
+async def before_farms(request: Request, response: Response, page: Page = Depends(),
+                       db: AsyncSession = Depends(get_async_db)):
+    rows = list(await db.scalars(page.apply(select(models.Farm), models.Farm.id)))
+    return page.finish(rows, request, response)
+
+@app.get("/_bench/before/plantings", response_model=list[schemas.PlantingOut], response_class=JSONResponse,
+         include_in_schema=False)
+async def before_plantings(request: Request, response: Response, page: Page = Depends(),
+                           db: AsyncSession = Depends(get_async_db)):
+    rows = list(await db.scalars(page.apply(select(models.Planting), models.Planting.id)))
+    return page.finish(rows, request, response)
+
+def seed(n: int):
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        if not n or conn.scalar(select(func.count(models.Farm.id))):
+            return
+        producer_id = conn.execute(
+            insert(models.Producer).values(cpf_cnpj="52998224725", name="Bench").returning(models.Producer.id)
+        ).scalar_one()
+        conn.execute(insert(models.Farm), [
+            {"producer_id": producer_id, "name": f"Fazenda Boa Vista {i}", "city": "Uberlândia", "state": "MG",
+             "area_total": 100 + i % 37, "area_agricultable": 60.5, "area_vegetation": 39.25}
+            for i in range(n)
+        ])
+        season_id = conn.execute(insert(models.Season).values(name="Safra 2024").returning(models.Season.id)).scalar_one()
+        farm_ids = conn.scalars(select(models.Farm.id)).all()
+        conn.execute(insert(models.Planting), [
+            {"farm_id": fid, "season_id": season_id, "culture": culture}
+            for fid in farm_ids for culture in ("Soja", "Milho")
+        ])
+
+async def measure(client: httpx.AsyncClient, url: str, encoding: str, n: int) -> dict:
+    headers = {"Accept-Encoding": encoding}
+    wire = 0
+    for _ in range(min(20, n)):  # aquecimento
+        await client.get(url, headers=headers)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(n):
+        r = await client.get(url, headers=headers)
+        r.raise_for_status()
+        wire = r.num_bytes_downloaded
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    return {"bytes": wire, "cpu_ms": cpu / n * 1000, "wall_ms": wall / n * 1000,
+            "encoding": r.headers.get("content-encoding", "identity")}
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bytes e CPU por resposta das listagens grandes")
+    parser.add_argument("--farms", type=int, default=2000, help="fazendas inseridas (se o banco estiver vazio)")
+    parser.add_argument("--limit", type=int, default=1000, help="itens por página pedidos")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    seed(args.farms)
+    print(f"banco: {engine.url.render_as_string(hide_password=True)}  limit={args.limit} "
+          f"requests={args.requests}  brotli={'sim' if compression.brotli else 'não instalado'}")
+    encodings = ["identity", "gzip"] + (["br"] if compression.brotli else [])
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in ("farms", "plantings"):
+            cases = [("antes", f"/_bench/before/{name}", "identity")]
+            cases += [("depois", f"/api/{name}", enc) for enc in encodings]
+            print(f"\n{name} (?limit={args.limit})")
+            print(f"{'':8} {'encoding':<9} {'bytes':>10} {'CPU/resp':>10} {'tempo/resp':>11}")
+            base = None
+            for label, path, enc in cases:
+                r = await measure(client, f"{path}?limit={args.limit}", enc, args.requests)
+                base = base or r
+                print(f"{label:<8} {r['encoding']:<9} {r['bytes']:>10,} {r['cpu_ms']:>8.2f}ms {r['wall_ms']:>9.2f}ms"
+                      f"   ({base['bytes'] / r['bytes']:.1f}x menos bytes, {base['cpu_ms'] / r['cpu_ms']:.1f}x CPU)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
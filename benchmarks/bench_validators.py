@@ -0,0 +1,60 @@
+# benchmarks/bench_validators.py
+"""
+Validação escalar (`validate_cpf_cnpj` + `normalize_cpf_cnpj`, uma string por
+vez) vs lote NumPy (`validate_cpf_cnpj_batch`), sobre os mesmos documentos.
+
+    python benchmarks/bench_validators.py --n 1000000
+"""
+import argparse
+import pathlib
+import random
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from app.validators import validate_cpf_cnpj, normalize_cpf_cnpj
+from app.validators_batch import validate_cpf_cnpj_batch
+from seed_producers import gen_valid_cpf
+
+def sample(n: int, seed: int) -> list[str]:
+    # metade CPFs válidos (metade deles formatados), metade ruído com 11/14 dígitos
+    random.seed(seed)
+    out = []
+    for i in range(n):
+        if i % 2:
+            out.append("".join(random.choice("0123456789") for _ in range(random.choice((11, 14)))))
+        else:
+            cpf = gen_valid_cpf()
+            out.append(f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}" if i % 4 else cpf)
+    return out
+
+def main(n: int, chunk: int, seed: int):
+    values = sample(n, seed)
+
+    t0 = time.perf_counter()
+    scalar = [(validate_cpf_cnpj(v), normalize_cpf_cnpj(v)) for v in values]
+    t_scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = []
+    for i in range(0, n, chunk):
+        mask, normalized = validate_cpf_cnpj_batch(values[i:i + chunk])
+        batch.extend(zip(mask.tolist(), normalized.tolist()))
+    t_batch = time.perf_counter() - t0
+
+    assert batch == scalar, "lote e escalar divergem"
+    print(f"{n:,} documentos ({sum(ok for ok, _ in scalar):,} válidos)")
+    print(f"escalar  {t_scalar:7.2f}s  {n / t_scalar:12,.0f}/s")
+    print(f"numpy    {t_batch:7.2f}s  {n / t_batch:12,.0f}/s  ({t_scalar / t_batch:.1f}x)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da validação de CPF/CNPJ em lote")
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--chunk", type=int, default=100_000, help="tamanho do lote")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args.n, args.chunk, args.seed)
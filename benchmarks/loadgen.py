@@ -0,0 +1,349 @@
+# benchmarks/loadgen.py
+"""
+Gerador de carga com mix de rotas ponderado contra uma instância rodando
+(`uvicorn app.main:app`), sem nada externo além do httpx.
+
+Chegadas em malha aberta: os inícios das requisições seguem um processo de
+Poisson com a taxa da fase, independente de quanto o servidor demora. Se já
+houver `--concurrency` requisições em voo, a chegada é descartada e contada
+como `dropped` (não fica esperando, o que esconderia a fila). A latência é
+medida a partir do horário agendado da chegada.
+
+    uvicorn app.main:app --port 8000 &
+    python benchmarks/loadgen.py --url http://localhost:8000 --rate 100 --duration 60
+    python benchmarks/loadgen.py --scenario safra --concurrency 200 --json out.json
+    python benchmarks/loadgen.py --scenario meu_cenario.json
+
+Cenário (JSON): rotas com peso e fases com taxa/duração; uma fase pode trocar
+os pesos (ex.: rajada de escritas na safra). Placeholders nos paths, params e
+corpos são preenchidos a cada requisição: {producer_id}, {farm_id},
+{season_id}, {state}, {culture}, {cpf}, {n}.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import pathlib
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from seed_farms import UFS
+from seed_producers import gen_valid_cpf
+from seed_seasons_plantings import CULTURES
+
+# --------------------- Cenários ---------------------
+
+_READS = [
+    {"name": "data_all", "weight": 30, "method": "GET", "path": "/dashboard/data/all",
+     "params": {"state": "{state}", "season_id": "{season_id}"}},
+    {"name": "data_culture", "weight": 10, "method": "GET", "path": "/dashboard/data/culture",
+     "params": {"state": "{state}"}},
+    {"name": "dashboard_page", "weight": 5, "method": "GET", "path": "/dashboard"},
+    {"name": "list_farms_state", "weight": 20, "method": "GET", "path": "/api/farms",
+     "params": {"state": "{state}", "limit": 100}},
+    {"name": "list_plantings", "weight": 10, "method": "GET", "path": "/api/plantings",
+     "params": {"season_id": "{season_id}", "culture": "{culture}", "limit": 100}},
+    {"name": "list_producers", "weight": 10, "method": "GET", "path": "/api/producers", "params": {"limit": 100}},
+    {"name": "search_producers", "weight": 5, "method": "GET", "path": "/api/producers/search",
+     "params": {"q": "silva", "limit": 20}},
+]
+_WRITES = [
+    {"name": "create_farm", "weight": 3, "method": "POST", "path": "/api/farms",
+     "json": {"producer_id": "{producer_id}", "name": "Carga {n}", "city": "Sorriso", "state": "{state}",
+              "area_total": 100, "area_agricultable": 60, "area_vegetation": 30}},
+    {"name": "create_planting", "weight": 5, "method": "POST", "path": "/api/plantings",
+     "json": {"farm_id": "{farm_id}", "season_id": "{season_id}", "culture": "{culture}"}},
+    {"name": "create_producer", "weight": 1, "method": "POST", "path": "/api/producers",
+     "json": {"cpf_cnpj": "{cpf}", "name": "Carga {n}"}},
+]
+
+SCENARIOS = {
+    # tráfego do dia a dia: quase só leitura
+    "default": {"endpoints": _READS + _WRITES, "phases": [{"duration": 60, "rate": 50}]},
+    # safra: leitura constante e uma rajada de escritas no meio
+    "safra": {
+        "endpoints": _READS + _WRITES,
+        "phases": [
+            {"name": "normal", "duration": 30, "rate": 50},
+            {"name": "safra", "duration": 30, "rate": 150,
+             "weights": {"create_farm": 40, "create_planting": 80, "create_producer": 10}},
+            {"name": "normal", "duration": 30, "rate": 50},
+        ],
+    },
+}
+
+def load_scenario(name: str) -> dict:
+    if name in SCENARIOS:
+        return SCENARIOS[name]
+    return json.loads(pathlib.Path(name).read_text())
+
+# --------------------- Placeholders ---------------------
+
+class Filler:
+    """Preenche os placeholders com ids reais lidos da instância no início."""
+
+    def __init__(self, ctx: dict, seed: int | None):
+        self.ctx = ctx
+        self.rng = random.Random(seed)
+        self.n = 0
+
+    def values(self) -> dict:
+        self.n += 1
+        c, rng = self.ctx, self.rng
+        return {
+            "producer_id": rng.choice(c["producer_ids"]) if c["producer_ids"] else 0,
+            "farm_id": rng.choice(c["farm_ids"]) if c["farm_ids"] else 0,
+            "season_id": rng.choice(c["season_ids"]) if c["season_ids"] else 0,
+            "state": rng.choice(c["states"] or UFS),
+            "culture": rng.choice(CULTURES),
+            "cpf": gen_valid_cpf(),
+            "n": self.n,
+        }
+
+    def fill(self, value, values: dict):
+        if isinstance(value, str):
+            # placeholder sozinho mantém o tipo (ids continuam inteiros no JSON)
+            if value.startswith("{") and value.endswith("}") and value[1:-1] in values:
+                return values[value[1:-1]]
+            return value.format(**values)
+        if isinstance(value, dict):
+            return {k: self.fill(v, values) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.fill(v, values) for v in value]
+        return value
+
+async def discover(client: httpx.AsyncClient, sample: int) -> dict:
+    async def ids(path: str) -> list[int]:
+        r = await client.get(path, params={"limit": sample})
+        r.raise_for_status()
+        return [x["id"] for x in r.json()]
+
+    producer_ids, farm_ids, season_ids = await asyncio.gather(
+        ids("/api/producers"), ids("/api/farms"), ids("/api/seasons"))
+    r = await client.get("/dashboard/data/filters")
+    r.raise_for_status()
+    return {"producer_ids": producer_ids, "farm_ids": farm_ids, "season_ids": season_ids,
+            "states": r.json()["states"]}
+
+# --------------------- Histograma ---------------------
+
+# buckets logarítmicos de 0,1 ms a ~100 s, ~5% de resolução
+_BOUNDS = [0.1 * 1.05 ** i for i in range(int(math.log(1e6) / math.log(1.05)) + 1)]
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS) + 1)
+        self.total = 0
+        self.max = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(_BOUNDS, ms)] += 1
+        self.total += 1
+        self.max = max(self.max, ms)
+
+    def merge(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        if not self.total:
+            return 0.0
+        target = q * self.total
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(_BOUNDS[min(i, len(_BOUNDS) - 1)], self.max)
+        return self.max
+
+    def ascii(self, width: int = 40) -> list[str]:
+        """Histograma agrupado por décadas (0,1-1 ms, 1-10 ms, ...), para o relatório final."""
+        decades = defaultdict(int)
+        for i, n in enumerate(self.counts):
+            if n:
+                decades[math.floor(math.log10(_BOUNDS[min(i, len(_BOUNDS) - 1)]))] += n
+        peak = max(decades.values(), default=1)
+        return [f"    {10 ** d:>8g}–{10 ** (d + 1):<8g} ms {'█' * max(1, round(width * n / peak)):<{width}} {n}"
+                for d, n in sorted(decades.items())]
+
+class Stats:
+    def __init__(self):
+        self.hist = Histogram()
+        self.ok = self.client_errors = self.server_errors = self.exceptions = self.dropped = 0
+
+    def merge(self, other: "Stats"):
+        self.hist.merge(other.hist)
+        for k in ("ok", "client_errors", "server_errors", "exceptions", "dropped"):
+            setattr(self, k, getattr(self, k) + getattr(other, k))
+
+    @property
+    def errors(self) -> int:
+        return self.client_errors + self.server_errors + self.exceptions
+
+    def row(self, name: str, seconds: float) -> dict:
+        done = self.hist.total
+        return {
+            "endpoint": name, "requests": done, "rps": round(done / seconds, 2) if seconds else 0.0,
+            "p50": round(self.hist.quantile(0.50), 2), "p95": round(self.hist.quantile(0.95), 2),
+            "p99": round(self.hist.quantile(0.99), 2), "max": round(self.hist.max, 2),
+            "4xx": self.client_errors, "5xx": self.server_errors, "exceptions": self.exceptions,
+            "error_rate": round(self.errors / done, 4) if done else 0.0, "dropped": self.dropped,
+        }
+
+# --------------------- Execução ---------------------
+
+class LoadGen:
+    def __init__(self, client: httpx.AsyncClient, scenario: dict, filler: Filler, concurrency: int,
+                 interval: float, seed: int | None, rate_scale: float):
+        self.client = client
+        self.endpoints = {e["name"]: e for e in scenario["endpoints"]}
+        self.phases = scenario["phases"]
+        self.filler = filler
+        self.concurrency = concurrency
+        self.interval = interval
+        self.rng = random.Random(seed)
+        self.rate_scale = rate_scale
+        self.in_flight = 0
+        self.window: dict[str, Stats] = defaultdict(Stats)
+        self.total: dict[str, Stats] = defaultdict(Stats)
+        self.timeline: list[dict] = []
+        self.tasks: set[asyncio.Task] = set()
+
+    async def fire(self, name: str, scheduled: float):
+        e = self.endpoints[name]
+        values = self.filler.values()
+        kwargs = {k: self.filler.fill(e[k], values) for k in ("params", "json") if k in e}
+        self.in_flight += 1
+        outcome = "exceptions"
+        try:
+            r = await self.client.request(e.get("method", "GET"), self.filler.fill(e["path"], values), **kwargs)
+            await r.aread()
+            if r.status_code >= 500:
+                outcome = "server_errors"
+            elif r.status_code >= 400:
+                outcome = "client_errors"
+            else:
+                outcome = "ok"
+        except httpx.HTTPError:
+            pass
+        finally:
+            self.in_flight -= 1
+            # janela do momento em que a resposta chega: um flush no meio não perde a requisição
+            stats = self.window[name]
+            setattr(stats, outcome, getattr(stats, outcome) + 1)
+            # desde o horário agendado: inclui a espera do lado do cliente
+            stats.hist.record((time.perf_counter() - scheduled) * 1000)
+
+    def flush(self, phase: str, elapsed: float):
+        rows = [s.row(n, self.interval) for n, s in sorted(self.window.items())]
+        for n, s in self.window.items():
+            self.total[n].merge(s)
+        self.window = defaultdict(Stats)
+        self.timeline.append({"t": round(elapsed, 1), "phase": phase, "in_flight": self.in_flight, "endpoints": rows})
+        done = sum(r["requests"] for r in rows)
+        errors = sum(r["4xx"] + r["5xx"] + r["exceptions"] for r in rows)
+        dropped = sum(r["dropped"] for r in rows)
+        worst = max(rows, key=lambda r: r["p95"], default=None)
+        print(f"[{elapsed:6.1f}s {phase:<8}] {done / self.interval:7.1f} req/s  erros {errors:<5} "
+              f"descartadas {dropped:<5} em voo {self.in_flight:<4}"
+              + (f" pior p95: {worst['endpoint']} {worst['p95']:.1f} ms" if worst else ""), file=sys.stderr)
+
+    async def run(self):
+        start = time.perf_counter()
+        next_flush = start + self.interval
+        phase_start = start
+        for i, phase in enumerate(self.phases):
+            name = phase.get("name", f"fase{i + 1}")
+            rate = phase["rate"] * self.rate_scale
+            weights = {n: phase.get("weights", {}).get(n, e.get("weight", 1)) for n, e in self.endpoints.items()}
+            names, cum = list(weights), []
+            for w in weights.values():
+                cum.append((cum[-1] if cum else 0) + w)
+            phase_end = phase_start + phase["duration"]
+            t = phase_start
+            while True:
+                t += self.rng.expovariate(rate)  # Poisson: intervalos exponenciais
+                if t >= phase_end:
+                    break
+                while next_flush <= t:
+                    await asyncio.sleep(max(0.0, next_flush - time.perf_counter()))
+                    self.flush(name, next_flush - start)
+                    next_flush += self.interval
+                delay = t - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                pick = names[bisect.bisect_right(cum, self.rng.random() * cum[-1])]
+                if self.in_flight >= self.concurrency:
+                    self.window[pick].dropped += 1
+                    continue
+                task = asyncio.create_task(self.fire(pick, t))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            phase_start = phase_end
+        if self.tasks:
+            await asyncio.wait(self.tasks)
+        self.flush("fim", time.perf_counter() - start)
+        return time.perf_counter() - start
+
+def report(gen: LoadGen, seconds: float) -> dict:
+    total = Stats()
+    rows = []
+    for name, s in sorted(gen.total.items()):
+        rows.append(s.row(name, seconds))
+        total.merge(s)
+    print(f"\n{'endpoint':<20} {'req':>7} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} "
+          f"{'4xx':>5} {'5xx':>5} {'exc':>4} {'drop':>5}")
+    for r in rows + [total.row("TOTAL", seconds)]:
+        print(f"{r['endpoint']:<20} {r['requests']:>7} {r['rps']:>7.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} "
+              f"{r['p99']:>8.1f} {r['max']:>8.1f} {r['4xx']:>5} {r['5xx']:>5} {r['exceptions']:>4} {r['dropped']:>5}")
+    print("\nlatência (todas as rotas, ms):")
+    print("\n".join(total.hist.ascii()))
+    return {"seconds": round(seconds, 2), "endpoints": rows, "total": total.row("TOTAL", seconds),
+            "timeline": gen.timeline}
+
+async def main(args):
+    scenario = load_scenario(args.scenario)
+    if args.rate is not None or args.duration is not None:
+        # --rate/--duration substituem as fases por uma fase única
+        phase = dict(scenario["phases"][0])
+        phase.update({k: v for k, v in (("rate", args.rate), ("duration", args.duration)) if v is not None})
+        scenario = {**scenario, "phases": [phase]}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url.rstrip("/"), limits=limits, timeout=args.timeout) as client:
+        ctx = await discover(client, args.sample)
+        print(f"alvo {args.url}: {len(ctx['producer_ids'])} produtores, {len(ctx['farm_ids'])} fazendas, "
+              f"{len(ctx['season_ids'])} safras na amostra", file=sys.stderr)
+        gen = LoadGen(client, scenario, Filler(ctx, args.seed), args.concurrency, args.interval, args.seed,
+                      args.rate_scale)
+        seconds = await gen.run()
+    result = report(gen, seconds)
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps({"scenario": scenario, **result}, indent=2, ensure_ascii=False))
+        print(f"✔ série temporal e totais em {args.json}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga mista em malha aberta contra uma instância da API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--scenario", default="default", help=f"{', '.join(SCENARIOS)} ou caminho de um JSON")
+    parser.add_argument("--rate", type=float, default=None, help="chegadas/s (fase única; substitui o cenário)")
+    parser.add_argument("--duration", type=float, default=None, help="segundos (fase única; substitui o cenário)")
+    parser.add_argument("--rate-scale", type=float, default=1.0, help="multiplica a taxa de todas as fases")
+    parser.add_argument("--concurrency", type=int, default=100, help="máximo de requisições em voo")
+    parser.add_argument("--interval", type=float, default=5.0, help="janela do relatório periódico (s)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--sample", type=int, default=1000, help="ids lidos da instância para os placeholders")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", default=None, help="grava totais e série temporal em JSON")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,129 @@
+# scripts/seed_common.py
+"""
+Infra comum dos seeds: um `httpx.AsyncClient` compartilhado (keep-alive),
+limite de concorrência, retry com backoff e medição de throughput.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from typing import Any, Awaitable, Callable, Iterable, Iterator, List, Dict
+
+import httpx
+
+DEFAULT_BASE_URL = os.getenv("SEED_BASE_URL", "http://localhost:8000")
+
+# 429/503: o servidor recusou sem processar, sempre pode repetir.
+# 502/504 e erros de leitura: pode ter sido processado, só repete se for idempotente.
+_RETRY_ALWAYS = {429, 503}
+_RETRY_IDEMPOTENT = {502, 504}
+
+def add_common_args(parser: argparse.ArgumentParser, batch_size: int = 1000):
+    parser.add_argument("--base-url", type=str, default=DEFAULT_BASE_URL,
+                        help="URL base da API (default: http://localhost:8000)")
+    parser.add_argument("--concurrency", type=int, default=32, help="requisições simultâneas (default: 32)")
+    parser.add_argument("--retries", type=int, default=4, help="tentativas extras em erro transitório (default: 4)")
+    parser.add_argument("--bulk", action="store_true", help="usa os endpoints de carga em massa")
+    parser.add_argument("--batch-size", type=int, default=batch_size,
+                        help=f"itens por requisição no modo --bulk (default: {batch_size})")
+
+def make_client(base_url: str, concurrency: int) -> httpx.AsyncClient:
+    # uma conexão por slot de concorrência, todas reaproveitadas
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    return httpx.AsyncClient(base_url=base_url.rstrip("/"), limits=limits, timeout=httpx.Timeout(60.0, connect=10.0))
+
+async def send(client: httpx.AsyncClient, method: str, url: str, *, retries: int = 4, idempotent: bool = True,
+               **kwargs) -> httpx.Response:
+    """Requisição com retry (backoff exponencial com jitter) em falhas transitórias."""
+    for attempt in range(retries + 1):
+        last = attempt == retries
+        r = None
+        try:
+            r = await client.request(method, url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+            if last:
+                raise
+        except (httpx.ReadError, httpx.ReadTimeout, httpx.RemoteProtocolError):
+            if last or not idempotent:
+                raise
+        else:
+            retry = r.status_code in _RETRY_ALWAYS or (idempotent and r.status_code in _RETRY_IDEMPOTENT)
+            if not retry or last:
+                return r
+        delay = min(10.0, 0.2 * 2 ** attempt) * random.uniform(0.5, 1.5)
+        await asyncio.sleep(max(delay, _retry_after(r)))
+    raise AssertionError("inalcançável")
+
+def _retry_after(r: httpx.Response | None) -> float:
+    try:
+        return float(r.headers["Retry-After"]) if r is not None else 0.0
+    except (KeyError, ValueError):
+        return 0.0
+
+async def run_pool(items: Iterable, worker: Callable[[Any], Awaitable[None]], concurrency: int,
+                   progress: "Throughput"):
+    """Roda `worker` sobre `items` com no máximo `concurrency` em voo (sem criar uma task por item)."""
+    it = iter(items)
+
+    async def loop():
+        for item in it:  # o iterador é compartilhado: cada item vai para um só loop
+            try:
+                await worker(item)
+            except httpx.HTTPError as e:
+                # esgotou as tentativas: conta a falha e segue com o resto
+                print(f"⚠ falha de rede: {e!r}", file=sys.stderr)
+                progress.add(failed=len(item) if isinstance(item, list) else 1)
+
+    await asyncio.gather(*(loop() for _ in range(concurrency)))
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    batch: list = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def fetch_all(client: httpx.AsyncClient, path: str, retries: int = 4) -> List[Dict]:
+    # percorre todas as páginas (cursor em X-Next-Cursor)
+    items: List[Dict] = []
+    params: Dict = {"limit": 1000}
+    while True:
+        r = await send(client, "GET", path, params=params, retries=retries)
+        r.raise_for_status()
+        items += r.json()
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return items
+        params["after"] = cursor
+
+class Throughput:
+    """Contadores com progresso periódico no stderr e um resumo no fim."""
+
+    def __init__(self, label: str, every: float = 2.0):
+        self.label = label
+        self.every = every
+        self.ok = self.failed = 0
+        self.start = self._last = time.perf_counter()
+
+    def add(self, ok: int = 0, failed: int = 0):
+        self.ok += ok
+        self.failed += failed
+        now = time.perf_counter()
+        if now - self._last >= self.every:
+            self._last = now
+            print(f"… {self.ok:,} {self.label} ({self.rate:,.0f}/s)", file=sys.stderr)
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.start
+        return self.ok / elapsed if elapsed else 0.0
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        return (f"{self.ok:,} {self.label} em {elapsed:.1f}s ({self.rate:,.0f}/s)"
+                + (f", {self.failed:,} falhas" if self.failed else ""))
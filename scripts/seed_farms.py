@@ -1,12 +1,14 @@
 # scripts/seed_farms.py
 import argparse
-import os
+import asyncio
+import json
 import random
-from typing import List, Dict
+from typing import Dict, Iterator
 
-import httpx
 from faker import Faker
 
+from seed_common import Throughput, add_common_args, batched, fetch_all, make_client, run_pool, send
+
 fake = Faker("pt_BR")
 
 UFS = [
@@ -39,62 +41,75 @@ def random_farm_name() -> str:
     adjs = ["Azul", "Verde", "Boa Vista", "Santa Clara", "São José", "Nova Esperança", "Primavera", "Pitangueira"]
     return f"{base} {random.choice(adjs)}"
 
-def fetch_producers(base_url: str) -> List[Dict]:
-    url = base_url.rstrip("/") + "/api/producers"
-    with httpx.Client(timeout=10.0) as client:
-        r = client.get(url)
-        r.raise_for_status()
-        return r.json()
-
-def create_farm(base_url: str, payload: Dict) -> Dict | None:
-    url = base_url.rstrip("/") + "/api/farms"
-    with httpx.Client(timeout=10.0) as client:
-        r = client.post(url, json=payload)
-        if r.status_code == 201:
-            return r.json()
-        print(f"⚠ erro ao criar fazenda: {r.status_code} {r.text}")
-        return None
-
-def main(per_producer: int, base_url: str, seed: int | None):
-    if seed is not None:
-        random.seed(seed)
-
-    producers = fetch_producers(base_url)
-    if not producers:
-        print("⚠ Nenhum produtor encontrado. Crie produtores primeiro (seed_producers.py).")
-        return
-
-    total_created = 0
+def gen_farms(producers: list[Dict], per_producer: int) -> Iterator[Dict]:
     for p in producers:
-        pid = p["id"]
         for i in range(per_producer):
             total, agri, veg = gen_areas()
-            city = fake.city()
-            state = random.choice(UFS)
-            name = f"{random_farm_name()} {i+1}"
-
-            payload = {
-                "producer_id": pid,
-                "name": name,
-                "city": city,
-                "state": state,
+            yield {
+                "producer_id": p["id"],
+                "name": f"{random_farm_name()} {i+1}",
+                "city": fake.city(),
+                "state": random.choice(UFS),
                 "area_total": total,
                 "area_agricultable": agri,
                 "area_vegetation": veg,
             }
-            created = create_farm(base_url, payload)
-            if created:
-                print(f"✔ Produtor {pid} -> Fazenda {created['id']} ({city}/{state}) "
-                      f"[total={total} agri={agri} veg={veg}]")
-                total_created += 1
 
-    print(f"\nResumo: {total_created} fazendas criadas (per_producer={per_producer}, produtores={len(producers)}).")
+async def create_farm(client, payload: Dict, retries: int, progress: Throughput):
+    # POST simples não é idempotente: só repete se a requisição nem chegou ao servidor
+    r = await send(client, "POST", "/api/farms", json=payload, retries=retries, idempotent=False)
+    if r.status_code == 201:
+        progress.add(ok=1)
+    else:
+        print(f"⚠ erro ao criar fazenda: {r.status_code} {r.text}")
+        progress.add(failed=1)
+
+# limite de `batch_size` em /api/farms/upload; requisições maiores são gravadas em vários lotes
+UPLOAD_BATCH_MAX = 10_000
+
+async def upload_farms(client, batch: list[Dict], retries: int, progress: Throughput):
+    body = "".join(json.dumps(f, ensure_ascii=False) + "\n" for f in batch).encode("utf-8")
+    r = await send(client, "POST", "/api/farms/upload", content=body, retries=retries, idempotent=False,
+                   params={"batch_size": min(len(batch), UPLOAD_BATCH_MAX)},
+                   headers={"Content-Type": "application/x-ndjson"})
+    if r.status_code != 200:
+        print(f"⚠ erro no upload: {r.status_code} {r.text[:200]}")
+        progress.add(failed=len(batch))
+        return
+    # NDJSON: linhas rejeitadas e, por último, o resumo
+    lines = r.text.splitlines()
+    for line in lines[:-1][:5]:
+        print(f"⚠ rejeitada: {line}")
+    summary = json.loads(lines[-1])["summary"]
+    progress.add(ok=summary["created"], failed=summary["rejected"])
+
+async def main(per_producer: int, base_url: str, seed: int | None, concurrency: int, retries: int,
+               bulk: bool, batch_size: int):
+    if seed is not None:
+        random.seed(seed)
+        fake.seed_instance(seed)
+
+    async with make_client(base_url, concurrency) as client:
+        producers = await fetch_all(client, "/api/producers", retries)
+        if not producers:
+            print("⚠ Nenhum produtor encontrado. Crie produtores primeiro (seed_producers.py).")
+            return
+
+        progress = Throughput("fazendas")
+        farms = gen_farms(producers, per_producer)
+        if bulk:
+            await run_pool(batched(farms, batch_size),
+                           lambda b: upload_farms(client, b, retries, progress), concurrency, progress)
+        else:
+            await run_pool(farms, lambda f: create_farm(client, f, retries, progress), concurrency, progress)
+
+    print(f"\nResumo: {progress.summary()} (per_producer={per_producer}, produtores={len(producers)}).")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Seed de fazendas por produtor via API")
     parser.add_argument("--per-producer", type=int, default=2, help="quantidade de fazendas por produtor (default: 2)")
-    parser.add_argument("--base-url", type=str, default=os.getenv("SEED_BASE_URL", "http://localhost:8000"),
-                        help="URL base da API (default: http://localhost:8000)")
     parser.add_argument("--seed", type=int, default=None, help="seed para repetibilidade (opcional)")
+    add_common_args(parser)
     args = parser.parse_args()
-    main(args.per_producer, args.base_url, args.seed)
+    asyncio.run(main(args.per_producer, args.base_url, args.seed, args.concurrency, args.retries,
+                     args.bulk, args.batch_size))
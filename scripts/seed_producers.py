@@ -1,15 +1,15 @@
 # scripts/seed_producers.py
 import argparse
-import os
+import asyncio
 import random
-import httpx
 from faker import Faker
 
+from seed_common import Throughput, add_common_args, batched, make_client, run_pool, send
+
 fake = Faker("pt_BR")
 
-def gen_valid_cpf() -> str:
-    # Gera CPF válido (só dígitos)
-    nums = [random.randint(0, 9) for _ in range(9)]
+def cpf_from_base(nums: list[int]) -> str:
+    """CPF (só dígitos) a partir dos 9 primeiros dígitos, com os verificadores calculados."""
     # 1º dígito
     s = sum(nums[i] * (10 - i) for i in range(9))
     d1 = (s * 10) % 11
@@ -19,46 +19,59 @@ def gen_valid_cpf() -> str:
     s = sum(nums10[i] * (11 - i) for i in range(10))
     d2 = (s * 10) % 11
     d2 = 0 if d2 == 10 else d2
-    cpf = "".join(str(d) for d in nums + [d1, d2])
+    return "".join(str(d) for d in nums + [d1, d2])
+
+def gen_valid_cpf() -> str:
+    # Gera CPF válido (só dígitos)
+    cpf = cpf_from_base([random.randint(0, 9) for _ in range(9)])
     # Evitar CPFs com todos dígitos iguais (não geramos, mas por segurança)
     if len(set(cpf)) == 1:
         return gen_valid_cpf()
     return cpf
 
-def main(n: int, base_url: str):
-    url = base_url.rstrip("/") + "/api/producers"
-    created = 0
-    with httpx.Client(timeout=10.0) as client:
-        for _ in range(n):
-            cpf = gen_valid_cpf()
-            name = fake.name()
-            r = client.post(url, json={"cpf_cnpj": cpf, "name": name})
-            if r.status_code == 201:
-                data = r.json()
-                print(f"✔ criado: id={data['id']} cpf={data['cpf_cnpj']} name={data['name']}")
-                created += 1
-            elif r.status_code == 400 and "já cadastrado" in r.text:
-                # em caso raro de colisão, tentar outro CPF
-                cpf = gen_valid_cpf()
-                r = client.post(url, json={"cpf_cnpj": cpf, "name": name})
-                if r.status_code == 201:
-                    data = r.json()
-                    print(f"✔ criado: id={data['id']} cpf={data['cpf_cnpj']} name={data['name']}")
-                    created += 1
-                else:
-                    print(f"⚠ falha após colisão: {r.status_code} {r.text}")
-            else:
-                print(f"⚠ erro: {r.status_code} {r.text}")
-    print(f"\nResumo: {created}/{n} produtores criados.")
+async def create_one(client, name: str, retries: int, progress: Throughput):
+    # em caso raro de colisão, tenta outro CPF
+    for _ in range(2):
+        r = await send(client, "POST", "/api/producers", json={"cpf_cnpj": gen_valid_cpf(), "name": name},
+                       retries=retries, idempotent=False)
+        if r.status_code == 201:
+            progress.add(ok=1)
+            return
+        if not (r.status_code == 400 and "já cadastrado" in r.text):
+            break
+    print(f"⚠ erro: {r.status_code} {r.text}")
+    progress.add(failed=1)
+
+async def create_batch(client, batch: list[dict], retries: int, progress: Throughput):
+    # o bulk é idempotente (CPF repetido volta como `duplicate`): pode repetir
+    r = await send(client, "POST", "/api/producers/bulk", json=batch, retries=retries)
+    if r.status_code != 200:
+        print(f"⚠ erro no lote: {r.status_code} {r.text[:200]}")
+        progress.add(failed=len(batch))
+        return
+    report = r.json()
+    progress.add(ok=report["created"], failed=report["duplicates"] + report["invalid"])
+
+async def main(n: int, base_url: str, concurrency: int, retries: int, bulk: bool, batch_size: int,
+               seed: int | None):
+    if seed is not None:
+        random.seed(seed)
+        fake.seed_instance(seed)
+    progress = Throughput("produtores")
+    async with make_client(base_url, concurrency) as client:
+        if bulk:
+            rows = ({"cpf_cnpj": gen_valid_cpf(), "name": fake.name()} for _ in range(n))
+            await run_pool(batched(rows, batch_size),
+                           lambda b: create_batch(client, b, retries, progress), concurrency, progress)
+        else:
+            await run_pool((fake.name() for _ in range(n)),
+                           lambda name: create_one(client, name, retries, progress), concurrency, progress)
+    print(f"\nResumo: {progress.summary()} (pedidos: {n}).")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Seed de produtores via API")
     parser.add_argument("--n", type=int, default=20, help="quantidade de produtores")
-    parser.add_argument(
-        "--base-url",
-        type=str,
-        default=os.getenv("SEED_BASE_URL", "http://localhost:8000"),
-        help="URL base da API (default: http://localhost:8000)",
-    )
+    parser.add_argument("--seed", type=int, default=None, help="seed para repetibilidade (opcional)")
+    add_common_args(parser)
     args = parser.parse_args()
-    main(args.n, args.base_url)
+    asyncio.run(main(args.n, args.base_url, args.concurrency, args.retries, args.bulk, args.batch_size, args.seed))
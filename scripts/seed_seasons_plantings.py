@@ -1,84 +1,89 @@
 # scripts/seed_seasons_plantings.py
 import argparse
-import os
+import asyncio
 import random
-from typing import Iterable, List, Dict
+from typing import Dict, Iterable, Iterator
 
-import httpx
+from seed_common import Throughput, add_common_args, batched, fetch_all, make_client, run_pool, send
 
 CULTURES = [
     "Soja", "Milho", "Café", "Algodão", "Trigo", "Cana-de-açúcar", "Arroz", "Feijão",
     "Girassol", "Sorgo"
 ]
 
-def ensure_season(base_url: str, name: str) -> Dict:
-    url = base_url.rstrip("/") + "/api/seasons"
-    with httpx.Client(timeout=10.0) as client:
-        r = client.post(url, json={"name": name})
-        r.raise_for_status()
-        return r.json()
+async def ensure_season(client, name: str, retries: int) -> Dict:
+    # POST de safra é idempotente (devolve a existente)
+    r = await send(client, "POST", "/api/seasons", json={"name": name}, retries=retries)
+    r.raise_for_status()
+    return r.json()
 
-def list_seasons(base_url: str) -> List[Dict]:
-    url = base_url.rstrip("/") + "/api/seasons"
-    with httpx.Client(timeout=10.0) as client:
-        return client.get(url).json()
+def seasons_from_years(years: Iterable[int]) -> list[str]:
+    return [f"Safra {y}" for y in years]
 
-def list_farms(base_url: str) -> List[Dict]:
-    url = base_url.rstrip("/") + "/api/farms"
-    with httpx.Client(timeout=10.0) as client:
-        return client.get(url).json()
+def choose_plantings(names: list[str], min_cult: int, max_cult: int) -> Iterator[tuple[str, str]]:
+    """(safra, cultura) sorteados para uma fazenda."""
+    # escolhe aleatoriamente algumas safras para essa fazenda
+    chosen_seasons = random.sample(names, k=random.randint(1, len(names)))
+    for sname in chosen_seasons:
+        # escolhe culturas (1..N), sem repetição
+        n_c = random.randint(min_cult, max_cult)
+        for culture in random.sample(CULTURES, k=min(n_c, len(CULTURES))):
+            yield sname, culture
 
-def create_planting(base_url: str, payload: Dict) -> bool:
-    url = base_url.rstrip("/") + "/api/plantings"
-    with httpx.Client(timeout=10.0) as client:
-        r = client.post(url, json=payload)
-        if r.status_code == 201:
-            return True
-        # 400 quando já existe (unicidade)
+def gen_plantings(farms: list[Dict], names: list[str], season_id_by_name: Dict[str, int],
+                  min_cult: int, max_cult: int) -> Iterator[Dict]:
+    for farm in farms:
+        for sname, culture in choose_plantings(names, min_cult, max_cult):
+            yield {"farm_id": farm["id"], "season_id": season_id_by_name[sname], "culture": culture}
+
+async def create_planting(client, payload: Dict, retries: int, progress: Throughput):
+    # unicidade (fazenda, safra, cultura): repetir no máximo devolve 400
+    r = await send(client, "POST", "/api/plantings", json=payload, retries=retries)
+    if r.status_code == 201:
+        progress.add(ok=1)
+    else:
         print(f"⚠ erro ao criar plantio: {r.status_code} {r.text}")
-        return False
+        progress.add(failed=1)
 
-def seasons_from_years(years: Iterable[int]) -> list[str]:
-    return [f"Safra {y}" for y in years]
+async def create_batch(client, batch: list[Dict], retries: int, progress: Throughput):
+    r = await send(client, "POST", "/api/plantings/bulk", json=batch, retries=retries)
+    if r.status_code != 200:
+        print(f"⚠ erro no lote: {r.status_code} {r.text[:200]}")
+        progress.add(failed=len(batch))
+        return
+    report = r.json()
+    progress.add(ok=report["created"], failed=len(report["skipped"]))
 
-def main(year_start: int, year_end: int, min_cult: int, max_cult: int, base_url: str, seed: int | None):
+async def main(year_start: int, year_end: int, min_cult: int, max_cult: int, base_url: str, seed: int | None,
+               concurrency: int, retries: int, bulk: bool, batch_size: int):
     if seed is not None:
         random.seed(seed)
 
-    # garante saf ras
-    names = seasons_from_years(range(year_start, year_end + 1))
-    created = []
-    for n in names:
-        created.append(ensure_season(base_url, n))
-    print(f"✔ Safras garantidas: {[s['name'] for s in created]}")
+    async with make_client(base_url, concurrency) as client:
+        # garante safras
+        names = seasons_from_years(range(year_start, year_end + 1))
+        created = await asyncio.gather(*(ensure_season(client, n, retries) for n in names))
+        print(f"✔ Safras garantidas: {[s['name'] for s in created]}")
 
-    # busca IDs úteis
-    seasons = list_seasons(base_url)
-    farms = list_farms(base_url)
-    if not farms:
-        print("⚠ Nenhuma fazenda encontrada. Rode o seed de fazendas primeiro.")
-        return
+        # busca IDs úteis
+        seasons = await fetch_all(client, "/api/seasons", retries)
+        farms = await fetch_all(client, "/api/farms", retries)
+        if not farms:
+            print("⚠ Nenhuma fazenda encontrada. Rode o seed de fazendas primeiro.")
+            return
 
-    # mapeia nome -> id
-    season_id_by_name = {s["name"]: s["id"] for s in seasons}
+        # mapeia nome -> id
+        season_id_by_name = {s["name"]: s["id"] for s in seasons}
 
-    total_plantings = 0
-    for farm in farms:
-        farm_id = farm["id"]
-        # escolhe aleatoriamente algumas safras para essa fazenda
-        chosen_seasons = random.sample(names, k=random.randint(1, len(names)))
-        for sname in chosen_seasons:
-            season_id = season_id_by_name[sname]
-            # escolhe culturas (1..N), sem repetição
-            n_c = random.randint(min_cult, max_cult)
-            for culture in random.sample(CULTURES, k=min(n_c, len(CULTURES))):
-                payload = {"farm_id": farm_id, "season_id": season_id, "culture": culture}
-                ok = create_planting(base_url, payload)
-                if ok:
-                    total_plantings += 1
-                    print(f"✔ Fazenda {farm_id} - {sname} -> {culture}")
+        progress = Throughput("plantios")
+        plantings = gen_plantings(farms, names, season_id_by_name, min_cult, max_cult)
+        if bulk:
+            await run_pool(batched(plantings, batch_size),
+                           lambda b: create_batch(client, b, retries, progress), concurrency, progress)
+        else:
+            await run_pool(plantings, lambda p: create_planting(client, p, retries, progress), concurrency, progress)
 
-    print(f"\nResumo: {total_plantings} plantios criados.")
+    print(f"\nResumo: {progress.summary()}.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Seed de Safras e Plantios via API")
@@ -86,8 +91,8 @@ if __name__ == "__main__":
     parser.add_argument("--year-end", type=int, default=2025, help="ano final (default: 2025)")
     parser.add_argument("--min-cult", type=int, default=1, help="mínimo de culturas por fazenda/safra (default: 1)")
     parser.add_argument("--max-cult", type=int, default=3, help="máximo de culturas por fazenda/safra (default: 3)")
-    parser.add_argument("--base-url", type=str, default=os.getenv("SEED_BASE_URL", "http://localhost:8000"),
-                        help="URL base da API (default: http://localhost:8000)")
     parser.add_argument("--seed", type=int, default=None, help="seed para repetibilidade (opcional)")
+    add_common_args(parser)
     args = parser.parse_args()
-    main(args.year_start, args.year_end, args.min_cult, args.max_cult, args.base_url, args.seed)
+    asyncio.run(main(args.year_start, args.year_end, args.min_cult, args.max_cult, args.base_url, args.seed,
+                     args.concurrency, args.retries, args.bulk, args.batch_size))
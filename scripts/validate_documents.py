@@ -0,0 +1,61 @@
+# scripts/validate_documents.py
+"""
+Triagem offline de CPF/CNPJ num CSV grande, em blocos (memória constante).
+
+    python scripts/validate_documents.py produtores.csv --column cpf_cnpj --output invalidos.csv
+    python scripts/validate_documents.py produtores.csv --all --output triados.csv
+
+Sem `--all` a saída tem só as linhas inválidas; com `--all`, todas as linhas
+com as colunas extras `valid` e `normalized`.
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+import pandas as pd
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.validators_batch import validate_cpf_cnpj_batch
+
+def main(path: str, column: str, chunksize: int, output: str | None, keep_all: bool, sep: str):
+    total = valid = 0
+    start = time.perf_counter()
+    header = True
+    # dtype=str e sem NA: "00123..." continua string e vazio vira ""
+    reader = pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize, sep=sep)
+    for chunk in reader:
+        if column not in chunk.columns:
+            sys.exit(f"Coluna '{column}' não encontrada. Colunas: {', '.join(chunk.columns)}")
+        mask, normalized = validate_cpf_cnpj_batch(chunk[column].to_numpy(dtype=str))
+        total += len(chunk)
+        valid += int(mask.sum())
+        if output:
+            if keep_all:
+                out = chunk.assign(valid=mask, normalized=normalized)
+            else:
+                out = chunk[~mask]
+            out.to_csv(output, mode="w" if header else "a", header=header, index=False, sep=sep)
+            header = False
+        elapsed = time.perf_counter() - start
+        print(f"… {total:,} linhas ({total / elapsed:,.0f}/s)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    invalid = total - valid
+    print(f"\nResumo: {total:,} documentos, {valid:,} válidos, {invalid:,} inválidos "
+          f"em {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f}/s)")
+    return invalid
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valida CPF/CNPJ de uma coluna de CSV em lote (NumPy)")
+    parser.add_argument("path", help="CSV de entrada")
+    parser.add_argument("--column", default="cpf_cnpj", help="coluna com os documentos")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="linhas por bloco")
+    parser.add_argument("--output", default=None, help="CSV de saída (padrão: só o resumo)")
+    parser.add_argument("--all", dest="keep_all", action="store_true", help="grava todas as linhas com valid/normalized")
+    parser.add_argument("--sep", default=",", help="separador do CSV")
+    args = parser.parse_args()
+    main(args.path, args.column, args.chunksize, args.output, args.keep_all, args.sep)
@@ -1,10 +1,11 @@
 # tests/conftest.py
-import os, sys, pathlib
+import os, sys, pathlib, tempfile
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 # Sinaliza modo de teste (evita o startup mexer no DB "real")
 os.environ.setdefault("TESTING", "1")
@@ -14,18 +15,28 @@ ROOT = pathlib.Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db, enable_sqlite_foreign_keys
 from app.main import app
 from app import models  # <<< IMPORTANTE: registra os modelos no metadata
+from app.cache import dashboard_cache
+from app.routers import dashboard
 
-# Engine SQLite em memória (compartilhada) para testes
+# SQLite num arquivo temporário: as rotas usam a engine assíncrona (aiosqlite) e
+# os testes/fixtures a síncrona, as duas enxergando o mesmo banco.
+# NullPool porque o TestClient abre um event loop por request.
+DB_PATH = pathlib.Path(tempfile.mkdtemp()) / "test.db"
 engine = create_engine(
-    "sqlite+pysqlite:///:memory:",
+    f"sqlite+pysqlite:///{DB_PATH}",
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    poolclass=NullPool,
     future=True,
 )
 TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{DB_PATH}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+# como nas engines da aplicação: exclusões dependem do ON DELETE CASCADE
+enable_sqlite_foreign_keys(engine)
+enable_sqlite_foreign_keys(async_engine.sync_engine)
 
 def override_get_db():
     db = TestingSessionLocal()
@@ -34,16 +45,38 @@ def override_get_db():
     finally:
         db.close()
 
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 # Usa a sessão de teste em todas as rotas
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+# ...e no cálculo das atualizações ao vivo (SSE), que roda fora das requisições
+dashboard.live.session_factory = TestingAsyncSessionLocal
 
 @pytest.fixture(autouse=True)
 def _db_schema():
     # Isola cada teste com schema limpinho
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    dashboard_cache.clear()  # o schema é recriado sem passar pelas rotas de escrita
     yield
     Base.metadata.drop_all(bind=engine)
 
 def client():
     return TestClient(app)
+
+def pages(c, url: str, params: dict | None = None) -> list[list[dict]]:
+    """Percorre uma listagem paginada seguindo o `Link: rel="next"` (conferido com `X-Next-Cursor`)."""
+    out = []
+    r = c.get(url, params=params)
+    while True:
+        assert r.status_code == 200, r.text
+        out.append(r.json())
+        if "X-Next-Cursor" not in r.headers:
+            assert "Link" not in r.headers
+            return out
+        link = r.headers["Link"]
+        assert link.endswith('>; rel="next"') and f"after={r.headers['X-Next-Cursor']}" in link
+        r = c.get(link[1:link.index(">")])
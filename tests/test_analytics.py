@@ -0,0 +1,50 @@
+# tests/test_analytics.py
+from .conftest import client
+
+def _seed(c):
+    pid = c.post("/api/producers", json={"cpf_cnpj": "39053344705", "name": "A"}).json()["id"]
+    farms = []
+    for name, city, state, total in [("F1", "Unaí", "MG", 100), ("F2", "Patos", "MG", 50), ("F3", "Sorriso", "MT", 300)]:
+        farms.append(c.post("/api/farms", json={"producer_id": pid, "name": name, "city": city, "state": state,
+                                                "area_total": total, "area_agricultable": total / 2,
+                                                "area_vegetation": 0}).json()["id"])
+    s1 = c.post("/api/seasons", json={"name": "Safra 2023"}).json()["id"]
+    s2 = c.post("/api/seasons", json={"name": "Safra 2024"}).json()["id"]
+    c.post("/api/plantings/bulk", json=[
+        {"farm_id": farms[0], "season_id": s1, "culture": "Soja"},
+        {"farm_id": farms[0], "season_id": s2, "culture": "Soja"},
+        {"farm_id": farms[1], "season_id": s2, "culture": "Milho"},
+        {"farm_id": farms[2], "season_id": s2, "culture": "Soja"},
+        {"farm_id": farms[2], "season_id": s2, "culture": "Algodão"},
+    ])
+    return s1, s2
+
+def test_cube_areas_by_state_with_rollup():
+    c = client()
+    _seed(c)
+    r = c.get("/api/analytics/cube?dims=state&dims=city&measures=farm_count&measures=area_total&rollup=true")
+    assert r.status_code == 200, r.text
+    rows = r.json()["rows"]
+    detail = [x for x in rows if x["level"] == 2]
+    assert {(x["state"], x["city"], x["farm_count"], x["area_total"]) for x in detail} == {
+        ("MG", "Patos", 1, 50), ("MG", "Unaí", 1, 100), ("MT", "Sorriso", 1, 300)}
+    subtotals = {x["state"]: x["area_total"] for x in rows if x["level"] == 1}
+    assert subtotals == {"MG": 150, "MT": 300}
+    assert [x for x in rows if x["level"] == 0] == [{"state": None, "city": None, "farm_count": 3,
+                                                     "area_total": 450, "level": 0}]
+
+def test_cube_culture_by_season_top_n_and_filters():
+    c = client()
+    s1, s2 = _seed(c)
+    rows = c.get("/api/analytics/cube?dims=season&dims=culture&measures=planting_count&top=1").json()["rows"]
+    assert rows == [
+        {"season": "Safra 2023", "culture": "Soja", "planting_count": 1},
+        {"season": "Safra 2024", "culture": "Soja", "planting_count": 2},
+    ]
+    # Milho e Algodão empatam em 2024: desempate pela cultura, sempre o mesmo
+    rows = c.get(f"/api/analytics/cube?dims=culture&measures=planting_count&top=2&season_id={s2}").json()["rows"]
+    assert [(x["culture"], x["planting_count"]) for x in rows] == [("Algodão", 1), ("Soja", 2)]
+    rows = c.get(f"/api/analytics/cube?dims=state&measures=farm_count&measures=planting_count&season_id={s2}").json()["rows"]
+    assert rows == [{"state": "MG", "farm_count": 2, "planting_count": 2},
+                    {"state": "MT", "farm_count": 1, "planting_count": 2}]
+    assert c.get("/api/analytics/cube?dims=culture&measures=area_total").status_code == 400
@@ -0,0 +1,55 @@
+# tests/test_compression.py
+import gzip
+from app.compression import negotiate
+from .conftest import client
+
+def _farms(c, n):
+    pid = c.post("/api/producers", json={"cpf_cnpj": "39053344705", "name": "A"}).json()["id"]
+    for i in range(n):
+        c.post("/api/farms", json={"producer_id": pid, "name": f"Fazenda {i}", "city": "Unaí", "state": "MG",
+                                   "area_total": 100, "area_agricultable": 50, "area_vegetation": 10})
+    return pid
+
+def test_gzip_negotiation_threshold_and_lean_list():
+    c = client()
+    pid = _farms(c, 30)
+
+    r = c.get("/api/farms", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.headers["etag"].startswith('W/"')
+    assert r.headers["content-type"] == "application/json"
+    assert int(r.headers["content-length"]) < len(r.content)  # httpx já descomprimiu
+    rows = r.json()
+    assert len(rows) == 30
+    assert rows[0] == {"id": rows[0]["id"], "producer_id": pid, "name": "Fazenda 0", "city": "Unaí", "state": "MG",
+                       "area_total": 100.0, "area_agricultable": 50.0, "area_vegetation": 10.0}
+
+    # ETag fraco continua valendo no If-None-Match
+    assert c.get("/api/farms", headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["etag"]}).status_code == 304
+
+    identity = c.get("/api/farms", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.json() == rows
+    assert not identity.headers["etag"].startswith("W/")
+
+    small = c.get(f"/api/producers/{pid}", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+def test_streamed_export_is_compressed_in_chunks():
+    c = client()
+    _farms(c, 20)
+    r = c.get("/dashboard/export/farms.csv", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert "content-length" not in r.headers
+    assert len(r.text.splitlines()) == 21
+    # export já comprimido (?gzip=true) não é comprimido de novo
+    raw = c.get("/dashboard/export/farms.csv?gzip=true", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in raw.headers
+    assert len(gzip.decompress(raw.content).decode().splitlines()) == 21
+
+def test_negotiate():
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0, identity") is None
+    assert negotiate("*") in ("br", "gzip")
+    assert negotiate("") is None
@@ -1,5 +1,9 @@
 # tests/test_dashboard.py
-from .conftest import client
+import csv, gzip, html as html_lib, io, json, re
+from sqlalchemy import event, select
+from app import models, summary
+from app.diagnostics import assert_max_queries
+from .conftest import client, TestingSessionLocal, async_engine
 
 def seed_minimal(c):
     # produtor
@@ -39,3 +43,173 @@ def test_dashboard_json_endpoints():
     # uso do solo com filtro de UF
     lu = c.get("/dashboard/data/landuse?state=MG").json()
     assert "data" in lu and isinstance(lu["data"], list)
+
+def test_export_farms_and_plantings_stream():
+    c = client()
+    farm, season = seed_minimal(c)
+
+    r = c.get("/dashboard/export/farms.csv?state=mg")
+    assert r.status_code == 200
+    rows = list(csv.reader(io.StringIO(r.text)))
+    assert rows[0][:4] == ["id", "name", "city", "state"] and "producer_cpf_cnpj" in rows[0]
+    assert len(rows) == 2 and rows[1][1] == "Fazenda A"
+    assert len(c.get("/dashboard/export/farms.csv?state=SP").text.splitlines()) == 1  # só cabeçalho
+
+    r = c.get(f"/dashboard/export/plantings.ndjson?season_id={season['id']}&gzip=true")
+    assert r.headers["content-type"] == "application/gzip"
+    assert 'plantings.ndjson.gz' in r.headers["content-disposition"]
+    lines = gzip.decompress(r.content).decode().splitlines()
+    item = json.loads(lines[0])
+    assert item["culture"] == "Milho" and item["season_name"] == "Safra 2024" and item["state"] == "MG"
+
+def test_dashboard_cache_hits_and_write_invalidation():
+    c = client()
+    farm, season = seed_minimal(c)
+    before = c.get("/dashboard/cache/stats").json()
+
+    first = c.get("/dashboard/data/state").json()
+    assert c.get("/dashboard/data/state").json() == first
+    stats = c.get("/dashboard/cache/stats").json()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+    # criar produtor não toca em fazendas: continua em cache
+    c.post("/api/producers", json={"cpf_cnpj": "11144477735", "name": "B"})
+    c.get("/dashboard/data/state")
+    assert c.get("/dashboard/cache/stats").json()["hits"] == before["hits"] + 2
+
+    # nova fazenda invalida o agregado por UF
+    c.post("/api/farms", json={"producer_id": farm["producer_id"], "name": "F2", "city": "Sorriso",
+                               "state": "MT", "area_total": 10, "area_agricultable": 5, "area_vegetation": 5})
+    states = {d["name"]: d["value"] for d in c.get("/dashboard/data/state").json()["data"]}
+    assert states == {"MG": 1, "MT": 1}
+
+def _summary_snapshot():
+    with TestingSessionLocal() as db:
+        states = {r.state: (r.farm_count, round(r.area_total, 6), round(r.area_agricultable, 6),
+                            round(r.area_vegetation, 6)) for r in db.scalars(select(models.StateSummary))}
+        cultures = {(r.season_id, r.state, r.culture): r.planting_count
+                    for r in db.scalars(select(models.CultureSummary))}
+    return states, cultures
+
+def test_summary_tables_follow_writes_and_match_rebuild():
+    c = client()
+    farm, season = seed_minimal(c)  # MG, Milho
+    p2 = c.post("/api/producers", json={"cpf_cnpj": "11144477735", "name": "B"}).json()
+    f2 = c.post("/api/farms", json={"producer_id": p2["id"], "name": "F2", "city": "Sorriso", "state": "MT",
+                                    "area_total": 50, "area_agricultable": 20, "area_vegetation": 10}).json()
+    c.post("/api/plantings/bulk", json=[{"farm_id": f2["id"], "season_id": season["id"], "culture": c_}
+                                        for c_ in ("Soja", "Milho")])
+    c.patch(f"/api/farms/{f2['id']}", json={"state": "go", "area_total": 60})
+    pl = c.post("/api/plantings", json={"farm_id": farm["id"], "season_id": season["id"], "culture": "Soja"}).json()
+    c.delete(f"/api/plantings/{pl['id']}")
+
+    states, cultures = _summary_snapshot()
+    assert states == {"MG": (1, 100, 60, 40), "GO": (1, 60, 20, 10)}
+    assert cultures == {(season["id"], "MG", "Milho"): 1, (season["id"], "GO", "Soja"): 1,
+                        (season["id"], "GO", "Milho"): 1}
+    with TestingSessionLocal() as db:
+        summary.rebuild(db)
+        db.commit()
+    assert _summary_snapshot() == (states, cultures)
+
+    # cascata do produtor some com a fazenda GO e seus plantios
+    c.delete(f"/api/producers/{p2['id']}")
+    assert _summary_snapshot() == ({"MG": (1, 100, 60, 40)}, {(season["id"], "MG", "Milho"): 1})
+    culture = c.get("/dashboard/data/culture").json()["data"]
+    assert culture == [{"name": "Milho", "value": 1}]
+
+def test_summary_tables_follow_bulk_deletes():
+    c = client()
+    farm, season = seed_minimal(c)  # MG, Milho
+    s2 = c.post("/api/seasons", json={"name": "Safra 2025"}).json()
+    p2 = c.post("/api/producers", json={"cpf_cnpj": "11144477735", "name": "B"}).json()
+    f2 = c.post("/api/farms", json={"producer_id": p2["id"], "name": "F2", "city": "Sorriso", "state": "MT",
+                                    "area_total": 50, "area_agricultable": 20, "area_vegetation": 10}).json()
+    c.post("/api/plantings/bulk", json=[{"farm_id": f["id"], "season_id": s["id"], "culture": "Soja"}
+                                        for f in (farm, f2) for s in (season, s2)])
+
+    assert c.delete(f"/api/plantings?season_id={s2['id']}").json()["plantings"] == 2
+    assert c.delete("/api/farms?state=MT").json() == {"farms": 1, "plantings": 1}
+    states, cultures = _summary_snapshot()
+    assert states == {"MG": (1, 100, 60, 40)}
+    assert cultures == {(season["id"], "MG", "Milho"): 1, (season["id"], "MG", "Soja"): 1}
+    with TestingSessionLocal() as db:
+        summary.rebuild(db)
+        db.commit()
+    assert _summary_snapshot() == (states, cultures)
+
+def test_bulk_delete_ignores_farm_committed_after_the_lock():
+    # simula o READ COMMITTED do PostgreSQL: outra transação grava uma fazenda MT
+    # (com plantio e resumo) logo depois da primeira consulta da exclusão
+    c = client()
+    farm, season = seed_minimal(c)  # MG, Milho
+    p2 = c.post("/api/producers", json={"cpf_cnpj": "11144477735", "name": "B"}).json()
+    c.post("/api/farms", json={"producer_id": p2["id"], "name": "F2", "city": "Sorriso", "state": "MT",
+                               "area_total": 50, "area_agricultable": 20, "area_vegetation": 10})
+    fired = []
+
+    def concurrent_writer(conn, cursor, statement, *args):
+        if fired or not (statement.startswith("SELECT") and "FROM farms" in statement):
+            return
+        fired.append(statement)
+        conn.exec_driver_sql(
+            "INSERT INTO farms (producer_id, name, city, state, area_total, area_agricultable, area_vegetation) "
+            "VALUES (?, 'F3', 'Sinop', 'MT', 30, 10, 5)", (p2["id"],))
+        fid = conn.exec_driver_sql("SELECT max(id) FROM farms").scalar()
+        conn.exec_driver_sql("INSERT INTO plantings (farm_id, season_id, culture) VALUES (?, ?, 'Café')",
+                             (fid, season["id"]))
+        conn.exec_driver_sql("UPDATE state_summary SET farm_count = farm_count + 1, area_total = area_total + 30, "
+                             "area_agricultable = area_agricultable + 10, area_vegetation = area_vegetation + 5 "
+                             "WHERE state = 'MT'")
+        conn.exec_driver_sql("INSERT INTO culture_summary (season_id, state, culture, planting_count) "
+                             "VALUES (?, 'MT', 'Café', 1)", (season["id"],))
+
+    event.listen(async_engine.sync_engine, "after_cursor_execute", concurrent_writer)
+    try:
+        assert c.delete("/api/farms?state=MT").json() == {"farms": 1, "plantings": 0}
+    finally:
+        event.remove(async_engine.sync_engine, "after_cursor_execute", concurrent_writer)
+    assert fired
+    # a fazenda gravada no meio fica, e o resumo continua batendo com o recálculo
+    states, cultures = _summary_snapshot()
+    assert states == {"MG": (1, 100, 60, 40), "MT": (1, 30, 10, 5)}
+    assert cultures == {(season["id"], "MG", "Milho"): 1, (season["id"], "MT", "Café"): 1}
+    with TestingSessionLocal() as db:
+        summary.rebuild(db)
+        db.commit()
+    assert _summary_snapshot() == (states, cultures)
+
+def test_dashboard_data_all_matches_individual_endpoints():
+    c = client()
+    farm, season = seed_minimal(c)
+    payload = c.get(f"/dashboard/data/all?state=mg&season_id={season['id']}").json()
+    assert payload["filters"] == c.get("/dashboard/data/filters").json()
+    assert payload["state"] == c.get("/dashboard/data/state").json()
+    assert payload["culture"] == c.get(f"/dashboard/data/culture?state=MG&season_id={season['id']}").json()
+    assert payload["landuse"] == c.get("/dashboard/data/landuse?state=MG").json()
+    assert payload["kpis"] == {"total_farms": 1, "total_hectares": 100}
+    assert "/dashboard/data/all" in c.get("/dashboard").text
+
+def test_dashboard_page_embeds_data_and_is_cached_per_version():
+    c = client()
+    seed_minimal(c)
+    r = c.get("/dashboard")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/html")
+    embedded = re.search(r'<script id="initial-data" type="application/json">(.*?)</script>', r.text, re.S).group(1)
+    assert json.loads(html_lib.unescape(embedded)) == c.get("/dashboard/data/all").json()
+    assert "cdn.jsdelivr" not in r.text
+
+    with assert_max_queries(async_engine.sync_engine, 0):
+        assert c.get("/dashboard").text == r.text
+    assert c.get("/dashboard", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+    c.post("/api/seasons", json={"name": "Safra 2030"})
+    assert "Safra 2030" in c.get("/dashboard").text
+
+    # ECharts local, com hash no nome e cache imutável
+    src = re.search(r'<script src="(/static/vendor/echarts\.min\.[0-9a-f]{10}\.js)"', r.text).group(1)
+    js = c.get(src)
+    assert js.status_code == 200 and js.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert c.get("/static/vendor/echarts.min.js").headers["cache-control"] == "no-cache"
+    assert c.get("/static/vendor/echarts.min.0000000000.js").headers["cache-control"] == "no-cache"
+    assert c.get("/static/vendor/nada.0000000000.js").status_code == 404
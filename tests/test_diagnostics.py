@@ -0,0 +1,70 @@
+# tests/test_diagnostics.py
+import pytest
+from fastapi.testclient import TestClient
+from loguru import logger
+from sqlalchemy import select
+from app import diagnostics, models
+from app.main import app
+from .conftest import client, engine, async_engine, TestingSessionLocal
+
+def _producer_with_farms(c, n):
+    pid = c.post("/api/producers", json={"cpf_cnpj": "39053344705", "name": "A"}).json()["id"]
+    sid = c.post("/api/seasons", json={"name": "Safra 2024"}).json()["id"]
+    for i in range(n):
+        fid = c.post("/api/farms", json={"producer_id": pid, "name": f"F{i}", "city": "Unaí", "state": "MG",
+                                         "area_total": 100, "area_agricultable": 50, "area_vegetation": 10}).json()["id"]
+        c.post("/api/plantings", json={"farm_id": fid, "season_id": sid, "culture": "Soja"})
+    return pid
+
+def test_assert_max_queries():
+    c = client()
+    pid = _producer_with_farms(c, 1)
+    with diagnostics.assert_max_queries(async_engine.sync_engine, 2) as counter:
+        assert c.get(f"/api/producers/{pid}").status_code == 200
+    assert counter.count >= 1
+    with pytest.raises(AssertionError, match="máximo 0"):
+        with diagnostics.assert_max_queries(async_engine.sync_engine, 0):
+            c.get(f"/api/producers/{pid}")
+
+def _warnings(fn):
+    messages = []
+    sink = logger.add(lambda m: messages.append(str(m)), level="WARNING")
+    try:
+        result = fn()
+    finally:
+        logger.remove(sink)
+    return result, "\n".join(m for m in messages if "N+1" in m)
+
+def test_n_plus_one_detected_on_lazy_loads():
+    diagnostics.install(engine)
+    _producer_with_farms(client(), diagnostics.N_PLUS_ONE_THRESHOLD + 1)
+
+    def walk():
+        with diagnostics.track() as log, TestingSessionLocal() as db:
+            for farm in db.scalars(select(models.Farm)):
+                farm.plantings  # um SELECT por fazenda
+            diagnostics.report(log, "teste")
+
+    _, report = _warnings(walk)
+    assert "Possível N+1 em teste" in report
+    assert "lazy load Farm.plantings" in report
+
+def test_cascade_delete_is_not_n_plus_one():
+    diagnostics.install(async_engine.sync_engine)
+    c = client()
+    pid = _producer_with_farms(c, diagnostics.N_PLUS_ONE_THRESHOLD + 1)
+    with diagnostics.QueryCounter(async_engine.sync_engine) as counter:
+        r, report = _warnings(lambda: TestClient(diagnostics.DiagnosticsMiddleware(app)).delete(f"/api/producers/{pid}"))
+    assert r.status_code == 204
+    # fazendas saem num DELETE pelos ids travados e os plantios pelo ON DELETE CASCADE:
+    # nada é carregado no ORM
+    assert report == ""
+    deletes = [diagnostics.shape(s) for s in counter.statements if s.startswith("DELETE") and "_summary" not in s]
+    assert deletes == ["DELETE FROM farms WHERE farms.id IN (…)", "DELETE FROM producers WHERE producers.id = ?"]
+    # 2 travas + 2 agregados do resumo + 2 DELETEs + 4 do resumo, independente do nº de fazendas
+    assert counter.count <= 10
+    assert c.get("/api/farms", params={"producer_id": pid}).json() == []
+
+def test_shape_collapses_in_lists():
+    assert diagnostics.shape("SELECT *\n FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (…)"
+    assert diagnostics.shape("SELECT * FROM t WHERE id IN ($1, $2)") == diagnostics.shape("SELECT * FROM t WHERE id IN ($1, $2, $3)")
@@ -0,0 +1,34 @@
+# tests/test_etag.py
+from app.diagnostics import assert_max_queries
+from .conftest import client, async_engine
+
+FARM = {"name": "F1", "city": "Unaí", "state": "MG", "area_total": 100, "area_agricultable": 50, "area_vegetation": 10}
+
+def test_conditional_get_skips_query_until_write():
+    c = client()
+    pid = c.post("/api/producers", json={"cpf_cnpj": "39053344705", "name": "A"}).json()["id"]
+    c.post("/api/farms", json={**FARM, "producer_id": pid})
+
+    r = c.get("/dashboard/data/all")
+    tag = r.headers["etag"]
+    assert r.headers["cache-control"] == "public, no-cache"
+    with assert_max_queries(async_engine.sync_engine, 0):
+        r = c.get("/dashboard/data/all", headers={"If-None-Match": tag})
+    assert r.status_code == 304 and r.content == b""
+    assert r.headers["etag"] == tag
+    # W/ e listas também valem
+    assert c.get("/dashboard/data/all", headers={"If-None-Match": f'"x", W/{tag}'}).status_code == 304
+
+    # outra URL, outra tag; a ordem dos parâmetros não importa
+    assert c.get("/dashboard/data/all?state=MG").headers["etag"] != tag
+    assert c.get("/api/farms?state=MG&limit=5").headers["etag"] == c.get("/api/farms?limit=5&state=MG").headers["etag"]
+
+    # escrita numa tabela da rota troca a tag; em outra tabela, não
+    farms_tag = c.get("/api/farms").headers["etag"]
+    c.post("/api/seasons", json={"name": "Safra 2024"})
+    assert c.get("/api/farms", headers={"If-None-Match": farms_tag}).status_code == 304
+    r = c.get("/dashboard/data/all", headers={"If-None-Match": tag})
+    assert r.status_code == 200 and r.headers["etag"] != tag
+    c.post("/api/farms", json={**FARM, "name": "F2", "producer_id": pid})
+    r = c.get("/api/farms", headers={"If-None-Match": farms_tag})
+    assert r.status_code == 200 and len(r.json()) == 2
@@ -0,0 +1,88 @@
+# tests/test_events.py
+import asyncio, json
+import httpx
+from app import cache
+from app.events import Broadcaster
+from app.main import app
+from app.routers.dashboard import live
+from .conftest import client
+from .test_dashboard import seed_minimal
+
+def _events(chunks: list[bytes]) -> list[tuple[str, dict]]:
+    out = []
+    for block in b"".join(chunks).decode().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            out.append((fields["event"], json.loads(fields["data"])))
+    return out
+
+async def _until(predicate, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timeout")
+
+def test_sse_coalesces_writes_and_fans_out(monkeypatch):
+    c = client()
+    farm, season = seed_minimal(c)
+    monkeypatch.setattr(live, "debounce", 0.1)
+
+    async def run():
+        received = [[], []]
+        stop = asyncio.Event()
+
+        async def subscribe(i):
+            scope = {"type": "http", "method": "GET", "path": "/dashboard/events", "raw_path": b"/dashboard/events",
+                     "query_string": b"", "headers": [], "http_version": "1.1", "scheme": "http",
+                     "server": ("test", 80), "client": ("test", 1), "root_path": ""}
+
+            async def receive():
+                await stop.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.body":
+                    received[i].append(message.get("body", b""))
+
+            await app(scope, receive, send)
+
+        tasks = [asyncio.create_task(subscribe(i)) for i in range(2)]
+        await _until(lambda: all(_events(r) for r in received))
+        assert live.subscribers == 2
+        assert cache._listeners.count(live.notify) == 1
+        snapshot = _events(received[0])[0]
+        assert snapshot[0] == "snapshot" and snapshot[1]["kpis"]["total_farms"] == 1
+
+        before = live.computations
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            for i in range(3):  # três escritas na mesma janela
+                r = await http.post("/api/farms", json={"producer_id": farm["producer_id"], "name": f"F{i}",
+                                                        "city": "Sorriso", "state": "MT", "area_total": 10,
+                                                        "area_agricultable": 5, "area_vegetation": 1})
+                assert r.status_code == 201
+        await _until(lambda: all(len(_events(r)) == 2 for r in received))
+        await asyncio.sleep(0.2)
+        stop.set()
+        await asyncio.gather(*tasks)
+        assert live.subscribers == 0
+        assert live.notify not in cache._listeners  # sem inscritos, não escuta escritas
+        return received, live.computations - before
+
+    received, computations = asyncio.run(run())
+    # um cálculo para os dois inscritos e as três escritas
+    assert computations == 1
+    update = _events(received[0])[1]
+    assert update == _events(received[1])[1]
+    event, data = update
+    assert event == "update"
+    assert data["kpis"]["total_farms"] == 4
+    assert data["kpis"]["delta"] == {"total_farms": 3, "total_hectares": 30}
+    assert {"state", "landuse", "filters"} <= set(data) and "culture" not in data  # sem plantio novo
+
+def test_idle_broadcaster_registers_no_listener():
+    before = list(cache._listeners)
+    for _ in range(3):
+        Broadcaster(lambda db: None, ("farms",))
+    assert cache._listeners == before
@@ -1,4 +1,7 @@
 # tests/test_farms.py
+import json
+from sqlalchemy.exc import OperationalError
+from app.routers import farms as farms_router
 from .conftest import client
 
 def _create_producer(c, cpf="39053344705", name="Joana"):
@@ -39,3 +42,118 @@ def test_create_farm_invalid_areas():
     r = c.post("/api/farms", json=payload)
     assert r.status_code == 400
     assert "Soma de áreas" in r.text
+
+def test_upload_farms_csv_streams_rejects():
+    c = client()
+    pid = _create_producer(c)
+    body = (
+        "producer_id,name,city,state,area_total,area_agricultable,area_vegetation\n"
+        f"{pid},Fazenda A,Unaí,mg,100,60,40\n"
+        f"{pid},\"Fazenda\nQuebrada\",Patos,PB,100,90,20\n"
+        f"999,Fazenda C,Unaí,MG,100,10,10\n"
+        f"{pid},Fazenda D,Unaí,MG,abc,10,10\n"
+        f"{pid},Fazenda E,Cuiabá,MT,50,10,10\n"
+    )
+    r = c.post("/api/farms/upload?batch_size=2", content=body, headers={"Content-Type": "text/csv"})
+    assert r.status_code == 200, r.text
+    lines = [json.loads(l) for l in r.text.splitlines()]
+    assert [l["line"] for l in lines[:-1]] == [3, 5, 6]
+    assert "Soma de áreas" in lines[0]["detail"]
+    assert "Produtor não encontrado" in lines[1]["detail"]
+    assert lines[-1]["summary"] == {"received": 5, "created": 2, "rejected": 3}
+    farms = c.get("/api/farms").json()
+    assert sorted(f["state"] for f in farms) == ["MG", "MT"]
+
+def test_upload_farms_ndjson():
+    c = client()
+    pid = _create_producer(c)
+    row = {"producer_id": pid, "name": "F", "city": "Sinop", "state": "MT",
+           "area_total": 10, "area_agricultable": 5, "area_vegetation": 5}
+    body = json.dumps(row) + "\n{quebrado\n" + json.dumps(row) + "\n"
+    r = c.post("/api/farms/upload", content=body, headers={"Content-Type": "application/x-ndjson"})
+    lines = [json.loads(l) for l in r.text.splitlines()]
+    assert lines[0]["line"] == 2
+    assert lines[-1]["summary"]["created"] == 2
+    assert c.post("/api/farms/upload", content=body, headers={"Content-Type": "text/plain"}).status_code == 415
+
+def test_upload_farms_failed_chunk_is_reported(monkeypatch):
+    c = client()
+    pid = _create_producer(c)
+    ingest, calls = farms_router._ingest_farms, []
+
+    def flaky(db, chunk):
+        calls.append(chunk)
+        if len(calls) == 2:
+            raise OperationalError("INSERT INTO farms", {}, Exception("disk I/O error"))
+        return ingest(db, chunk)
+
+    monkeypatch.setattr(farms_router, "_ingest_farms", flaky)
+    row = {"producer_id": pid, "name": "F", "city": "Sinop", "state": "MT",
+           "area_total": 10, "area_agricultable": 5, "area_vegetation": 5}
+    body = "".join(json.dumps(row) + "\n" for _ in range(5))
+    r = c.post("/api/farms/upload?batch_size=2", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 200, r.text
+    lines = [json.loads(l) for l in r.text.splitlines()]
+    # o lote que falhou volta rejeitado; os outros ficam gravados (o upload não é atômico)
+    assert [l["line"] for l in lines[:-1]] == [3, 4]
+    assert "Erro ao gravar o lote" in lines[0]["detail"]
+    assert lines[-1]["summary"] == {"received": 5, "created": 3, "rejected": 2}
+    assert len(c.get("/api/farms").json()) == 3
+
+def test_list_farms_keyset_pagination_and_filters():
+    c = client()
+    pid = _create_producer(c)
+    for i, (state, total) in enumerate([("MG", 100), ("SP", 200), ("MG", 300), ("MG", 400), ("GO", 500)]):
+        c.post("/api/farms", json={"producer_id": pid, "name": f"F{i}", "city": "Unaí", "state": state,
+                                   "area_total": total, "area_agricultable": 10, "area_vegetation": 10})
+    r1 = c.get("/api/farms?limit=2")
+    assert [f["name"] for f in r1.json()] == ["F0", "F1"]
+    cursor = r1.headers["X-Next-Cursor"]
+    assert 'rel="next"' in r1.headers["Link"]
+    r2 = c.get(f"/api/farms?limit=2&after={cursor}")
+    assert [f["name"] for f in r2.json()] == ["F2", "F3"]
+    r3 = c.get(f"/api/farms?limit=2&after={r2.headers['X-Next-Cursor']}")
+    assert [f["name"] for f in r3.json()] == ["F4"]
+    assert "X-Next-Cursor" not in r3.headers
+
+    filtered = c.get("/api/farms?state=mg&city=Unaí&min_area=150&max_area=400").json()
+    assert [f["name"] for f in filtered] == ["F2", "F3"]
+    assert c.get("/api/farms?after=lixo").status_code == 400
+
+def test_list_farms_sparse_fields():
+    c = client()
+    pid = _create_producer(c)
+    c.post("/api/farms", json={"producer_id": pid, "name": "F1", "city": "Unaí", "state": "MG",
+                               "area_total": 100, "area_agricultable": 50, "area_vegetation": 10})
+    r = c.get("/api/farms?fields=name,state")
+    assert r.status_code == 200, r.text
+    assert [set(x) for x in r.json()] == [{"id", "name", "state"}]  # id sempre vem (cursor)
+    r = c.get("/api/farms?fields=name,senha")
+    assert r.status_code == 400
+    assert "senha" in r.json()["detail"]
+
+def test_bulk_delete_farms_by_filter_cascades_plantings():
+    c = client()
+    keep, drop = _create_producer(c), _create_producer(c, cpf="11144477735", name="Rui")
+    season_id = c.post("/api/seasons", json={"name": "Safra 2024"}).json()["id"]
+    farms = {}
+    for pid, state in [(drop, "MG"), (drop, "GO"), (keep, "MG")]:
+        farms[(pid, state)] = fid = c.post("/api/farms", json={
+            "producer_id": pid, "name": "F", "city": "Unaí", "state": state,
+            "area_total": 100, "area_agricultable": 50, "area_vegetation": 10}).json()["id"]
+        c.post("/api/plantings/bulk", json=[{"farm_id": fid, "season_id": season_id, "culture": x}
+                                            for x in ("Soja", "Milho")])
+
+    assert c.delete("/api/farms").status_code == 400  # sem filtro não apaga tudo
+    r = c.delete(f"/api/farms?producer_id={drop}&state=mg")
+    assert r.status_code == 200, r.text
+    assert r.json() == {"farms": 1, "plantings": 2}
+    r = c.delete(f"/api/farms?producer_id={drop}")
+    assert r.json() == {"farms": 1, "plantings": 2}
+    assert c.delete(f"/api/farms?producer_id={drop}").json() == {"farms": 0, "plantings": 0}
+
+    # os plantios saíram pelo ON DELETE CASCADE
+    assert {p["farm_id"] for p in c.get("/api/plantings").json()} == {farms[(keep, "MG")]}
+    assert c.delete(f"/api/farms/{farms[(drop, 'MG')]}").status_code == 404
+    assert c.delete(f"/api/farms/{farms[(keep, 'MG')]}").status_code == 204
+    assert c.get("/api/plantings").json() == []
@@ -0,0 +1,33 @@
+# tests/test_loadgen.py
+import asyncio, time
+import httpx
+from benchmarks import loadgen
+
+def test_request_in_flight_across_flush_is_counted():
+    async def run():
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(503)
+
+        ctx = {"producer_ids": [], "farm_ids": [], "season_ids": [], "states": ["MG"]}
+        scenario = {"endpoints": [{"name": "lenta", "path": "/x"}], "phases": []}
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://t") as client:
+            gen = loadgen.LoadGen(client, scenario, loadgen.Filler(ctx, 1), concurrency=10, interval=1.0,
+                                  seed=1, rate_scale=1.0)
+            task = asyncio.create_task(gen.fire("lenta", time.perf_counter()))
+            await asyncio.sleep(0.05)
+            gen.flush("fase", 1.0)  # a requisição ainda está em voo
+            release.set()
+            await task
+            gen.flush("fim", 2.0)
+        return gen
+
+    gen = asyncio.run(run())
+    assert gen.timeline[0]["in_flight"] == 1 and gen.timeline[0]["endpoints"] == []
+    # entra na janela em que terminou e no total
+    assert [(r["requests"], r["5xx"]) for r in gen.timeline[1]["endpoints"]] == [(1, 1)]
+    total = gen.total["lenta"]
+    assert (total.hist.total, total.server_errors) == (1, 1)
+    assert total.hist.max >= 50
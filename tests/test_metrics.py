@@ -0,0 +1,34 @@
+# tests/test_metrics.py
+import re
+from app import metrics
+from .conftest import client, async_engine
+
+def _sample(text, name, **labels):
+    sel = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    m = re.search(rf"^{name}\{{{re.escape(sel)}\}} (\S+)$", text, re.M)
+    return float(m.group(1)) if m else 0.0
+
+def test_metrics_route_latency_and_db_queries():
+    metrics.instrument_engine(async_engine.sync_engine, "test")
+    c = client()
+    before = c.get("/metrics").text
+    pid = c.post("/api/producers", json={"cpf_cnpj": "39053344705", "name": "A"}).json()["id"]
+    assert c.get(f"/api/producers/{pid}").status_code == 200
+    c.get("/nao-existe")
+
+    r = c.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    # rota pelo template, não pelo path concreto
+    count = _sample(text, "http_request_duration_seconds_count", method="GET", route="/api/producers/{producer_id}", status="200")
+    assert count - _sample(before, "http_request_duration_seconds_count", method="GET", route="/api/producers/{producer_id}", status="200") == 1
+    assert _sample(text, "http_request_duration_seconds_count", method="GET", route="unmatched", status="404") >= 1
+    assert f"/api/producers/{pid}\"" not in text
+    assert _sample(text, "http_response_size_bytes_sum", method="GET", route="/api/producers/{producer_id}") > 0
+    assert _sample(text, "http_request_db_queries_sum", route="/api/producers/{producer_id}") >= 1
+    assert _sample(text, "db_queries_total", engine="test") >= 3
+    assert _sample(text, "db_pool_checkout_wait_seconds_count", engine="test") >= 3
+    # só a própria requisição do /metrics em andamento
+    assert _sample(text, "http_requests_in_progress", method="GET") == 1
+    assert _sample(text, "db_pool_connections_checked_out", engine="test") == 0
@@ -0,0 +1,56 @@
+# tests/test_migrations.py
+import pytest
+from sqlalchemy import create_engine, text, inspect
+from sqlalchemy.pool import StaticPool
+from app import migrations, models
+from app.database import Base
+
+def _engine():
+    return create_engine("sqlite+pysqlite:///:memory:", poolclass=StaticPool, future=True)
+
+def _plan(engine, sql: str) -> str:
+    with engine.connect() as conn:
+        return " | ".join(r[-1] for r in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+HOT_QUERIES = {
+    "farms_by_state": "SELECT id FROM farms WHERE state = 'MG' ORDER BY id LIMIT 100",
+    "farms_by_producer": "SELECT id FROM farms WHERE producer_id = 1",
+    "plantings_by_season": "SELECT culture, count(id) FROM plantings WHERE season_id = 1 GROUP BY culture",
+}
+
+def test_upgrade_from_empty_database_is_idempotent():
+    engine = _engine()
+    assert migrations.upgrade(engine) == [1, 2, 3, 4]
+    assert migrations.upgrade(engine) == []
+    assert migrations.check(engine) == migrations.HEAD
+    names = {ix["name"] for ix in inspect(engine).get_indexes("farms")}
+    assert {"ix_farms_state_id", "ix_farms_producer_id"} <= names
+
+def test_legacy_create_all_database_gets_indexes_and_summaries():
+    engine = _engine()
+    # banco criado pelo antigo create_all: tabelas base sem índices e sem versão
+    Base.metadata.create_all(engine, tables=[m.__table__ for m in (models.Producer, models.Farm,
+                                                                      models.Season, models.Planting)])
+    with engine.begin() as conn:
+        for ix in ("ix_farms_state_id", "ix_farms_producer_id", "ix_plantings_season_culture",
+                   "ix_plantings_culture_id"):
+            conn.execute(text(f"DROP INDEX {ix}"))
+        conn.execute(text("INSERT INTO producers (id, cpf_cnpj, name) VALUES (1, '39053344705', 'A')"))
+        conn.execute(text("INSERT INTO farms (id, producer_id, name, city, state, area_total, area_agricultable, "
+                          "area_vegetation) VALUES (1, 1, 'F', 'Unaí', 'MG', 100, 60, 40)"))
+    with pytest.raises(RuntimeError):
+        migrations.check(engine)
+
+    before = {name: _plan(engine, sql) for name, sql in HOT_QUERIES.items()}
+    assert migrations.upgrade(engine) == [1, 2, 3, 4]
+    after = {name: _plan(engine, sql) for name, sql in HOT_QUERIES.items()}
+
+    assert "SCAN farms" in before["farms_by_state"]
+    assert "USING COVERING INDEX ix_farms_state_id" in after["farms_by_state"]
+    assert "SCAN farms" in before["farms_by_producer"]
+    assert "ix_farms_producer_id" in after["farms_by_producer"]
+    assert "SCAN plantings" in before["plantings_by_season"]
+    assert "ix_plantings_season_culture" in after["plantings_by_season"]
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT state, farm_count FROM state_summary")).all() == [("MG", 1)]
@@ -1,5 +1,7 @@
 # tests/test_producers.py
-from .conftest import client
+from sqlalchemy.dialects import postgresql
+from app import diagnostics, search
+from .conftest import client, async_engine, pages, TestingSessionLocal
 
 VALID_CPF = "39053344705"  # CPF válido para testes
 
@@ -34,3 +36,101 @@ def test_list_producers_filter_by_name():
     arr = resp.json()
     assert len(arr) == 1
     assert arr[0]["name"].startswith("Maria")
+
+def test_search_producers_accent_prefix_and_sync():
+    c = client()
+    joao = c.post("/api/producers", json={"cpf_cnpj": VALID_CPF, "name": "João da Silva"}).json()
+    jose = c.post("/api/producers", json={"cpf_cnpj": "11144477735", "name": "José Souza"}).json()
+    c.post("/api/producers", json={"cpf_cnpj": "52998224725", "name": "Maria Silva"})
+
+    names = lambda q, **kw: [p["name"] for p in c.get("/api/producers/search", params={"q": q, **kw}).json()]
+    assert names("joao silva") == ["João da Silva"]       # sem acento, todos os termos
+    assert set(names("jo")) == {"João da Silva", "José Souza"}  # prefixo
+    assert len(names("silva", limit=1)) == 1
+    assert names("!!!") == []
+    assert [p["name"] for p in c.get("/api/producers", params={"q": "JOSE"}).json()] == ["José Souza"]
+
+    # o índice acompanha update e delete
+    c.patch(f"/api/producers/{jose['id']}", json={"name": "Josué Souza"})
+    assert names("jose") == []
+    assert names("josue") == ["Josué Souza"]
+    c.delete(f"/api/producers/{joao['id']}")
+    assert names("silva") == ["Maria Silva"]
+
+def test_search_terms_are_word_prefixes_on_every_backend():
+    c = client()
+    c.post("/api/producers", json={"cpf_cnpj": VALID_CPF, "name": "João da Silva"})
+    c.post("/api/producers", json={"cpf_cnpj": "11144477735", "name": "Josué Souza"})
+    names = lambda q: [p["name"] for p in c.get("/api/producers", params={"q": q}).json()]
+    assert names("sil") == ["João da Silva"]
+    assert names("ilva") == []  # meio de palavra não casa
+    for q in ("-", "%", "!!!"):  # sem termos: lista vazia, não a tabela inteira
+        assert names(q) == []
+        assert c.get("/api/producers/search", params={"q": q}).json() == []
+    # caminho genérico (outros bancos), rodando aqui no SQLite
+    with TestingSessionLocal() as db:
+        generic = lambda q: set(db.scalars(search.matching_ids("generic", q)))
+        assert len(generic("sil")) == 1 and len(generic("so")) == 1
+        assert generic("ilva") == set() and generic("uza") == set()
+    # PostgreSQL: regex ancorada no início de palavra, termo já sem acento
+    stmt = search.matching_ids("postgresql", "Jo Sílva").compile(dialect=postgresql.dialect())
+    assert " ~ " in str(stmt) and " LIKE " not in str(stmt)
+    assert sorted(stmt.params.values()) == [r"\mjo", r"\msilva"]
+
+def test_bulk_create_producers_report():
+    c = client()
+    c.post("/api/producers", json={"cpf_cnpj": VALID_CPF, "name": "Já existe"})
+    payload = [
+        {"cpf_cnpj": "111.444.777-35", "name": "Ana"},
+        {"cpf_cnpj": VALID_CPF, "name": "Duplicado no banco"},
+        {"cpf_cnpj": "123", "name": "Inválido"},
+        {"cpf_cnpj": "11144477735", "name": "Duplicado no arquivo"},
+        {"cpf_cnpj": "11.222.333/0001-81", "name": "Cooperativa"},
+    ]
+    resp = c.post("/api/producers/bulk", json=payload)
+    assert resp.status_code == 200, resp.text
+    report = resp.json()
+    assert (report["created"], report["duplicates"], report["invalid"]) == (2, 2, 1)
+    assert [r["status"] for r in report["rows"]] == ["created", "duplicate", "invalid", "duplicate", "created"]
+    assert report["rows"][0]["cpf_cnpj"] == "11144477735" and report["rows"][0]["id"] is not None
+    assert len(c.get("/api/producers").json()) == 3
+
+def test_bulk_create_producers_single_insert():
+    c = client()
+    payload = [{"cpf_cnpj": cpf, "name": f"P{i}"} for i, cpf in enumerate(["39053344705", "11144477735",
+                                                                          "52998224725", "11222333000181"])]
+    with diagnostics.QueryCounter(async_engine.sync_engine) as counter:
+        report = c.post("/api/producers/bulk", json=payload).json()
+    # um INSERT (executemany) para o lote, não um por linha
+    assert sum(s.startswith("INSERT INTO producers") for s in counter.statements) == 1
+    assert report["created"] == 4
+    by_doc = {p["cpf_cnpj"]: p["id"] for p in c.get("/api/producers").json()}
+    assert {r["cpf_cnpj"]: r["id"] for r in report["rows"]} == by_doc
+
+def test_bulk_create_producers_ndjson():
+    c = client()
+    body = '{"cpf_cnpj": "39053344705", "name": "A"}\n\n{"cpf_cnpj": "11144477735", "name": "B"}\n'
+    resp = c.post("/api/producers/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["created"] == 2
+    bad = c.post("/api/producers/bulk", content='{"cpf_cnpj": ', headers={"Content-Type": "application/x-ndjson"})
+    assert bad.status_code == 400
+
+def test_get_and_search_producer_sparse_fields():
+    c = client()
+    pid = c.post("/api/producers", json={"cpf_cnpj": "39053344705", "name": "João da Silva"}).json()["id"]
+    assert c.get(f"/api/producers/{pid}?fields=name").json() == {"id": pid, "name": "João da Silva"}
+    assert c.get(f"/api/producers/{pid}").json() == {"id": pid, "cpf_cnpj": "39053344705", "name": "João da Silva"}
+    assert c.get("/api/producers/search?q=joao&fields=cpf_cnpj").json() == [{"id": pid, "cpf_cnpj": "39053344705"}]
+    assert c.get(f"/api/producers/{pid + 1}").status_code == 404
+
+def test_list_producers_keyset_pagination():
+    c = client()
+    docs = ["39053344705", "11144477735", "52998224725", "11222333000181", "12345678909"]
+    for i, doc in enumerate(docs):
+        c.post("/api/producers", json={"cpf_cnpj": doc, "name": f"{'Silva' if i % 2 == 0 else 'Souza'} {i}"})
+    got = pages(c, "/api/producers", {"limit": 2})
+    assert [[p["name"] for p in page] for page in got] == [["Silva 0", "Souza 1"], ["Silva 2", "Souza 3"], ["Silva 4"]]
+    # o filtro viaja no Link junto com o cursor
+    got = pages(c, "/api/producers", {"limit": 1, "q": "silva"})
+    assert [[p["name"] for p in page] for page in got] == [["Silva 0"], ["Silva 2"], ["Silva 4"]]
@@ -1,5 +1,6 @@
 # tests/test_seasons_plantings.py
-from .conftest import client
+from app.routers import plantings
+from .conftest import client, pages
 
 def _create_producer(c, cpf="39053344705", name="Prod A"):
     r = c.post("/api/producers", json={"cpf_cnpj": cpf, "name": name})
@@ -39,3 +40,82 @@ def test_planting_create_and_duplicate():
     # duplicado
     p2 = c.post("/api/plantings", json={"farm_id": farm_id, "season_id": season_id, "culture": "Soja"})
     assert p2.status_code == 400
+
+def test_bulk_create_plantings_skips_duplicates():
+    c = client()
+    farm_id = _create_farm(c, _create_producer(c))
+    season_id = c.post("/api/seasons", json={"name": "Safra 2025"}).json()["id"]
+    c.post("/api/plantings", json={"farm_id": farm_id, "season_id": season_id, "culture": "Soja"})
+    payload = [
+        {"farm_id": farm_id, "season_id": season_id, "culture": "Milho"},
+        {"farm_id": farm_id, "season_id": season_id, "culture": "Soja"},   # já no banco
+        {"farm_id": farm_id, "season_id": season_id, "culture": "Milho"},  # repetido no payload
+        {"farm_id": 999, "season_id": season_id, "culture": "Café"},
+        {"farm_id": farm_id, "season_id": 999, "culture": "Café"},
+        {"farm_id": farm_id, "culture": "Café"},
+        {"farm_id": farm_id, "season_id": season_id, "culture": "Café"},
+    ]
+    r = c.post("/api/plantings/bulk", json=payload)
+    assert r.status_code == 200, r.text
+    report = r.json()
+    assert report["created"] == 2
+    assert [(s["row"], s["reason"]) for s in report["skipped"]] == [
+        (2, "duplicate"), (3, "duplicate"), (4, "farm_not_found"), (5, "season_not_found"), (6, "invalid"),
+    ]
+    cultures = sorted(p["culture"] for p in c.get(f"/api/plantings?farm_id={farm_id}").json())
+    assert cultures == ["Café", "Milho", "Soja"]
+
+def test_bulk_create_plantings_farm_deleted_mid_import(monkeypatch):
+    c = client()
+    farm_id = _create_farm(c, _create_producer(c))
+    season_id = c.post("/api/seasons", json={"name": "Safra 2025"}).json()["id"]
+    # fazenda 999 "existia" na checagem e sumiu antes do INSERT (FK violada, não duplicado)
+    farm_states = plantings._farm_states
+    monkeypatch.setattr(plantings, "_farm_states", lambda db, ids: {**farm_states(db, ids), 999: "MG"})
+    r = c.post("/api/plantings/bulk", json=[
+        {"farm_id": farm_id, "season_id": season_id, "culture": "Soja"},
+        {"farm_id": 999, "season_id": season_id, "culture": "Milho"},
+    ])
+    assert r.status_code == 200, r.text
+    assert r.json()["created"] == 1
+    assert [(s_["row"], s_["reason"]) for s_ in r.json()["skipped"]] == [(2, "farm_not_found")]
+
+def test_bulk_delete_plantings_by_season():
+    c = client()
+    farm_id = _create_farm(c, _create_producer(c))
+    s1 = c.post("/api/seasons", json={"name": "Safra 2024"}).json()["id"]
+    s2 = c.post("/api/seasons", json={"name": "Safra 2025"}).json()["id"]
+    c.post("/api/plantings/bulk", json=[{"farm_id": farm_id, "season_id": s, "culture": x}
+                                        for s in (s1, s2) for x in ("Soja", "Milho", "Café")])
+
+    assert c.delete("/api/plantings").status_code == 400
+    r = c.delete(f"/api/plantings?season_id={s1}")
+    assert r.status_code == 200, r.text
+    assert r.json() == {"farms": 0, "plantings": 3}
+    assert c.delete(f"/api/plantings?season_id={s2}&culture=Soja").json()["plantings"] == 1
+    left = c.get("/api/plantings").json()
+    assert sorted((p["season_id"], p["culture"]) for p in left) == [(s2, "Café"), (s2, "Milho")]
+    assert c.delete(f"/api/plantings/{left[0]['id']}").status_code == 204
+    assert c.delete(f"/api/plantings/{left[0]['id']}").status_code == 404
+
+def test_list_seasons_keyset_pagination():
+    c = client()
+    for year in range(2020, 2025):
+        c.post("/api/seasons", json={"name": f"Safra {year}"})
+    got = pages(c, "/api/seasons", {"limit": 2})
+    assert [[s["name"][-4:] for s in page] for page in got] == [["2020", "2021"], ["2022", "2023"], ["2024"]]
+
+def test_list_plantings_keyset_pagination_with_filters():
+    c = client()
+    farm_id = _create_farm(c, _create_producer(c))
+    s1 = c.post("/api/seasons", json={"name": "Safra 2024"}).json()["id"]
+    s2 = c.post("/api/seasons", json={"name": "Safra 2025"}).json()["id"]
+    c.post("/api/plantings/bulk", json=[{"farm_id": farm_id, "season_id": s, "culture": x}
+                                        for x in ("Soja", "Milho", "Café") for s in (s1, s2)])
+    got = pages(c, "/api/plantings", {"limit": 4})
+    assert [len(page) for page in got] == [4, 2]
+    ids = [p["id"] for page in got for p in page]
+    assert ids == sorted(ids)
+    got = pages(c, "/api/plantings", {"limit": 2, "season_id": s2, "farm_id": farm_id})
+    assert [[p["culture"] for p in page] for page in got] == [["Soja", "Milho"], ["Café"]]
+    assert all(p["season_id"] == s2 for page in got for p in page)